@@ -0,0 +1,123 @@
+import argparse
+from llm_evaluator import get_evaluator
+from repository import get_repository
+from resilience import GradingUnavailableError
+from similarity import get_duplicate_detector
+from search_index import get_search_index
+
+class BatchGrader:
+    """Headless grading of every ungraded submission in the repository."""
+
+    def __init__(self, evaluator=None, repository=None):
+        self.repository = repository or get_repository()
+        self.evaluator = evaluator or get_evaluator()
+        self.duplicates = get_duplicate_detector(self.repository)
+        self.search = get_search_index()
+
+    def find_ungraded(self, question_id=None):
+        """Yield evaluation items for submissions that have no score yet."""
+        # Materialise the ungraded list first so write-backs never race the read cursor
+        submissions = list(self.repository.iter_submissions(question_id, graded=False))
+
+        questions = {}
+        for submission in submissions:
+            # Pending submissions belong to the background grading queue
+            if submission.get('status') == 'pending':
+                continue
+
+            qid = submission['question_id']
+            if qid not in questions:
+                questions[qid] = self.repository.get_question(qid)
+            question = questions[qid]
+            if not question:
+                continue
+
+            yield {
+                "submission": submission,
+                "question": question['question'],
+                "student_answer": submission['answer'],
+                "expected_answer": question.get('expected_answer', ''),
+                "grading_criteria": question.get('grading_criteria', ''),
+                "usage": (qid, question.get('teacher', '')),
+                "question_record": question
+            }
+
+    def run(self, question_id=None, max_workers=8, bypass_cache=False, pack=False):
+        """Grade all ungraded submissions and write results back in order.
+
+        Near-duplicates of graded answers reuse their grade. Near-duplicates of
+        another answer in this run wait for it and then reuse its grade, so
+        each cluster of similar answers costs one LLM call.
+
+        Returns:
+            int: Number of submissions graded
+        """
+        graded = 0
+        followers = {}
+        to_grade = []
+        # Pick up grades saved by other processes since the indexes were read
+        self.duplicates.refresh()
+        for item in self.find_ungraded(question_id):
+            submission = item['submission']
+            if self.duplicates.reuse_grade(submission):
+                self._save(submission)
+                graded += 1
+                continue
+
+            leader = None
+            if self.duplicates.reuse:
+                leader = next((match for match in self.duplicates.find_duplicates(submission)
+                               if match[0] in followers), None)
+            if leader:
+                followers[leader[0]].append((submission, leader[1]))
+            else:
+                followers[submission['id']] = []
+                to_grade.append(item)
+
+        try:
+            results = self.evaluator.evaluate_many(to_grade, max_workers, bypass_cache, pack, details=True)
+            for item, evaluation, score, criteria_scores, graded_by in results:
+                submission = item['submission']
+                self.evaluator.record_grade(submission, item['question_record'], evaluation, score, criteria_scores,
+                                            graded_by)
+                self._save(submission)
+                graded += 1
+
+                for follower, similarity in followers[submission['id']]:
+                    self.duplicates.apply_grade(follower, submission['id'], similarity)
+                    self._save(follower)
+                    graded += 1
+        except GradingUnavailableError as e:
+            # Everything graded so far is saved; the rest stays ungraded for the next run
+            print(f"\nGrading paused: {e}")
+        return graded
+
+    def _save(self, submission):
+        self.repository.save_submission(submission)
+        self.duplicates.record(submission)
+        self.search.add_submission(submission)
+        suffix = f" (same as {submission['duplicate_of']})" if submission.get('duplicate_of') else ""
+        print(f"Graded {submission['id']} ({submission['student_name']}): {submission['score']}{suffix}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade all ungraded submissions without the interactive menu.")
+    parser.add_argument("--question", help="Only grade submissions for this question ID")
+    parser.add_argument("--workers", type=int, default=8, help="Number of concurrent evaluations")
+    parser.add_argument("--rpm", type=int, help="Maximum API requests per minute (overrides GEMINI_REQUESTS_PER_MINUTE)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached evaluations and call the API for every answer")
+    parser.add_argument("--pack", action="store_true", help="Grade several answers to the same question per API request")
+    args = parser.parse_args()
+
+    grader = BatchGrader()
+    if args.rpm is not None:
+        grader.evaluator.requests_per_minute = args.rpm
+    grader.evaluator.warm_up()
+    graded = grader.run(question_id=args.question, max_workers=args.workers, bypass_cache=args.no_cache, pack=args.pack)
+    print(f"\nBatch grading complete. {graded} submissions graded.")
+    if grader.evaluator.cache:
+        stats = grader.evaluator.cache.stats()
+        print(f"Evaluation cache: {stats['hits']} hits, {stats['misses']} misses, {stats['size']} entries")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Answers graded per minute within Gemini's token and request limits.
+
+Grades a synthetic mix of answers (mostly short, some long, a few pasted
+essays) to a handful of questions through FakeLLM, one answer per request
+and packed, with and without truncating oversized answers. The usage ledger
+gives the requests and tokens each run spent, from which the answers per
+minute that fit --tpm and --rpm follow. Also times the budget and ledger
+bookkeeping added to every call.
+
+Run from the repository root:
+    python -m benchmarks.budget_bench --answers 2000 --tpm 32000 --rpm 60
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+
+os.environ["GEMINI_API_KEY"] = "benchmark-key"
+os.environ["GRADER_CACHE_DISABLED"] = "1"
+os.environ["GRADER_USAGE_DISABLED"] = "1"
+os.environ["GRADER_LOCAL_TRIAGE"] = "0"
+
+from llm_evaluator import LLMEvaluator
+from fake_llm import FakeLLM
+from token_budget import TokenBudget
+from usage_ledger import UsageLedger
+from benchmarks.synthetic import synthetic_answer
+
+def make_items(rng, count, questions):
+    items = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.8:
+            answer = synthetic_answer(rng, 10, 80)
+        elif roll < 0.97:
+            answer = synthetic_answer(rng, 200, 600)
+        else:
+            answer = " ".join(synthetic_answer(rng, 500, 500) for _ in range(8))
+        question_id = f"q{i % questions}"
+        items.append({
+            "question": f"Question {question_id}: explain the idea in your own words.",
+            "student_answer": answer,
+            "expected_answer": "A reference answer of moderate length. " * 10,
+            "usage": (question_id, "teacher")
+        })
+    # The batch grader reads submissions question by question
+    items.sort(key=lambda item: item["usage"][0])
+    return items
+
+
+def run(items, pack, max_answer_tokens, args, tmp, name):
+    evaluator = LLMEvaluator()
+    FakeLLM().install(evaluator)
+    evaluator.max_answer_tokens = max_answer_tokens
+    # Packs sized as under the --tpm limit, without waiting on it in real time
+    evaluator.pack_token_budget = min(evaluator.pack_token_budget, args.tpm)
+    evaluator.usage_ledger = UsageLedger(os.path.join(tmp, f"{name}.db"))
+    for _ in evaluator.evaluate_many(items, max_workers=8, pack=pack):
+        pass
+
+    row = evaluator.usage_ledger.report("day")[0]
+    tokens_per_answer = row["total_tokens"] / len(items)
+    answers_per_request = len(items) / row["requests"]
+    return {
+        "requests": row["requests"],
+        "total_tokens": row["total_tokens"],
+        "tokens_per_answer": round(tokens_per_answer),
+        "answers_per_minute": round(min(args.tpm / tokens_per_answer, args.rpm * answers_per_request))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answers", type=int, default=2000)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--tpm", type=int, default=32000, help="Tokens per minute limit")
+    parser.add_argument("--rpm", type=int, default=60, help="Requests per minute limit")
+    parser.add_argument("--max-answer-tokens", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    items = make_items(random.Random(args.seed), args.answers, args.questions)
+    results = {"answers": args.answers, "tpm": args.tpm, "rpm": args.rpm, "runs": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, pack, max_answer_tokens in [
+            ("single", False, 0),
+            ("single_truncated", False, args.max_answer_tokens),
+            ("packed", True, 0),
+            ("packed_truncated", True, args.max_answer_tokens)
+        ]:
+            results["runs"][name] = run(items, pack, max_answer_tokens, args, tmp, name)
+
+        # Bookkeeping per call, with limits far above what the loop uses
+        budget = TokenBudget(tokens_per_minute=10 ** 12, tokens_per_day=10 ** 12, requests_per_day=10 ** 9)
+        ledger = UsageLedger(os.path.join(tmp, "overhead.db"))
+        calls = 100000
+        start = time.perf_counter()
+        for i in range(calls):
+            budget.acquire(500)
+            budget.charge(100)
+            ledger.record(f"q{i % 100}", "teacher", 500, 100)
+        ledger.flush()
+        results["bookkeeping_us_per_call"] = round((time.perf_counter() - start) / calls * 1e6, 2)
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
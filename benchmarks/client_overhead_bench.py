@@ -0,0 +1,61 @@
+"""Measure per-call client overhead of LLMEvaluator against a local stub transport.
+
+The Gemini SDK runs for real up to the RPC, which is replaced by a stub that
+returns a canned response, so only client-side overhead is measured.
+
+Run from the repository root:
+    python -m benchmarks.client_overhead_bench --calls 500
+"""
+import os
+import time
+import argparse
+import google.generativeai as genai
+from google.ai import generativelanguage as glm
+
+STUB_RESPONSE = glm.GenerateContentResponse(candidates=[
+    glm.Candidate(content=glm.Content(parts=[glm.Part(text="EVALUATION: Stub evaluation.\nSCORE: 7")]))
+])
+
+def install_stub_transport():
+    """Answer every generate_content RPC locally instead of over the network."""
+    def generate_content(self, request=None, **kwargs):
+        return STUB_RESPONSE
+    glm.GenerativeServiceClient.generate_content = generate_content
+
+
+def per_call_setup(model_name, prompt):
+    # What every call cost before: configure the SDK (dropping its client) and build a new model
+    genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+    return genai.GenerativeModel(model_name).generate_content(prompt).text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark-key")
+    os.environ["GRADER_CACHE_DISABLED"] = "1"
+    os.environ["GRADER_USAGE_DISABLED"] = "1"
+    install_stub_transport()
+
+    from llm_evaluator import get_evaluator
+    evaluator = get_evaluator()
+    prompt = evaluator._construct_evaluation_prompt("What is 2 + 2?", "4", "4", "10")
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        per_call_setup(evaluator.model, prompt)
+    before = (time.perf_counter() - start) / args.calls
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        evaluator._call_api(prompt)
+    after = (time.perf_counter() - start) / args.calls
+
+    print(f"New client per call:   {before * 1000:.3f} ms/call")
+    print(f"Shared evaluator:      {after * 1000:.3f} ms/call")
+    print(f"Overhead reduction:    {before / after:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Benchmark streaming gradebook export on a synthetic submission tree.
+
+Run from the repository root:
+    python -m benchmarks.gradebook_bench --submissions 1000000
+"""
+import os
+import time
+import argparse
+import resource
+import tempfile
+from repository import SqliteRepository
+from gradebook import Gradebook, iter_gradebook_rows, export_gradebook
+from benchmarks.synthetic import populate
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=1000000)
+    parser.add_argument("--questions", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        repository = SqliteRepository(os.path.join(tmp, "bench.db"))
+        populate(repository, args.questions, args.submissions)
+        print(f"Built {args.submissions} submissions in {time.perf_counter() - start:.1f}s")
+
+        gradebook = Gradebook()
+        start = time.perf_counter()
+        with open(os.devnull, 'w', newline='') as output:
+            written = export_gradebook(iter_gradebook_rows(repository), output, "csv", gradebook)
+        summary = gradebook.summary()
+        elapsed = time.perf_counter() - start
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Exported {written} rows with aggregates in {elapsed:.1f}s ({written / elapsed:,.0f} rows/s)")
+    print(f"Overall median {summary['overall']['median']}, {len(summary['by_question'])} questions aggregated")
+    print(f"Peak RSS: {peak_mb:.0f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""End-to-end grading throughput, latency and storage listing benchmark.
+
+Drives LLMEvaluator and the Student submission flow non-interactively against
+FakeLLM, and times question and submission listings on synthetic data sets.
+
+Run from the repository root:
+    python -m benchmarks.grading_bench --sizes 1000 10000 100000 --latency 0.2 --output results.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+
+# Configure the evaluator before it is imported: fake key, no cache, no local triage, no background workers
+os.environ["GEMINI_API_KEY"] = "benchmark-key"
+os.environ["GRADER_CACHE_DISABLED"] = "1"
+os.environ["GRADER_USAGE_DISABLED"] = "1"
+os.environ["GRADER_LOCAL_TRIAGE"] = "0"
+os.environ["GRADER_ASYNC_GRADING"] = "0"
+
+from llm_evaluator import LLMEvaluator
+from fake_llm import FakeLLM
+from resilience import GradingUnavailableError
+from repository import SqliteRepository, JsonRepository, LogRepository
+from question_catalog import QuestionCatalog
+from grading_queue import GradingQueue
+from student import Student
+from benchmarks.synthetic import populate, synthetic_answer
+from benchmarks.stats import latency_summary
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def make_evaluator(args):
+    evaluator = LLMEvaluator()
+    evaluator.caller.base_delay = 0.01
+    fake = FakeLLM(latency=args.latency, latency_jitter=args.latency_jitter,
+                   error_rate=args.error_rate, seed=args.seed).install(evaluator)
+    return evaluator, fake
+
+
+def bench_evaluator(args, questions):
+    evaluator, fake = make_evaluator(args)
+    rng = random.Random(args.seed)
+    items = []
+    for _ in range(args.calls):
+        question = rng.choice(questions)
+        items.append({
+            "question": question['question'],
+            "student_answer": synthetic_answer(rng),
+            "expected_answer": question['expected_answer'],
+            "grading_criteria": question['grading_criteria']
+        })
+
+    # Sequential calls give the per-call latency distribution
+    samples = []
+    errors = 0
+    for item in items:
+        start = time.perf_counter()
+        try:
+            evaluator.evaluate_answer(item['question'], item['student_answer'],
+                                      item['expected_answer'], item['grading_criteria'])
+        except GradingUnavailableError:
+            errors += 1
+        samples.append(time.perf_counter() - start)
+    sequential = latency_summary(samples)
+    sequential["errors"] = errors
+    sequential["per_sec"] = round(len(items) / sum(samples), 2)
+
+    # evaluate_many gives concurrent throughput
+    start = time.perf_counter()
+    graded = 0
+    try:
+        for _ in evaluator.evaluate_many(items, max_workers=args.workers):
+            graded += 1
+    except GradingUnavailableError:
+        pass
+    elapsed = time.perf_counter() - start
+
+    return {
+        "sequential": sequential,
+        "concurrent": {"workers": args.workers, "graded": graded, "per_sec": round(graded / elapsed, 2)},
+        "fake_llm_calls": fake.calls
+    }
+
+
+def bench_submit(args, tmp, questions):
+    repository = SqliteRepository(os.path.join(tmp, "submit.db"))
+    for question in questions:
+        repository.add_question(question)
+    evaluator, _ = make_evaluator(args)
+    student = Student(repository=repository, evaluator=evaluator)
+    student.grading_queue = GradingQueue(os.path.join(tmp, "queue.db"))
+    rng = random.Random(args.seed)
+
+    results = {}
+    for mode, grade_now in (("queued_intake", False), ("synchronous_grading", True)):
+        samples = []
+        for i in range(args.calls):
+            elapsed, _ = timed(student.submit, rng.choice(questions), f"Student {i}", synthetic_answer(rng), grade_now)
+            samples.append(elapsed)
+        results[mode] = latency_summary(samples)
+        results[mode]["per_sec"] = round(len(samples) / sum(samples), 2)
+    return results
+
+
+def bench_storage(args, tmp, size):
+    results = {}
+    backends = [
+        ("sqlite", lambda: SqliteRepository(os.path.join(tmp, f"storage_{size}.db"))),
+        ("log", lambda: LogRepository(os.path.join(tmp, f"log_{size}")))
+    ]
+    if size <= args.json_max:
+        backends.append(("json", lambda: JsonRepository(os.path.join(tmp, f"json_{size}"))))
+
+    for name, factory in backends:
+        repository = factory()
+        build_time, questions = timed(populate, repository, max(1, size // 100), size, max(1, size // 20))
+
+        catalog = QuestionCatalog(repository)
+        cold, listed = timed(catalog.list_questions)
+        warm, _ = timed(catalog.list_questions)
+        catalog.poll_interval = 0
+        polled, _ = timed(catalog.list_questions)
+
+        rng = random.Random(args.seed)
+        student_samples = [timed(repository.list_student_submissions, f"Student {rng.randrange(max(1, size // 20))}")[0]
+                           for _ in range(args.lookups)]
+        question_samples = [timed(repository.list_submissions, rng.choice(questions)['id'])[0]
+                            for _ in range(args.lookups)]
+
+        results[name] = {
+            "submissions": size,
+            "questions": len(listed),
+            "build_s": round(build_time, 3),
+            "get_all_questions_cold_ms": round(cold * 1000, 3),
+            "get_all_questions_cached_ms": round(warm * 1000, 3),
+            "get_all_questions_repoll_ms": round(polled * 1000, 3),
+            "view_my_submissions": latency_summary(student_samples),
+            "view_question_submissions": latency_summary(question_samples)
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000],
+                        help="Synthetic submission counts for the storage benchmark")
+    parser.add_argument("--json-max", type=int, default=10000,
+                        help="Largest size also benchmarked with the one-file-per-submission JSON backend")
+    parser.add_argument("--calls", type=int, default=200, help="Evaluations and submissions per flow")
+    parser.add_argument("--lookups", type=int, default=20, help="Listing lookups per storage size")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrency for evaluate_many")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean fake LLM latency in seconds")
+    parser.add_argument("--latency-jitter", type=float, default=0.01, help="Standard deviation of fake LLM latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake LLM calls that fail")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": vars(args),
+        "storage": {}
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["GRADER_SEARCH_PATH"] = os.path.join(tmp, "search.db")
+        questions = populate(JsonRepository(os.path.join(tmp, "questions")), 50, 0)
+
+        print("Benchmarking LLMEvaluator...")
+        results["evaluator"] = bench_evaluator(args, questions)
+        print("Benchmarking submission flow...")
+        results["submit"] = bench_submit(args, tmp, questions)
+        for size in args.sizes:
+            print(f"Benchmarking storage with {size} submissions...")
+            results["storage"][str(size)] = bench_storage(args, tmp, size)
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
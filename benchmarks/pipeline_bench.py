@@ -0,0 +1,179 @@
+"""Whole-pipeline grading throughput against the local stand-in Gemini server.
+
+Starts llm_server's stand-in on a free local port, then batch grades the same
+synthetic store of ungraded submissions through each backend: FakeLLM in
+process ('mock'), and the HTTP backend speaking the Gemini and OpenAI formats
+to the stand-in. Every backend answers with the same latency and error
+model, so the differences are the cost of the HTTP path. Reports throughput,
+per-request latency, failed attempts (retried by the evaluator) and the
+stand-in's 429 and failure counts. Then --interactive answers are graded
+one at a time with streaming, as Student Mode does, timing the first text
+shown and the whole evaluation. Needs no network access.
+
+With --baseline, throughput is compared with a previous --output and the run
+fails (exit status 1) if any backend is more than --tolerance slower.
+
+Run from the repository root:
+    python -m benchmarks.pipeline_bench --submissions 2000 --latency 0.05 --output pipeline.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import contextlib
+
+# Every submission goes to the backend: no cache, triage or duplicate reuse
+os.environ["GEMINI_API_KEY"] = "benchmark-key"
+os.environ["GRADER_CACHE_DISABLED"] = "1"
+os.environ["GRADER_USAGE_DISABLED"] = "1"
+os.environ["GRADER_LOCAL_TRIAGE"] = "0"
+os.environ["GRADER_DUPLICATE_REUSE"] = "0"
+
+from llm_evaluator import LLMEvaluator
+from llm_backends import LLMBackend, HTTPBackend
+from llm_server import StandInLLM, create_http_server
+from fake_llm import FakeLLM
+from repository import SqliteRepository
+from batch_grader import BatchGrader
+from benchmarks.synthetic import populate
+from benchmarks.stats import latency_summary
+
+class TimedBackend(LLMBackend):
+    """Wraps a backend, timing every request and counting the failed ones."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.samples = []
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def generate(self, prompt):
+        start = time.perf_counter()
+        try:
+            return self.backend.generate(prompt)
+        except Exception:
+            with self.lock:
+                self.failures += 1
+            raise
+        finally:
+            with self.lock:
+                self.samples.append(time.perf_counter() - start)
+
+    def stream(self, prompt, max_output_tokens=None):
+        start = time.perf_counter()
+        try:
+            yield from self.backend.stream(prompt, max_output_tokens)
+        except Exception:
+            with self.lock:
+                self.failures += 1
+            raise
+        finally:
+            with self.lock:
+                self.samples.append(time.perf_counter() - start)
+
+
+def make_fake(args):
+    return FakeLLM(latency=args.latency, latency_jitter=args.latency_jitter, chunk_delay=args.chunk_delay,
+                   error_rate=args.error_rate, seed=args.seed)
+
+
+def run(name, backend, args, tmp, stand_in=None):
+    repository = SqliteRepository(os.path.join(tmp, f"{name}.db"))
+    populate(repository, args.questions, args.submissions, graded=False, seed=args.seed)
+
+    evaluator = LLMEvaluator()
+    evaluator.caller.base_delay = 0.01
+    timed = TimedBackend(backend)
+    evaluator.backend = timed
+    grader = BatchGrader(evaluator=evaluator, repository=repository)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        graded = grader.run(max_workers=args.workers, pack=args.pack)
+    elapsed = time.perf_counter() - start
+
+    # Interactive grading streams the evaluation as it is written
+    first_text, total = [], []
+    for i in range(args.interactive):
+        seen = []
+        start = time.perf_counter()
+        evaluator.evaluate_answer(f"Interactive question {i}: explain the idea.", f"Answer {i}",
+                                  on_text=lambda text: seen or seen.append(time.perf_counter() - start))
+        total.append(time.perf_counter() - start)
+        first_text.append(seen[0] if seen else total[-1])
+
+    result = {
+        "graded": graded,
+        "seconds": round(elapsed, 2),
+        "per_sec": round(graded / elapsed, 2),
+        "requests": latency_summary(timed.samples),
+        "failed_attempts": timed.failures,
+        "interactive_first_text": latency_summary(first_text),
+        "interactive_total": latency_summary(total)
+    }
+    if stand_in:
+        result["server"] = dict(stand_in.stats)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=2000)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent evaluations")
+    parser.add_argument("--pack", action="store_true", help="Grade several answers per request")
+    parser.add_argument("--interactive", type=int, default=50, help="Answers graded one at a time, streamed")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stand-in latency in seconds")
+    parser.add_argument("--latency-jitter", type=float, default=0.01)
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with 503")
+    parser.add_argument("--rpm", type=int, default=0, help="Stand-in requests per minute before 429s")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Fail if slower than the results in this file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against --baseline")
+    args = parser.parse_args()
+
+    results = {"submissions": args.submissions, "workers": args.workers, "latency": args.latency,
+               "pack": args.pack, "backends": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["GRADER_SEARCH_PATH"] = os.path.join(tmp, "search.db")
+        results["backends"]["mock"] = run("mock", make_fake(args), args, tmp)
+
+        for wire_format in ("gemini", "openai"):
+            stand_in = StandInLLM(make_fake(args), requests_per_minute=args.rpm)
+            server = create_http_server("127.0.0.1", 0, stand_in)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base_url = f"http://127.0.0.1:{server.server_address[1]}" + ("/v1" if wire_format == "openai" else "")
+            try:
+                backend = HTTPBackend(base_url, "stand-in", "benchmark-key", wire_format)
+                results["backends"][f"http_{wire_format}"] = run(f"http_{wire_format}", backend, args, tmp, stand_in)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures = []
+        for name, result in results["backends"].items():
+            before = baseline.get("backends", {}).get(name)
+            if before and result["per_sec"] < before["per_sec"] * (1 - args.tolerance):
+                failures.append(f"{name}: {result['per_sec']}/s against {before['per_sec']}/s in {args.baseline}")
+        for failure in failures:
+            print(f"Slower than baseline: {failure}")
+        if failures:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
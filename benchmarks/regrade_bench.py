@@ -0,0 +1,67 @@
+"""Regrade throughput with different numbers of loading processes.
+
+Fills a temporary store with graded synthetic submissions, regrades it once
+to warm up, then times a forced
+regrade of everything against FakeLLM for each --processes value.
+
+Run from the repository root:
+    python -m benchmarks.regrade_bench --submissions 20000 --storage json --processes 1 2 4
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+
+os.environ["GEMINI_API_KEY"] = "benchmark-key"
+os.environ["GRADER_CACHE_DISABLED"] = "1"
+os.environ["GRADER_USAGE_DISABLED"] = "1"
+os.environ["GRADER_LOCAL_TRIAGE"] = "0"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--storage", choices=["sqlite", "json", "log"], default="sqlite")
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--submissions", type=int, default=20000)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent evaluations")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake API latency in seconds")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Worker processes find the store through the environment
+        os.environ["GRADER_STORAGE"] = args.storage
+        os.environ["GRADER_DB_PATH"] = os.path.join(tmp, "grader.db")
+        os.environ["GRADER_DATA_DIR"] = tmp
+        os.environ["GRADER_SEARCH_PATH"] = os.path.join(tmp, "search.db")
+        from repository import get_repository
+        from llm_evaluator import LLMEvaluator
+        from fake_llm import FakeLLM
+        from regrade import Regrader
+        from benchmarks.synthetic import populate
+
+        populate(get_repository(), args.questions, args.submissions)
+        evaluator = LLMEvaluator()
+        FakeLLM(latency=args.latency).install(evaluator)
+        regrader = Regrader(evaluator=evaluator, checkpoint_dir=os.path.join(tmp, "regrade"))
+
+        regrader.run(max_workers=args.workers, processes=1, force=True)
+
+        results = {"storage": args.storage, "submissions": args.submissions, "questions": args.questions, "runs": {}}
+        for processes in args.processes:
+            start = time.perf_counter()
+            regraded, _ = regrader.run(max_workers=args.workers, processes=processes, force=True)
+            elapsed = time.perf_counter() - start
+            results["runs"][str(processes)] = {
+                "seconds": round(elapsed, 2),
+                "submissions_per_sec": round(regraded / elapsed)
+            }
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Search index build time and query latency on a synthetic corpus.
+
+Run from the repository root:
+    python -m benchmarks.search_bench --documents 1000000
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+from search_index import SearchIndex
+from benchmarks.synthetic import SUBJECTS, WORDS, synthetic_answer
+from benchmarks.stats import latency_summary
+
+QUERIES = {
+    "common_word": {"text": "energy"},
+    "two_words": {"text": "force velocity"},
+    "stemmed": {"text": "temperatures"},
+    "student": {"text": "Student 4242"},
+    "subject_filter": {"text": "energy", "subject": "Physics"},
+    "score_filter": {"text": "gene protein", "min_score": 8},
+    "date_filter": {"text": "reaction", "since": "2024-01-05", "until": "2024-01-05"},
+}
+
+def build(index, documents, questions, seed, batch_size=10000):
+    rng = random.Random(seed)
+    for i in range(questions):
+        index.add_question({
+            "id": f"q{i:06d}",
+            "subject": SUBJECTS[i % len(SUBJECTS)],
+            "topic": f"Topic {i % 20}",
+            "question": f"Synthetic question {i}: explain {rng.choice(WORDS)} and {rng.choice(WORDS)}.",
+            "expected_answer": synthetic_answer(rng, 10, 30),
+            "created_at": "2024-01-01T00:00:00"
+        })
+
+    batch = []
+    for i in range(documents):
+        batch.append({
+            "id": f"s{i:08d}",
+            "question_id": f"q{rng.randrange(questions):06d}",
+            "student_name": f"Student {i % 5000}",
+            "answer": synthetic_answer(rng),
+            "evaluation": synthetic_answer(rng, 5, 20),
+            "score": rng.randint(0, 10),
+            "submitted_at": f"2024-{1 + (i // 100000) % 12:02d}-{1 + (i // 3000) % 28:02d}T12:00:00"
+        })
+        if len(batch) >= batch_size:
+            index.add_submissions(batch)
+            batch = []
+    if batch:
+        index.add_submissions(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=100000, help="Synthetic submissions to index")
+    parser.add_argument("--questions", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=20, help="Runs of each query")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SearchIndex(os.path.join(tmp, "search.db"))
+        start = time.perf_counter()
+        build(index, args.documents, args.questions, args.seed)
+        build_time = time.perf_counter() - start
+
+        results = {
+            "documents": args.documents + args.questions,
+            "build_s": round(build_time, 2),
+            "documents_per_sec": round((args.documents + args.questions) / build_time),
+            "database_mb": round(os.path.getsize(os.path.join(tmp, "search.db")) / (1024 * 1024), 1),
+            "queries": {}
+        }
+        for name, query in QUERIES.items():
+            samples = []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                matches = index.search(**query)
+                samples.append(time.perf_counter() - start)
+            results["queries"][name] = latency_summary(samples)
+            results["queries"][name]["results"] = len(matches)
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Load test for the HTTP service on one machine.
+
+Starts the service in-process on a temporary data directory, with FakeLLM
+grading submissions in the background, then drives a mix of requests from
+concurrent keep-alive clients and reports sustained requests/sec and latency.
+
+Run from the repository root:
+    python -m benchmarks.service_load --clients 16 --duration 20
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import http.client
+
+def run_client(port, duration, seed, question_ids, samples, errors):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    student = f"Student {seed}"
+    submission_ids = []
+    deadline = time.monotonic() + duration
+
+    while time.monotonic() < deadline:
+        roll = rng.random()
+        if roll < 0.3:
+            method, path = "POST", f"/questions/{rng.choice(question_ids)}/submissions"
+            body = json.dumps({"student_name": student, "answer": f"Answer {rng.random()}"})
+        elif roll < 0.55:
+            method, path, body = "GET", f"/questions?offset={rng.randrange(0, 50)}&limit=20", None
+        elif roll < 0.8:
+            method, path, body = "GET", f"/students/{student.replace(' ', '%20')}/submissions?limit=20", None
+        elif roll < 0.95 and submission_ids:
+            method, path, body = "GET", f"/submissions/{rng.choice(submission_ids)}", None
+        else:
+            method, path = "POST", "/questions"
+            body = json.dumps({"subject": "Load", "topic": "Test", "question": f"Question {rng.random()}"})
+
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            errors.append(path)
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        samples.append((path.split("?")[0].split("/")[1], time.perf_counter() - start))
+
+        if response.status >= 400:
+            errors.append(f"{response.status} {path}")
+        elif method == "POST" and "/submissions" in path:
+            submission_ids.append(json.loads(payload)["id"])
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent keep-alive clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--questions", type=int, default=100, help="Questions created before the run")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency in seconds")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="grader-load-")
+    os.environ.update({
+        "GEMINI_API_KEY": "load-test-key",
+        "GRADER_CACHE_DISABLED": "1",
+        "GRADER_DB_PATH": os.path.join(tmp, "grader.db"),
+        "GRADER_QUEUE_PATH": os.path.join(tmp, "queue.db"),
+        "GRADER_SEARCH_PATH": os.path.join(tmp, "search.db"),
+        "GRADER_USAGE_PATH": os.path.join(tmp, "usage.db"),
+    })
+
+    from llm_evaluator import get_evaluator
+    from fake_llm import FakeLLM
+    from service import GraderService, create_http_server
+    from grading_queue import start_background_workers
+    from benchmarks.stats import latency_summary
+
+    FakeLLM(latency=args.latency).install(get_evaluator())
+    service = GraderService()
+    question_ids = [
+        service.teacher.add_question("Load", "Test", f"Question {i}")['id'] for i in range(args.questions)
+    ]
+
+    server = create_http_server("127.0.0.1", 0, service)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    samples = []
+    errors = []
+    clients = [
+        threading.Thread(target=run_client, args=(port, args.duration, i, question_ids, samples, errors))
+        for i in range(args.clients)
+    ]
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    # Student already started the pool; this returns it so it can be stopped before exit
+    start_background_workers(service.student.repository, service.student.evaluator).stop()
+
+    by_endpoint = {}
+    for endpoint, latency in samples:
+        by_endpoint.setdefault(endpoint, []).append(latency)
+
+    results = {
+        "clients": args.clients,
+        "duration_s": round(elapsed, 2),
+        "requests": len(samples),
+        "errors": len(errors),
+        "requests_per_sec": round(len(samples) / elapsed, 1),
+        "latency": latency_summary([latency for _, latency in samples]),
+        "by_endpoint": {endpoint: latency_summary(values) for endpoint, values in sorted(by_endpoint.items())},
+        "queue": service.student.grading_queue.counts()
+    }
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+    if errors:
+        print(f"First errors: {errors[:5]}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Cold-start import time of the command line entry points.
+
+Each entry point is imported in a fresh interpreter with `python -X importtime`,
+--runs times, and the median cumulative import time is reported along with
+the wall time of the whole process and the slowest modules it imported. The
+teacher and batch grading entry points have a cold-start budget; the run
+fails (exit status 1) if either goes over it or if any entry point imports
+the Gemini SDK, which should only load on the first real API call.
+
+Run from the repository root:
+    python -m benchmarks.startup_bench --runs 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+# Modules imported by each entry point; Teacher Mode is main.py then teacher.py
+ENTRY_POINTS = {
+    "teacher": ["main", "teacher"],
+    "batch_grader": ["batch_grader"],
+    "grading_worker": ["grading_worker"],
+    "regrade": ["regrade"],
+    "gradebook": ["gradebook"],
+    "service": ["service"],
+    "student": ["student"]
+}
+
+# Median import time allowed, in milliseconds, excluding interpreter startup
+COLD_START_BUDGET_MS = {
+    "teacher": 100,
+    "batch_grader": 100
+}
+
+SDK_MODULE = "google.generativeai"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_once(modules):
+    """Import modules in a new interpreter.
+
+    Returns:
+        tuple: (import_ms, wall_ms, {module: cumulative_ms}) for one run
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        capture_output=True, text=True, check=True, cwd=ROOT
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        if total.strip().isdigit():
+            cumulative[name.strip()] = int(total) / 1000
+    return sum(cumulative.get(module, 0) for module in modules), wall_ms, cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="Slowest imported modules to list per entry point")
+    parser.add_argument("--no-check", action="store_true", help="Report only; do not fail over budget")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    _, baseline_ms, _ = import_once(["sys"])
+    results = {"interpreter_ms": round(baseline_ms, 1), "entry_points": {}}
+    failures = []
+    for name, modules in ENTRY_POINTS.items():
+        runs = [import_once(modules) for _ in range(args.runs)]
+        import_ms = statistics.median(run[0] for run in runs)
+        cumulative = runs[-1][2]
+        # Project modules only; the standard library and site-packages are what they are
+        ours = {module: ms for module, ms in cumulative.items()
+                if module not in modules and os.path.exists(os.path.join(ROOT, module + ".py"))}
+        entry = {
+            "import_ms": round(import_ms, 1),
+            "wall_ms": round(statistics.median(run[1] for run in runs), 1),
+            "imports_sdk": SDK_MODULE in cumulative,
+            "slowest": {module: round(ms, 1) for module, ms in sorted(ours.items(), key=lambda item: -item[1])[:args.top]}
+        }
+        budget = COLD_START_BUDGET_MS.get(name)
+        if budget:
+            entry["budget_ms"] = budget
+            if import_ms > budget:
+                failures.append(f"{name} imports in {import_ms:.1f} ms, over its {budget} ms budget")
+        if entry["imports_sdk"]:
+            failures.append(f"{name} imports {SDK_MODULE} at startup")
+        results["entry_points"][name] = entry
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    for failure in failures:
+        print(failure)
+    if failures and not args.no_check:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Perceived grading latency and output size with and without streaming.
+
+FakeLLM writes a long evaluation, the score, then further remarks, one chunk
+every --chunk-delay seconds, roughly the pace of a real model. For each answer
+this records when the student sees the first evaluation text, when the score
+is known, and how many response characters were received, first with
+GEMINI_STREAM off (wait for the full response) and then on. A share of
+responses (--runaway-rate) never write a score, to exercise the output cap.
+
+Run from the repository root:
+    python -m benchmarks.stream_bench --answers 50
+"""
+import os
+import json
+import time
+import random
+import argparse
+
+os.environ["GEMINI_API_KEY"] = "benchmark-key"
+os.environ["GRADER_CACHE_DISABLED"] = "1"
+os.environ["GRADER_USAGE_DISABLED"] = "1"
+os.environ["GRADER_LOCAL_TRIAGE"] = "0"
+
+from llm_evaluator import LLMEvaluator
+from fake_llm import FakeLLM
+from benchmarks.synthetic import synthetic_answer
+from benchmarks.stats import latency_summary
+
+def make_response(prompt, rng, runaway_rate):
+    evaluation = synthetic_answer(rng, 60, 120)
+    if rng.random() < runaway_rate:
+        return "EVALUATION: " + " ".join(synthetic_answer(rng, 200, 200) for _ in range(5))
+    remarks = synthetic_answer(rng, 40, 80)
+    return f"EVALUATION: {evaluation}\nSCORE: {rng.randint(0, 100)}\n\nAdditional remarks: {remarks}"
+
+
+def run(stream, args):
+    os.environ["GEMINI_STREAM"] = "1" if stream else "0"
+    os.environ["GEMINI_MAX_OUTPUT_TOKENS"] = str(args.max_output_tokens)
+    evaluator = LLMEvaluator()
+    fake = FakeLLM(latency=args.latency, chunk_chars=args.chunk_chars, chunk_delay=args.chunk_delay).install(evaluator)
+    rng = random.Random(args.seed)
+    fake.respond = lambda prompt: make_response(prompt, rng, args.runaway_rate)
+    if not stream:
+        # A non-streamed call returns only after the whole response is written
+        evaluator._call_api = lambda prompt: "".join(fake.stream(prompt))
+
+    first_text, score_known = [], []
+    for i in range(args.answers):
+        start = time.perf_counter()
+        seen = []
+
+        def show(text):
+            if text and not seen:
+                seen.append(time.perf_counter() - start)
+
+        evaluator.evaluate_answer(f"Question {i}", f"Answer {i}", on_text=show)
+        elapsed = time.perf_counter() - start
+        first_text.append(seen[0] if seen else elapsed)
+        score_known.append(elapsed)
+
+    return {
+        "first_text": latency_summary(first_text),
+        "score_known": latency_summary(score_known),
+        "response_chars_received": fake.streamed_chars
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answers", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds before the first chunk")
+    parser.add_argument("--chunk-chars", type=int, default=16)
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="Seconds between chunks")
+    parser.add_argument("--runaway-rate", type=float, default=0.1, help="Share of responses with no score")
+    parser.add_argument("--max-output-tokens", type=int, default=1024)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {"answers": args.answers, "buffered": run(False, args), "streamed": run(True, args)}
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
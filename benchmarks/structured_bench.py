@@ -0,0 +1,100 @@
+"""Structured grade parsing speed, repairs and re-requests.
+
+Times parse_grading on well-formed, repairable (code fences, trailing commas,
+numbers as strings) and unusable (cut off) JSON responses next to the text
+parser, then grades answers through LLMEvaluator with FakeLLM returning a
+share of cut-off responses to count the extra requests.
+
+Run from the repository root:
+    python -m benchmarks.structured_bench --responses 20000 --malformed-rate 0.05
+"""
+import os
+import json
+import time
+import random
+import argparse
+
+os.environ["GEMINI_API_KEY"] = "benchmark-key"
+os.environ["GRADER_CACHE_DISABLED"] = "1"
+os.environ["GRADER_USAGE_DISABLED"] = "1"
+os.environ["GRADER_LOCAL_TRIAGE"] = "0"
+os.environ["GEMINI_RESPONSE_FORMAT"] = "json"
+
+from llm_evaluator import LLMEvaluator
+from fake_llm import FakeLLM
+from grading_schema import rubric_criteria, parse_grading, InvalidGradingError
+from resilience import GradingUnavailableError
+
+CRITERIA = "Defines the concept; Gives the units; Works an example; Explains the reasoning"
+
+def make_responses(rng, count, criteria):
+    responses = {"valid": [], "repairable": [], "invalid": []}
+    for _ in range(count):
+        scores = [{"name": name, "score": rng.randint(0, maximum), "max_score": maximum,
+                   "feedback": "Some feedback on this criterion."} for name, maximum in criteria]
+        data = {"criteria": scores, "total": sum(item["score"] for item in scores),
+                "max_score": sum(maximum for _, maximum in criteria), "feedback": "Overall feedback. " * 5}
+        text = json.dumps(data)
+        responses["valid"].append(text)
+        scores[0]["score"] = str(scores[0]["score"])
+        responses["repairable"].append("```json\n" + json.dumps(data, indent=2).replace("\n}", ",\n}") + "\n```")
+        responses["invalid"].append(text[:len(text) // 2])
+    return responses
+
+
+def time_per_call(func, items):
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return round((time.perf_counter() - start) / len(items) * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--responses", type=int, default=20000)
+    parser.add_argument("--answers", type=int, default=1000, help="Answers graded through the evaluator")
+    parser.add_argument("--malformed-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    criteria = rubric_criteria(CRITERIA, 100)
+    responses = make_responses(random.Random(args.seed), args.responses, criteria)
+    evaluator = LLMEvaluator()
+
+    def parse(response):
+        try:
+            return parse_grading(response, criteria, 100)
+        except InvalidGradingError:
+            return None
+
+    text_responses = [f"EVALUATION: {'Overall feedback. ' * 5}\nSCORE: {i % 101}" for i in range(args.responses)]
+    results = {
+        "parse_us": {kind: time_per_call(parse, items) for kind, items in responses.items()},
+        "text_parse_us": time_per_call(evaluator._parse_evaluation_response, text_responses),
+        "repaired": sum(parse(r)[3] for r in responses["repairable"]),
+        "rejected": sum(parse(r) is None for r in responses["invalid"])
+    }
+
+    fake = FakeLLM(malformed_rate=args.malformed_rate, seed=args.seed).install(evaluator)
+    failed = 0
+    for i in range(args.answers):
+        try:
+            evaluator.evaluate_answer(f"Question {i}", f"Answer {i}", "", CRITERIA)
+        except GradingUnavailableError:
+            # Unusable twice in a row; in the app the answer would stay pending
+            failed += 1
+    results["evaluator"] = {
+        "answers": args.answers,
+        "llm_calls": fake.calls,
+        "re_requests": fake.calls - args.answers,
+        "failed": failed
+    }
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Synthetic question and submission data for benchmarks."""
+import random
+
+SUBJECTS = ["Math", "Physics", "Chemistry", "Biology", "History"]
+
+WORDS = ("the energy force cell atom reaction equation because therefore increases decreases "
+         "velocity mass temperature pressure gene protein war treaty empire function derivative").split()
+
+def synthetic_answer(rng, min_words=5, max_words=80):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+
+def populate(repository, questions, submissions, students=5000, graded=True, seed=42, batch_size=10000):
+    """Fill a repository with random questions and submissions.
+
+    Returns:
+        list: The generated question dicts
+    """
+    rng = random.Random(seed)
+
+    question_list = []
+    for i in range(questions):
+        question = {
+            "id": f"q{i:06d}",
+            "subject": SUBJECTS[i % len(SUBJECTS)],
+            "topic": f"Topic {i % 20}",
+            "question": f"Synthetic question {i}: explain {rng.choice(WORDS)} and {rng.choice(WORDS)}.",
+            "expected_answer": synthetic_answer(rng, 10, 30),
+            "grading_criteria": rng.choice(["", "10", "20"]),
+            "created_at": f"2024-01-01T00:{(i // 60) % 60:02d}:{i % 60:02d}"
+        }
+        repository.add_question(question)
+        question_list.append(question)
+
+    # Bulk insert where the repository supports it
+    save_batch = getattr(repository, "save_submissions", None)
+
+    batch = []
+    for i in range(submissions):
+        submission = {
+            "id": f"s{i:08d}",
+            "question_id": rng.choice(question_list)['id'],
+            "student_name": f"Student {i % students}",
+            "answer": synthetic_answer(rng),
+            "submitted_at": f"2024-02-01T{(i // 3600) % 24:02d}:{(i // 60) % 60:02d}:{i % 60:02d}"
+        }
+        if graded:
+            submission["evaluation"] = "Synthetic evaluation."
+            submission["score"] = rng.randint(0, 10)
+            submission["status"] = "graded"
+
+        if save_batch:
+            batch.append(submission)
+            if len(batch) >= batch_size:
+                save_batch(batch)
+                batch = []
+        else:
+            repository.save_submission(submission)
+    if batch:
+        save_batch(batch)
+
+    return question_list
@@ -0,0 +1,130 @@
+"""How many LLM calls local triage avoids, and how accurate the skipped grades are.
+
+Generates answers of known quality against synthetic expected answers:
+near-copies, partial answers, off-topic answers, padded answers and blanks,
+plus an --adversarial share of answers lexical scoring cannot judge: copies
+of the expected answer that negate it, and correct answers written in
+another script. For each confidence threshold it reports the share of
+answers the local scorer would grade on its own and the mean error of those
+grades, overall and for the adversarial answers, then grades the whole set
+through LLMEvaluator (with FakeLLM and triage on) to count actual API calls.
+
+Run from the repository root:
+    python -m benchmarks.triage_bench --answers 2000
+"""
+import os
+import json
+import random
+import argparse
+
+os.environ["GEMINI_API_KEY"] = "benchmark-key"
+os.environ["GRADER_CACHE_DISABLED"] = "1"
+os.environ["GRADER_USAGE_DISABLED"] = "1"
+os.environ["GRADER_LOCAL_TRIAGE"] = "1"
+
+from llm_evaluator import LLMEvaluator
+from local_scorer import LocalScorer
+from fake_llm import FakeLLM
+
+VOCABULARY = [f"{prefix}{suffix}" for prefix in ("kin", "therm", "bio", "geo", "chem", "astro", "electr", "hydr")
+              for suffix in ("ase", "ite", "on", "ium", "ol", "ine", "ene", "ode", "yst", "ax", "ure", "ent")]
+
+# Latin letters mapped to Cyrillic ones, standing in for an answer in another script
+CYRILLIC = str.maketrans("abcdeghiklmnoprstuxyz", "абцдегхиклмнопрстуксз")
+
+def make_question(rng, number):
+    key_terms = rng.sample(VOCABULARY, 12)
+    return {
+        "question": f"Question {number}: describe how {key_terms[0]} relates to {key_terms[1]}.",
+        "expected_answer": " ".join(rng.choice(key_terms) if rng.random() < 0.8 else "the" for _ in range(30)),
+        "grading_criteria": "10",
+        "key_terms": key_terms
+    }
+
+
+def make_adversarial_answer(rng, question):
+    """Return (answer, true_fraction) for an answer that defeats lexical scoring."""
+    words = question['expected_answer'].split()
+    if rng.random() < 0.5:
+        # Every key term kept, every one denied
+        return " ".join(f"not {word}" if word != "the" else word for word in words), 0.0
+    return " ".join(words).translate(CYRILLIC), 1.0
+
+
+def make_answer(rng, question):
+    """Return (answer, true_fraction) for a random answer category."""
+    key_terms = question['key_terms']
+    off_topic = [word for word in VOCABULARY if word not in key_terms]
+    category = rng.choice(["copy", "copy", "partial", "off_topic", "padded", "blank"])
+
+    if category == "copy":
+        words = question['expected_answer'].split()
+        rng.shuffle(words)
+        return " ".join(words[:int(len(words) * rng.uniform(0.8, 1.0))]), 1.0
+    if category == "partial":
+        covered = key_terms[:6]
+        return " ".join(rng.choice(covered + off_topic[:6]) for _ in range(25)), 0.5
+    if category == "off_topic":
+        return " ".join(rng.choice(off_topic) for _ in range(25)), 0.0
+    if category == "padded":
+        return " ".join(rng.choice(off_topic) for _ in range(60)) + " " + key_terms[0], 0.0
+    return rng.choice(["", "idk", "?"]), 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--answers", type=int, default=2000)
+    parser.add_argument("--adversarial", type=float, default=0.2, help="Share of adversarial answers")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 0.7, 0.8, 0.9, 0.95])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    questions = [make_question(rng, i) for i in range(args.questions)]
+    items = []
+    for _ in range(args.answers):
+        question = rng.choice(questions)
+        adversarial = rng.random() < args.adversarial
+        answer, truth = (make_adversarial_answer if adversarial else make_answer)(rng, question)
+        items.append((question, answer, truth, adversarial))
+
+    scorer = LocalScorer()
+    scored = []
+    for question, answer, truth, adversarial in items:
+        _, score, confidence = scorer.evaluate(question['question'], answer, question['expected_answer'],
+                                               question['grading_criteria'], 10)
+        scored.append((score, confidence, truth * 10, adversarial))
+
+    adversarial_count = sum(item[3] for item in items)
+    results = {"answers": len(items), "adversarial_answers": adversarial_count, "thresholds": {}}
+    for threshold in args.thresholds:
+        local = [(score, truth) for score, confidence, truth, _ in scored if confidence >= threshold]
+        fooled = [(score, truth) for score, confidence, truth, adversarial in scored
+                  if confidence >= threshold and adversarial]
+        results["thresholds"][str(threshold)] = {
+            "llm_calls_avoided": round(len(local) / len(items), 3),
+            "mean_abs_error_of_local_grades": round(sum(abs(s - t) for s, t in local) / len(local), 2) if local else None,
+            "adversarial_graded_locally": round(len(fooled) / adversarial_count, 3) if adversarial_count else None,
+            "mean_abs_error_of_adversarial_local_grades":
+                round(sum(abs(s - t) for s, t in fooled) / len(fooled), 2) if fooled else None
+        }
+
+    evaluator = LLMEvaluator()
+    fake = FakeLLM().install(evaluator)
+    for question, answer, _, _ in items:
+        evaluator.evaluate_answer(question['question'], answer, question['expected_answer'], question['grading_criteria'])
+    results["evaluator"] = {
+        "triage_confidence": evaluator.triage_confidence,
+        "llm_calls": fake.calls,
+        "llm_calls_avoided": round(1 - fake.calls / len(items), 3)
+    }
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from metrics import metrics
+
+class EvaluationCache:
+    """Persistent LLM evaluation cache keyed on a hash of the prompt and model.
+
+    Entries are evicted least-recently-used first once max_entries is exceeded.
+    """
+
+    def __init__(self, path="data/evaluation_cache.db", max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS evaluations (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                evaluation TEXT NOT NULL,
+                score INTEGER NOT NULL,
+                criteria TEXT,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_evaluations_last_used ON evaluations (last_used)")
+
+        # Caches created before structured grades had per-criterion scores
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(evaluations)")]
+        if "criteria" not in columns:
+            self.conn.execute("ALTER TABLE evaluations ADD COLUMN criteria TEXT")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(prompt, model):
+        """Return the cache key for a constructed prompt and model name."""
+        return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return (evaluation_text, score, criteria_scores) for a key, or None on a miss.
+
+        criteria_scores is None unless the evaluation was a structured grade.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT evaluation, score, criteria FROM evaluations WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                metrics.inc("grader_cache_requests_total", result="miss")
+                return None
+
+            self.hits += 1
+            metrics.inc("grader_cache_requests_total", result="hit")
+            self.conn.execute("UPDATE evaluations SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            return row[0], row[1], json.loads(row[2]) if row[2] else None
+
+    def put(self, key, model, evaluation, score, criteria_scores=None):
+        """Store an evaluation, evicting the least recently used entries if full."""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO evaluations (key, model, evaluation, score, criteria, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, evaluation, score, json.dumps(criteria_scores) if criteria_scores else None, now, now)
+            )
+
+            count = self.conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+            if count > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM evaluations WHERE key IN "
+                    "(SELECT key FROM evaluations ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self.conn.commit()
+
+    def clear(self):
+        """Remove every cached evaluation."""
+        with self.lock:
+            self.conn.execute("DELETE FROM evaluations")
+            self.conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters and the current number of entries."""
+        with self.lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "size": size, "max_entries": self.max_entries}
+
+
+def cache_from_env():
+    """Build the evaluation cache from environment settings, or None if disabled."""
+    if os.getenv("GRADER_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+
+    max_entries = os.getenv("GRADER_CACHE_MAX_ENTRIES", "")
+    return EvaluationCache(
+        path=os.getenv("GRADER_CACHE_PATH", "data/evaluation_cache.db"),
+        max_entries=int(max_entries) if max_entries.isdigit() else 10000
+    )
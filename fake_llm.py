@@ -0,0 +1,132 @@
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from llm_backends import LLMBackend
+from token_budget import CHARS_PER_TOKEN
+
+CRITERION_PATTERN = re.compile(r'^\s*- (.+) \(0-(\d+)\)$', re.MULTILINE)
+
+class FakeAPIError(Exception):
+    """An injected API failure carrying an HTTP-style status code."""
+
+    def __init__(self, code, message="Injected API failure"):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class FakeLLM(LLMBackend):
+    """Local stand-in for a model API with injectable faults, the 'mock' backend.
+
+    Answers in the EVALUATION:/SCORE: format (numbered sections for packed
+    prompts) with a score derived from a hash of the prompt, so results are
+    repeatable. Structured prompts get a JSON grade instead, and a
+    malformed_rate share of those are cut off part way. Latency, error rate
+    and hangs are configurable; all randomness comes from seed. Streamed calls yield the same response in chunks of
+    chunk_chars characters, chunk_delay seconds apart.
+
+    Usage:
+        FakeLLM(latency=0.2, error_rate=0.1).install(evaluator)
+    """
+
+    name = "mock"
+
+    def __init__(self, latency=0.0, latency_jitter=0.0, error_rate=0.0, error_code=503,
+                 hang_rate=0.0, hang_seconds=30.0, chunk_chars=16, chunk_delay=0.0,
+                 malformed_rate=0.0, seed=0):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.chunk_chars = chunk_chars
+        self.chunk_delay = chunk_delay
+        self.malformed_rate = malformed_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+        self.streamed_chars = 0
+        self.lock = threading.Lock()
+
+    def install(self, evaluator):
+        """Make this fake an evaluator's backend."""
+        evaluator.backend = self
+        return self
+
+    def generate(self, prompt):
+        self._wait_or_fail()
+        return self.respond(prompt)
+
+    def stream(self, prompt, max_output_tokens=None):
+        """Yield the response in chunks; streamed_chars counts what the caller consumed."""
+        self._wait_or_fail()
+        response = self.respond(prompt)
+        if max_output_tokens:
+            response = response[:max_output_tokens * CHARS_PER_TOKEN]
+        for start in range(0, len(response), self.chunk_chars):
+            if start and self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            chunk = response[start:start + self.chunk_chars]
+            with self.lock:
+                self.streamed_chars += len(chunk)
+            yield chunk
+
+    def warm_up(self):
+        return True
+
+    def _wait_or_fail(self):
+        with self.lock:
+            self.calls += 1
+            roll = self.random.random()
+            delay = max(0.0, self.random.gauss(self.latency, self.latency_jitter)) if self.latency_jitter else self.latency
+
+        if roll < self.hang_rate:
+            time.sleep(self.hang_seconds)
+        elif delay:
+            time.sleep(delay)
+
+        if roll >= self.hang_rate and roll < self.hang_rate + self.error_rate:
+            with self.lock:
+                self.failures += 1
+            raise FakeAPIError(self.error_code)
+
+    def respond(self, prompt):
+        """Build a well-formed response for a single, packed or structured evaluation prompt."""
+        criteria = CRITERION_PATTERN.findall(prompt)
+        if criteria and '"criteria"' in prompt:
+            return self._structured(prompt, criteria)
+
+        max_match = re.search(r'score from 0-(\d+)', prompt)
+        max_score = int(max_match.group(1)) if max_match else 100
+
+        answers = re.findall(r'Student Answer (\d+):', prompt)
+        if not answers:
+            return f"EVALUATION: Fake evaluation.\nSCORE: {self._score(prompt, max_score)}"
+
+        sections = []
+        for number in answers:
+            score = self._score(f"{prompt}\0{number}", max_score)
+            sections.append(f"EVALUATION {number}: Fake evaluation of answer {number}.\nSCORE {number}: {score}")
+        return "\n".join(sections)
+
+    def _score(self, text, max_score):
+        return int(hashlib.sha256(text.encode("utf-8")).hexdigest(), 16) % (max_score + 1)
+
+    def _structured(self, prompt, criteria):
+        scores = [
+            {"name": name, "score": self._score(f"{prompt}\0{name}", int(maximum)), "max_score": int(maximum),
+             "feedback": f"Fake feedback on {name}."}
+            for name, maximum in criteria
+        ]
+        response = json.dumps({
+            "criteria": scores,
+            "total": sum(item["score"] for item in scores),
+            "max_score": sum(item["max_score"] for item in scores),
+            "feedback": "Fake evaluation."
+        })
+        with self.lock:
+            malformed = self.random.random() < self.malformed_rate
+        return response[:len(response) // 2] if malformed else response
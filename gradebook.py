@@ -0,0 +1,212 @@
+import sys
+import csv
+import json
+import argparse
+from collections import Counter
+from repository import get_repository
+
+GRADEBOOK_FIELDS = [
+    "submission_id", "question_id", "subject", "topic", "student_name",
+    "submitted_at", "status", "score", "max_score", "criteria_scores"
+]
+
+def max_score_for(question):
+    """Max score implied by a question's grading criteria (same rule as the evaluator prompt)."""
+    grading_criteria = question.get('grading_criteria', '')
+    if grading_criteria and grading_criteria.isdigit():
+        return int(grading_criteria)
+    return 100
+
+
+def percent_of(score, max_score):
+    """Return score as a percentage of max_score, capped at 100 and rounded to 2 places."""
+    if not max_score:
+        return 0.0
+    return min(100.0, round(score * 100 / max_score, 2))
+
+
+def iter_gradebook_rows(repository, question_id=None):
+    """Yield one flat gradebook row per submission without loading them all."""
+    questions = {}
+    for submission in repository.iter_submissions(question_id):
+        qid = submission['question_id']
+        if qid not in questions:
+            questions[qid] = repository.get_question(qid) or {}
+        question = questions[qid]
+
+        yield {
+            "submission_id": submission['id'],
+            "question_id": qid,
+            "subject": question.get('subject', ''),
+            "topic": question.get('topic', ''),
+            "student_name": submission['student_name'],
+            "submitted_at": submission.get('submitted_at', ''),
+            "status": submission.get('status', "graded" if 'score' in submission else "ungraded"),
+            "score": submission.get('score'),
+            "max_score": max_score_for(question),
+            "criteria_scores": submission.get('criteria_scores')
+        }
+
+
+class ScoreAggregate:
+    """Running score statistics computed in a single pass.
+
+    Scores are integers or percentages rounded to 2 places, so an exact count
+    per distinct score is enough to get the median and any percentile without
+    keeping individual scores around.
+    """
+
+    def __init__(self, bins=10):
+        self.bins = bins
+        self.count = 0
+        self.total = 0
+        self.total_percent = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.score_counts = Counter()
+        self.histogram = [0] * bins
+
+    def add(self, score, max_score):
+        self.count += 1
+        self.total += score
+        self.minimum = score if self.minimum is None else min(self.minimum, score)
+        self.maximum = score if self.maximum is None else max(self.maximum, score)
+        self.score_counts[score] += 1
+
+        # Histogram of percentage of max score, so questions with different scales can be combined
+        percent = min(1.0, score / max_score) if max_score else 0.0
+        self.total_percent += percent * 100
+        self.histogram[min(self.bins - 1, int(percent * self.bins))] += 1
+
+    def percentile(self, p):
+        """Return the score at percentile p (0-100) using the nearest-rank method."""
+        if not self.count:
+            return None
+        rank = max(1, -(-self.count * p // 100))
+        seen = 0
+        for score in sorted(self.score_counts):
+            seen += self.score_counts[score]
+            if seen >= rank:
+                return score
+
+    def summary(self):
+        if not self.count:
+            return {"count": 0}
+        width = 100 // self.bins
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2),
+            "mean_percent": round(self.total_percent / self.count, 2),
+            "min": self.minimum,
+            "max": self.maximum,
+            "median": self.percentile(50),
+            "p25": self.percentile(25),
+            "p75": self.percentile(75),
+            "p90": self.percentile(90),
+            "histogram": {f"{i * width}-{(i + 1) * width}%": n for i, n in enumerate(self.histogram)}
+        }
+
+
+class Gradebook:
+    """Aggregate statistics per question, subject, topic and, for structured
+    grades, per question criterion.
+
+    Questions can be marked out of different maximums, so the overall, subject
+    and topic statistics are computed on each score's percentage of its
+    maximum. Per-question and per-criterion statistics share one maximum and
+    use raw scores.
+    """
+
+    def __init__(self):
+        self.overall = ScoreAggregate()
+        self.groups = {"question": {}, "subject": {}, "topic": {}, "criterion": {}}
+        self.ungraded = 0
+
+    def add(self, row):
+        if row['score'] is None:
+            self.ungraded += 1
+            return
+
+        percent = percent_of(row['score'], row['max_score'])
+        self.overall.add(percent, 100)
+        for group, key, score, max_score in (
+                ("question", row['question_id'], row['score'], row['max_score']),
+                ("subject", row['subject'], percent, 100),
+                ("topic", f"{row['subject']} / {row['topic']}", percent, 100)):
+            aggregate = self.groups[group].get(key)
+            if aggregate is None:
+                aggregate = self.groups[group][key] = ScoreAggregate()
+            aggregate.add(score, max_score)
+
+        for item in row.get('criteria_scores') or []:
+            key = f"{row['question_id']} / {item['name']}"
+            aggregate = self.groups["criterion"].get(key)
+            if aggregate is None:
+                aggregate = self.groups["criterion"][key] = ScoreAggregate()
+            aggregate.add(item['score'], item['max_score'])
+
+    def summary(self):
+        return {
+            "overall": self.overall.summary(),
+            "ungraded": self.ungraded,
+            "by_question": {k: v.summary() for k, v in self.groups["question"].items()},
+            "by_subject": {k: v.summary() for k, v in self.groups["subject"].items()},
+            "by_topic": {k: v.summary() for k, v in self.groups["topic"].items()},
+            "by_criterion": {k: v.summary() for k, v in self.groups["criterion"].items()}
+        }
+
+
+def export_gradebook(rows, output, fmt="csv", gradebook=None):
+    """Stream rows to output as CSV or JSONL, feeding each row to the gradebook.
+
+    Returns:
+        int: Number of rows written
+    """
+    written = 0
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(output, fieldnames=GRADEBOOK_FIELDS)
+        writer.writeheader()
+
+    for row in rows:
+        if writer:
+            # CSV cells are flat, so per-criterion scores go in as JSON
+            criteria_scores = row.get('criteria_scores')
+            writer.writerow(dict(row, criteria_scores=json.dumps(criteria_scores) if criteria_scores else ""))
+        else:
+            output.write(json.dumps(row) + "\n")
+        if gradebook:
+            gradebook.add(row)
+        written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a gradebook and score statistics.")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv", help="Gradebook format")
+    parser.add_argument("--output", help="Gradebook file (default: stdout)")
+    parser.add_argument("--stats", help="Write aggregate statistics as JSON to this file")
+    parser.add_argument("--question", help="Only export submissions for this question ID")
+    args = parser.parse_args()
+
+    gradebook = Gradebook()
+    rows = iter_gradebook_rows(get_repository(), args.question)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            written = export_gradebook(rows, f, args.format, gradebook)
+    else:
+        written = export_gradebook(rows, sys.stdout, args.format, gradebook)
+
+    summary = gradebook.summary()
+    if args.stats:
+        with open(args.stats, 'w') as f:
+            json.dump(summary, f, indent=4)
+
+    overall = summary['overall']
+    print(f"Exported {written} submissions ({summary['ungraded']} ungraded).", file=sys.stderr)
+    if overall['count']:
+        print(f"Mean: {overall['mean']}%  Median: {overall['median']}%  P90: {overall['p90']}%", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
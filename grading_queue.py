@@ -0,0 +1,412 @@
+import os
+import time
+import random
+import sqlite3
+import threading
+from dotenv import load_dotenv
+from resilience import CircuitOpenError
+from token_budget import BudgetExceededError, estimate_tokens
+from metrics import metrics
+from similarity import get_duplicate_detector
+from search_index import get_search_index
+
+class GradingQueue:
+    """Durable SQLite-backed queue of submission IDs waiting to be graded.
+
+    Jobs move from 'queued' to 'in_progress' when a worker claims them, then to
+    'done', back to 'queued' with a backoff delay after a failure, or to 'dead'
+    once max_attempts is reached. Claims expire after lease_seconds so a crashed
+    worker's jobs are picked up again.
+    """
+
+    def __init__(self, path="data/grading_queue.db", max_attempts=5, base_delay=2.0, lease_seconds=300):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.lease_seconds = lease_seconds
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.local = threading.local()
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                submission_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._connection().execute("CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, next_attempt_at)")
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.local.conn = conn
+        return conn
+
+    def enqueue(self, submission_id):
+        """Queue a submission for grading (re-queues it if it was already known)."""
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO jobs (submission_id, status, attempts, next_attempt_at, created_at, updated_at) "
+            "VALUES (?, 'queued', 0, ?, ?, ?)",
+            (submission_id, now, now, now)
+        )
+        metrics.inc("grader_queue_enqueued_total")
+
+    def claim(self):
+        """Claim the next ready job.
+
+        Returns:
+            str: The submission ID to grade, or None if nothing is ready
+        """
+        claimed = self.claim_many(1)
+        return claimed[0] if claimed else None
+
+    def claim_many(self, limit):
+        """Claim up to limit ready jobs, oldest first.
+
+        Returns:
+            list: The submission IDs to grade, empty if nothing is ready
+        """
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT submission_id FROM jobs WHERE status IN ('queued', 'in_progress') AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            # next_attempt_at doubles as the lease expiry while a job is in progress
+            conn.executemany(
+                "UPDATE jobs SET status = 'in_progress', next_attempt_at = ?, updated_at = ? WHERE submission_id = ?",
+                [(now + self.lease_seconds, now, row[0]) for row in rows]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [row[0] for row in rows]
+
+    def complete(self, submission_id):
+        self._connection().execute(
+            "UPDATE jobs SET status = 'done', last_error = NULL, updated_at = ? WHERE submission_id = ?",
+            (time.time(), submission_id)
+        )
+
+    def fail(self, submission_id, error):
+        """Record a failed attempt and schedule a retry with exponential backoff.
+
+        Returns:
+            bool: True if the job was dead-lettered instead of retried
+        """
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute("SELECT attempts FROM jobs WHERE submission_id = ?", (submission_id,)).fetchone()
+        attempts = (row[0] if row else 0) + 1
+
+        if attempts >= self.max_attempts:
+            conn.execute(
+                "UPDATE jobs SET status = 'dead', attempts = ?, last_error = ?, updated_at = ? WHERE submission_id = ?",
+                (attempts, str(error), now, submission_id)
+            )
+            return True
+
+        delay = self.base_delay * (2 ** (attempts - 1)) * random.uniform(0.5, 1.5)
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', attempts = ?, last_error = ?, next_attempt_at = ?, updated_at = ? "
+            "WHERE submission_id = ?",
+            (attempts, str(error), now + delay, now, submission_id)
+        )
+        return False
+
+    def release(self, submission_id, delay):
+        """Put a claimed job back without counting an attempt, e.g. while grading is paused."""
+        now = time.time()
+        self._connection().execute(
+            "UPDATE jobs SET status = 'queued', next_attempt_at = ?, updated_at = ? WHERE submission_id = ?",
+            (now + delay, now, submission_id)
+        )
+
+    def dead_letters(self):
+        """Return (submission_id, attempts, last_error) for every dead job."""
+        return self._connection().execute(
+            "SELECT submission_id, attempts, last_error FROM jobs WHERE status = 'dead' ORDER BY updated_at"
+        ).fetchall()
+
+    def requeue_dead(self, repository=None):
+        """Give every dead job a fresh set of attempts.
+
+        With a repository, the submissions marked 'failed' when their jobs died
+        are set back to 'pending' before the requeue is committed, so a
+        requeued job never belongs to a submission still shown as failed.
+
+        Returns:
+            int: The number of jobs requeued
+        """
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            submission_ids = [row[0] for row in conn.execute("SELECT submission_id FROM jobs WHERE status = 'dead'")]
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, next_attempt_at = ?, updated_at = ? WHERE status = 'dead'",
+                (now, now)
+            )
+            if repository:
+                submissions = []
+                for submission_id in submission_ids:
+                    submission = repository.get_submission(submission_id)
+                    if submission and submission.get('status') == 'failed':
+                        submission['status'] = 'pending'
+                        submissions.append(submission)
+                if submissions:
+                    repository.save_submissions(submissions)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(submission_ids)
+
+    def outstanding(self):
+        """Return the number of jobs queued or in progress."""
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'in_progress')"
+        ).fetchone()[0]
+
+    def counts(self):
+        """Return the number of jobs in each status."""
+        return dict(self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+class GradingWorkers:
+    """Background threads that drain the grading queue.
+
+    With a batch_size above 1, each worker claims up to that many ready jobs
+    at once. Answers to the same question are graded together in packed
+    requests (see LLMEvaluator.evaluate_packed), and questions whose answers
+    cost the fewest tokens each go first, so the most students are graded
+    within the token budget.
+    """
+
+    def __init__(self, queue, repository, evaluator, workers=2, poll_interval=1.0, batch_size=1):
+        self.queue = queue
+        self.repository = repository
+        self.evaluator = evaluator
+        self.duplicates = get_duplicate_detector(repository)
+        self.search = get_search_index()
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.stop_event = threading.Event()
+        self.threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"grading-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            if not (self.process_batch() if self.batch_size > 1 else self.process_one()):
+                self.stop_event.wait(self.poll_interval)
+
+    def process_one(self):
+        """Grade the next ready submission.
+
+        Returns:
+            bool: True if a job was claimed, False if the queue had nothing ready
+        """
+        submission_id = self.queue.claim()
+        if submission_id is None:
+            return False
+
+        try:
+            with metrics.span("grader_queue_job_seconds"):
+                self.grade(submission_id)
+            self.queue.complete(submission_id)
+            metrics.inc("grader_queue_jobs_total", result="graded")
+        except (CircuitOpenError, BudgetExceededError) as e:
+            self._pause([submission_id], e)
+        except Exception as e:
+            self._fail(submission_id, e)
+        return True
+
+    def process_batch(self):
+        """Grade up to batch_size ready submissions, packing answers to the same question.
+
+        Returns:
+            bool: True if any job was claimed, False if the queue had nothing ready
+        """
+        submission_ids = self.queue.claim_many(self.batch_size)
+        if not submission_ids:
+            return False
+
+        groups = self.schedule(submission_ids)
+        for i, (question, submissions) in enumerate(groups):
+            try:
+                with metrics.span("grader_queue_job_seconds"):
+                    self.grade_group(question, submissions)
+            except (CircuitOpenError, BudgetExceededError) as e:
+                self._pause([submission['id'] for _, group in groups[i:] for submission in group], e)
+                break
+            except Exception as e:
+                for submission in submissions:
+                    self._fail(submission['id'], e)
+                continue
+            for submission in submissions:
+                self.queue.complete(submission['id'])
+                metrics.inc("grader_queue_jobs_total", result="graded")
+        return True
+
+    def schedule(self, submission_ids):
+        """Group claimed submissions by question, cheapest answers first.
+
+        A job whose submission or question no longer exists is failed here.
+
+        Returns:
+            list: (question, submissions) pairs in the order to grade them
+        """
+        groups = {}
+        questions = {}
+        for submission_id in submission_ids:
+            submission = self.repository.get_submission(submission_id)
+            if submission is None:
+                self._fail(submission_id, ValueError(f"Submission {submission_id} not found"))
+                continue
+            question_id = submission['question_id']
+            if question_id not in questions:
+                questions[question_id] = self.repository.get_question(question_id)
+            if questions[question_id] is None:
+                self._fail(submission_id, ValueError(f"Question {question_id} not found"))
+                continue
+            groups.setdefault(question_id, []).append(submission)
+
+        def tokens_per_answer(question_id):
+            # The question is sent once per pack; each answer adds its own length
+            question = questions[question_id]
+            submissions = groups[question_id]
+            fixed = estimate_tokens(question['question'] + question.get('expected_answer', '') +
+                                    question.get('grading_criteria', ''))
+            return fixed / len(submissions) + sum(estimate_tokens(s['answer']) for s in submissions) / len(submissions)
+
+        return [(questions[question_id], groups[question_id]) for question_id in sorted(groups, key=tokens_per_answer)]
+
+    def grade_group(self, question, submissions):
+        """Grade several submissions to one question, reusing near-duplicate grades."""
+        to_grade = []
+        for submission in submissions:
+            if self.duplicates.reuse_grade(submission):
+                self._save(submission)
+            else:
+                to_grade.append(submission)
+        if not to_grade:
+            return
+
+        results = self.evaluator.evaluate_packed(
+            question['question'],
+            [submission['answer'] for submission in to_grade],
+            question.get('expected_answer', ''),
+            question.get('grading_criteria', ''),
+            details=True,
+            usage=(question['id'], question.get('teacher', ''))
+        )
+        for submission, (evaluation, score, criteria_scores, graded_by) in zip(to_grade, results):
+            self.evaluator.record_grade(submission, question, evaluation, score, criteria_scores, graded_by)
+            self._save(submission)
+
+    def _pause(self, submission_ids, error):
+        # The API is down or the daily budget is spent: hold the jobs and pause
+        # this worker until grading may resume
+        for submission_id in submission_ids:
+            self.queue.release(submission_id, error.retry_after)
+            metrics.inc("grader_queue_jobs_total", result="paused")
+        self.stop_event.wait(error.retry_after)
+
+    def _fail(self, submission_id, error):
+        print(f"Error grading submission {submission_id}: {error}")
+        dead = self.queue.fail(submission_id, error)
+        metrics.inc("grader_queue_jobs_total", result="dead" if dead else "retry")
+        if dead:
+            submission = self.repository.get_submission(submission_id)
+            if submission:
+                submission['status'] = 'failed'
+                self.repository.save_submission(submission)
+
+    def grade(self, submission_id):
+        submission = self.repository.get_submission(submission_id)
+        if submission is None:
+            raise ValueError(f"Submission {submission_id} not found")
+        question = self.repository.get_question(submission['question_id'])
+        if question is None:
+            raise ValueError(f"Question {submission['question_id']} not found")
+
+        if self.duplicates.reuse_grade(submission):
+            self._save(submission)
+            return
+
+        evaluation, score, criteria_scores, graded_by = self.evaluator.evaluate_answer(
+            question['question'],
+            submission['answer'],
+            question.get('expected_answer', ''),
+            question.get('grading_criteria', ''),
+            details=True,
+            usage=(question['id'], question.get('teacher', ''))
+        )
+        self.evaluator.record_grade(submission, question, evaluation, score, criteria_scores, graded_by)
+        self._save(submission)
+
+    def _save(self, submission):
+        self.repository.save_submission(submission)
+        self.duplicates.record(submission)
+        self.search.add_submission(submission)
+
+
+def async_grading_enabled():
+    """Whether submissions are graded in the background (GRADER_ASYNC_GRADING, on by default)."""
+    return os.getenv("GRADER_ASYNC_GRADING", "1").lower() not in ("0", "false", "no")
+
+
+_queue = None
+_workers = None
+_lock = threading.Lock()
+
+def get_grading_queue():
+    """Return the shared grading queue configured by GRADER_QUEUE_PATH."""
+    global _queue
+    with _lock:
+        if _queue is None:
+            load_dotenv()
+            _queue = GradingQueue(os.getenv("GRADER_QUEUE_PATH", "data/grading_queue.db"))
+        return _queue
+
+
+def queue_batch_size():
+    """How many queued submissions a worker grades at once (GRADER_QUEUE_BATCH, default 1)."""
+    batch_size = os.getenv("GRADER_QUEUE_BATCH", "")
+    return int(batch_size) if batch_size.isdigit() and int(batch_size) > 0 else 1
+
+
+def start_background_workers(repository, evaluator, workers=2):
+    """Start the in-process grading workers once; later calls return the running pool."""
+    global _workers
+    queue = get_grading_queue()
+    with _lock:
+        if _workers is None:
+            _workers = GradingWorkers(queue, repository, evaluator, workers, batch_size=queue_batch_size())
+            _workers.start()
+        return _workers
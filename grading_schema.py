@@ -0,0 +1,135 @@
+import re
+import json
+from local_scorer import RUBRIC_SPLIT_PATTERN
+
+# Shown to the model in structured grading prompts
+GRADING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "criteria": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "score": {"type": "integer"},
+                    "max_score": {"type": "integer"},
+                    "feedback": {"type": "string"}
+                },
+                "required": ["name", "score", "max_score", "feedback"]
+            }
+        },
+        "total": {"type": "integer"},
+        "max_score": {"type": "integer"},
+        "feedback": {"type": "string"}
+    },
+    "required": ["criteria", "total", "max_score", "feedback"]
+}
+
+TRAILING_COMMA_PATTERN = re.compile(r',\s*([}\]])')
+INTEGER_PATTERN = re.compile(r'\s*-?\d+(?:\.\d+)?\s*')
+ITEM_MARKER_PATTERN = re.compile(r'^\s*(?:\d+[.)]|[-*•])\s+')
+
+class InvalidGradingError(ValueError):
+    """A structured grading response that cannot be used, even after repair."""
+
+
+def rubric_criteria(grading_criteria, max_score):
+    """Split a grading criteria into named criteria with their share of max_score.
+
+    A numeric or empty grading criteria is a single 'Overall' criterion.
+
+    Returns:
+        list: (name, max_score) pairs whose maximums add up to max_score
+    """
+    names = []
+    if grading_criteria and not grading_criteria.isdigit():
+        parts = (ITEM_MARKER_PATTERN.sub("", part).strip(" .") for part in RUBRIC_SPLIT_PATTERN.split(grading_criteria) if part)
+        names = [part for part in parts if part]
+    if not names or len(names) > max_score:
+        names = ["Overall"]
+
+    share, remainder = divmod(max_score, len(names))
+    return [(name, share + (1 if i < remainder else 0)) for i, name in enumerate(names)]
+
+
+def parse_grading(response, criteria, max_score):
+    """Parse and validate a structured grading response.
+
+    Harmless deviations are repaired: text or code fences around the JSON
+    object, trailing commas, numbers written as strings or decimals, and a
+    total that does not match the criteria (the criteria scores win). A
+    response with missing criteria, scores out of range or the wrong
+    max_score is rejected, since guessing would give a wrong grade.
+
+    Args:
+        response (str): The model's response
+        criteria (list): The (name, max_score) pairs the prompt asked for
+        max_score (int): The highest possible total
+
+    Returns:
+        tuple: (feedback, total, criteria_scores, repaired) where criteria_scores
+            is a list of dicts with 'name', 'score', 'max_score' and 'feedback'
+
+    Raises:
+        InvalidGradingError: Describing the first problem found
+    """
+    repaired = False
+    try:
+        data = json.loads(response)
+    except ValueError:
+        start, end = response.find("{"), response.rfind("}")
+        if start < 0 or end < start:
+            raise InvalidGradingError("the response does not contain a JSON object")
+        try:
+            data = json.loads(TRAILING_COMMA_PATTERN.sub(r'\1', response[start:end + 1]))
+        except ValueError as e:
+            raise InvalidGradingError(f"the response is not valid JSON ({e})")
+        repaired = True
+
+    if not isinstance(data, dict):
+        raise InvalidGradingError("the response is not a JSON object")
+
+    reported_max, fixed = _integer(data.get("max_score"), "max_score")
+    repaired |= fixed
+    if reported_max != max_score:
+        raise InvalidGradingError(f"max_score is {reported_max}, expected {max_score}")
+
+    items = data.get("criteria")
+    if not isinstance(items, list) or len(items) != len(criteria):
+        raise InvalidGradingError(f"'criteria' must be a list of {len(criteria)} entries")
+
+    criteria_scores = []
+    for (name, criterion_max), item in zip(criteria, items):
+        if not isinstance(item, dict):
+            raise InvalidGradingError(f"the entry for '{name}' is not an object")
+        score, fixed = _integer(item.get("score"), f"score of '{name}'")
+        repaired |= fixed
+        if not 0 <= score <= criterion_max:
+            raise InvalidGradingError(f"score of '{name}' is {score}, expected 0-{criterion_max}")
+        criteria_scores.append({
+            "name": name,
+            "score": score,
+            "max_score": criterion_max,
+            "feedback": str(item.get("feedback") or "").strip()
+        })
+
+    total = sum(item["score"] for item in criteria_scores)
+    if data.get("total") != total:
+        repaired = True
+
+    feedback = data.get("feedback")
+    if not isinstance(feedback, str) or not feedback.strip():
+        raise InvalidGradingError("'feedback' must be a non-empty string")
+    return feedback.strip(), total, criteria_scores, repaired
+
+
+def _integer(value, field):
+    """Return (int, repaired) for an integer, or a number written as a float or string."""
+    if isinstance(value, bool):
+        raise InvalidGradingError(f"{field} must be an integer")
+    if isinstance(value, int):
+        return value, False
+    if isinstance(value, float) or (isinstance(value, str) and INTEGER_PATTERN.fullmatch(value)):
+        return round(float(value)), True
+    raise InvalidGradingError(f"{field} must be an integer")
@@ -0,0 +1,45 @@
+import time
+import argparse
+from llm_evaluator import get_evaluator
+from repository import get_repository
+from grading_queue import GradingWorkers, get_grading_queue, queue_batch_size
+from metrics import metrics
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade queued submissions in the background.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of grading threads")
+    parser.add_argument("--batch", type=int, help="Submissions each thread grades at once, packing answers to the "
+                                                  "same question (overrides GRADER_QUEUE_BATCH)")
+    parser.add_argument("--dead", action="store_true", help="List dead-lettered submissions and exit")
+    parser.add_argument("--requeue-dead", action="store_true", help="Retry dead-lettered submissions and exit")
+    args = parser.parse_args()
+
+    queue = get_grading_queue()
+
+    if args.dead:
+        for submission_id, attempts, last_error in queue.dead_letters():
+            print(f"{submission_id}: {attempts} attempts, last error: {last_error}")
+        return
+
+    if args.requeue_dead:
+        print(f"Requeued {queue.requeue_dead(get_repository())} submissions.")
+        return
+
+    batch_size = args.batch if args.batch else queue_batch_size()
+    workers = GradingWorkers(queue, get_repository(), get_evaluator(), args.workers, batch_size=batch_size)
+    workers.start()
+    print(f"Grading worker started with {args.workers} threads. Press Ctrl+C to stop.")
+
+    try:
+        while True:
+            time.sleep(10)
+            counts = queue.counts()
+            print(f"Queued: {counts.get('queued', 0)}  In progress: {counts.get('in_progress', 0)}  "
+                  f"Done: {counts.get('done', 0)}  Dead: {counts.get('dead', 0)}")
+            metrics.write_file()
+    except KeyboardInterrupt:
+        print("\nStopping workers...")
+        workers.stop()
+
+if __name__ == "__main__":
+    main()
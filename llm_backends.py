@@ -0,0 +1,254 @@
+import os
+import json
+import threading
+
+# The SDK keeps one client (and its open connections) per process, and every
+# genai.configure call throws it away, so only configure when the key changes
+_genai = None
+_configured_key = None
+_configure_lock = threading.Lock()
+
+def _configure_gemini(api_key, transport=None):
+    """Import and configure the Gemini SDK, returning the genai module.
+
+    Importing the SDK takes about half a second, more than the rest of the
+    app together, so it waits for the first real API call. Demo mode, Teacher
+    Mode and runs answered from the cache or local triage never pay for it.
+    """
+    global _genai, _configured_key
+    with _configure_lock:
+        if _genai is None:
+            import google.generativeai as genai
+            _genai = genai
+        if _configured_key != api_key:
+            _genai.configure(api_key=api_key, transport=transport)
+            _configured_key = api_key
+        return _genai
+
+
+class HTTPStatusError(Exception):
+    """An error response from an HTTP backend; code is the status, so 429 and 5xx are retried."""
+
+    def __init__(self, code, message):
+        super().__init__(f"HTTP {code}: {message}")
+        self.code = code
+
+
+class LLMBackend:
+    """Sends prompts to a language model.
+
+    Subclasses implement generate, and stream when the API can send a
+    response as it is written.
+    """
+
+    name = None
+
+    def generate(self, prompt):
+        """Return the model's complete response to a prompt."""
+        raise NotImplementedError
+
+    def stream(self, prompt, max_output_tokens=None):
+        """Yield the response in pieces as the model writes it.
+
+        Closing the generator early (by breaking out of the loop over it)
+        should stop the generation. By default the complete response is
+        yielded in one piece.
+        """
+        yield self.generate(prompt)
+
+    def warm_up(self):
+        """Open the connection to the API ahead of the first request.
+
+        Returns:
+            bool: True if the API answered
+        """
+        return False
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini through the google-generativeai SDK, imported on first use."""
+
+    name = "gemini"
+
+    def __init__(self, api_key, model, transport=None):
+        self.api_key = api_key
+        self.model = model
+        # 'grpc' or 'rest'
+        self.transport = transport
+        # GenerativeModel objects are reused across calls, one per model name
+        self._models = {}
+        self._models_lock = threading.Lock()
+
+    def _get_model(self, model_name=None):
+        """Return the cached GenerativeModel for a model name, creating it once."""
+        model_name = model_name or self.model
+        with self._models_lock:
+            model = self._models.get(model_name)
+            if model is None:
+                genai = _configure_gemini(self.api_key, self.transport)
+                model = genai.GenerativeModel(model_name)
+                self._models[model_name] = model
+            return model
+
+    def generate(self, prompt):
+        try:
+            # Reuse the generative model (and its client connection) across calls
+            return self._get_model().generate_content(prompt).text
+        except Exception as e:
+            # Chain the original error so retryable status codes can still be recognised
+            raise Exception(f"Gemini API call failed: {str(e)}") from e
+
+    def stream(self, prompt, max_output_tokens=None):
+        try:
+            response = self._get_model().generate_content(
+                prompt,
+                stream=True,
+                generation_config={"max_output_tokens": max_output_tokens} if max_output_tokens else None
+            )
+            for chunk in response:
+                yield chunk.text
+        except Exception as e:
+            raise Exception(f"Gemini API call failed: {str(e)}") from e
+
+    def warm_up(self):
+        # Counting tokens is the cheapest request that establishes the connection
+        self._get_model().count_tokens("warm up")
+        return True
+
+
+class HTTPBackend(LLMBackend):
+    """Any server speaking the Gemini REST API or the OpenAI chat completions API.
+
+    With wire_format 'gemini', prompts are posted to
+    {base_url}/v1beta/models/{model}:generateContent (streamGenerateContent
+    when streaming), as Google's own endpoint and llm_server.py accept. With
+    'openai', they are posted to {base_url}/chat/completions, so base_url
+    usually ends in /v1. Responses are streamed as server-sent events.
+    """
+
+    name = "http"
+
+    def __init__(self, base_url, model, api_key=None, wire_format="gemini", timeout=60.0):
+        if wire_format not in ("gemini", "openai"):
+            raise ValueError(f"Unknown wire format '{wire_format}' (expected 'gemini' or 'openai')")
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.api_key = api_key
+        self.wire_format = wire_format
+        self.timeout = timeout
+        # One keep-alive session per thread
+        self.local = threading.local()
+
+    def _session(self):
+        session = getattr(self.local, "session", None)
+        if session is None:
+            import requests
+            session = requests.Session()
+            if self.api_key and self.wire_format == "gemini":
+                session.headers["x-goog-api-key"] = self.api_key
+            elif self.api_key:
+                session.headers["Authorization"] = f"Bearer {self.api_key}"
+            self.local.session = session
+        return session
+
+    def _request(self, prompt, stream, max_output_tokens=None):
+        """Build the (url, payload) for a prompt in this backend's wire format."""
+        if self.wire_format == "gemini":
+            method = "streamGenerateContent?alt=sse" if stream else "generateContent"
+            payload = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+            if max_output_tokens:
+                payload["generationConfig"] = {"maxOutputTokens": max_output_tokens}
+            return f"{self.base_url}/v1beta/models/{self.model}:{method}", payload
+
+        payload = {"model": self.model, "messages": [{"role": "user", "content": prompt}]}
+        if stream:
+            payload["stream"] = True
+        if max_output_tokens:
+            payload["max_tokens"] = max_output_tokens
+        return f"{self.base_url}/chat/completions", payload
+
+    def _post(self, url, payload, stream=False):
+        import requests
+        try:
+            response = self._session().post(url, json=payload, timeout=self.timeout, stream=stream)
+        except requests.Timeout as e:
+            raise TimeoutError(f"LLM server did not answer within {self.timeout:g}s") from e
+        except requests.ConnectionError as e:
+            raise ConnectionError(f"Could not reach the LLM server at {self.base_url}: {e}") from e
+
+        if response.status_code >= 400:
+            try:
+                message = response.json()["error"]["message"]
+            except (ValueError, KeyError, TypeError):
+                message = response.text[:200]
+            response.close()
+            raise HTTPStatusError(response.status_code, message)
+        return response
+
+    def _text(self, data):
+        """Return the text in a complete response or a streamed chunk."""
+        if self.wire_format == "gemini":
+            candidates = data.get("candidates") or []
+            if not candidates:
+                raise ValueError(f"The response has no candidates: {json.dumps(data)[:200]}")
+            parts = candidates[0].get("content", {}).get("parts", [])
+            return "".join(part.get("text", "") for part in parts)
+
+        choice = data["choices"][0]
+        message = choice.get("delta") if "delta" in choice else choice.get("message")
+        return (message or {}).get("content") or ""
+
+    def generate(self, prompt):
+        url, payload = self._request(prompt, stream=False)
+        return self._text(self._post(url, payload).json())
+
+    def stream(self, prompt, max_output_tokens=None):
+        url, payload = self._request(prompt, stream=True, max_output_tokens=max_output_tokens)
+        # Closing the response drops the connection, which ends the generation
+        with self._post(url, payload, stream=True) as response:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                text = self._text(json.loads(data))
+                if text:
+                    yield text
+
+    def warm_up(self):
+        # Any answer means the connection is open; the status does not matter
+        self._session().get(self.base_url, timeout=self.timeout).close()
+        return True
+
+
+def backend_from_env(api_key, model, timeout=60.0):
+    """Build the backend selected by GRADER_LLM_BACKEND.
+
+    'gemini' (the default) uses the SDK, 'http' a server at GRADER_LLM_URL
+    speaking GRADER_LLM_FORMAT ('gemini' or 'openai'), and 'mock' answers
+    locally with FakeLLM (GRADER_MOCK_LATENCY, GRADER_MOCK_ERROR_RATE,
+    GRADER_MOCK_SEED).
+
+    Returns:
+        LLMBackend: The backend, or None for Gemini without an API key (demo mode)
+
+    Raises:
+        ValueError: If the backend is unknown or GRADER_LLM_URL is missing
+    """
+    name = os.getenv("GRADER_LLM_BACKEND", "gemini").lower()
+    if name == "gemini":
+        return GeminiBackend(api_key, model, os.getenv("GEMINI_TRANSPORT") or None) if api_key else None
+    if name == "http":
+        base_url = os.getenv("GRADER_LLM_URL")
+        if not base_url:
+            raise ValueError("GRADER_LLM_URL must be set to use the http LLM backend")
+        return HTTPBackend(base_url, model, api_key, os.getenv("GRADER_LLM_FORMAT", "gemini").lower(), timeout)
+    if name == "mock":
+        from fake_llm import FakeLLM
+        return FakeLLM(
+            latency=float(os.getenv("GRADER_MOCK_LATENCY", "0")),
+            error_rate=float(os.getenv("GRADER_MOCK_ERROR_RATE", "0")),
+            seed=int(os.getenv("GRADER_MOCK_SEED", "0"))
+        )
+    raise ValueError(f"Unknown LLM backend '{name}' (expected 'gemini', 'http' or 'mock')")
@@ -1,27 +1,142 @@
 import os
-import requests
+import re
 import json
-import google.generativeai as genai
+import time
+import hashlib
+import threading
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from rate_limiter import get_rate_limiter
+from evaluation_cache import cache_from_env
+from resilience import ResilientCaller, CircuitBreaker, GradingUnavailableError
+from metrics import metrics, SIZE_BUCKETS
+from local_scorer import LocalScorer
+from stream_parser import EvaluationStreamParser
+from grading_schema import GRADING_SCHEMA, InvalidGradingError, rubric_criteria, parse_grading
+from token_budget import estimate_tokens, truncate_to_tokens, get_token_budget
+from usage_ledger import get_usage_ledger
+from llm_backends import backend_from_env
 
 class LLMEvaluator:
+    # Recorded as the model of grades the local scorer gave (see _triage)
+    LOCAL_MODEL_ID = "local"
+    
+    # Rough allowance for the evaluation text the model writes for each packed answer
+    PACKED_OUTPUT_TOKENS_PER_ANSWER = 250
+
+    # Matches a packed section header such as "EVALUATION 3:" or "**Evaluation 3**:"
+    PACKED_SECTION_PATTERN = re.compile(r'[*#\s]*(EVALUATION|SCORE)\s*(\d+)\s*[*]*\s*:[*]*', re.IGNORECASE)
+    
     def __init__(self):
         # Load environment variables from .env file if it exists
         load_dotenv()
         
-        # Get API key from environment variable
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        self.model = os.getenv("GEMINI_MODEL", "gemini-1.5-pro")  # Updated to use the correct model name
+        # Get API key from environment variable; GRADER_LLM_API_KEY is for non-Gemini backends
+        self.api_key = os.getenv("GRADER_LLM_API_KEY") or os.getenv("GEMINI_API_KEY")
+        # GRADER_LLM_MODEL names the model of a non-Gemini backend, such as an OpenAI-compatible server
+        self.model = os.getenv("GRADER_LLM_MODEL") or os.getenv("GEMINI_MODEL", "gemini-1.5-pro")
+        
+        # Optional cap on API requests per minute, shared by all evaluators using the same key
+        requests_per_minute = os.getenv("GEMINI_REQUESTS_PER_MINUTE", "")
+        self.requests_per_minute = int(requests_per_minute) if requests_per_minute.isdigit() else 0
+        
+        # Limits for packing several answers into one request (see evaluate_packed)
+        pack_token_budget = os.getenv("GEMINI_PACK_TOKEN_BUDGET", "")
+        self.pack_token_budget = int(pack_token_budget) if pack_token_budget.isdigit() else 8000
+        max_pack_size = os.getenv("GEMINI_MAX_PACK_SIZE", "")
+        self.max_pack_size = int(max_pack_size) if max_pack_size.isdigit() else 20
+        self.cache = None
+        
+        # Token and request budgets (see token_budget); answers longer than
+        # GEMINI_MAX_ANSWER_TOKENS are shortened before they are sent
+        tokens_per_minute = os.getenv("GEMINI_TOKENS_PER_MINUTE", "")
+        self.tokens_per_minute = int(tokens_per_minute) if tokens_per_minute.isdigit() else 0
+        tokens_per_day = os.getenv("GEMINI_TOKENS_PER_DAY", "")
+        self.tokens_per_day = int(tokens_per_day) if tokens_per_day.isdigit() else 0
+        requests_per_day = os.getenv("GEMINI_REQUESTS_PER_DAY", "")
+        self.requests_per_day = int(requests_per_day) if requests_per_day.isdigit() else 0
+        max_answer_tokens = os.getenv("GEMINI_MAX_ANSWER_TOKENS", "")
+        self.max_answer_tokens = int(max_answer_tokens) if max_answer_tokens.isdigit() else 4000
+        self.usage_ledger = None
+        
+        # 'json' asks for a structured grade with a score per criterion (see grading_schema)
+        self.structured = os.getenv("GEMINI_RESPONSE_FORMAT", "text").lower() == "json"
+        
+        # Stream single evaluations when the caller can show text as it arrives,
+        # and stop generating once the response passes the output token cap
+        self.stream = os.getenv("GEMINI_STREAM", "1").lower() not in ("0", "false", "no")
+        max_output_tokens = os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "")
+        self.max_output_tokens = int(max_output_tokens) if max_output_tokens.isdigit() else 1024
+        
+        # Answers the local scorer is confident about skip the LLM (see _triage);
+        # off unless GRADER_LOCAL_TRIAGE is set
+        self.scorer = LocalScorer()
+        self.triage = os.getenv("GRADER_LOCAL_TRIAGE", "0").lower() not in ("0", "false", "no")
+        self.triage_confidence = float(os.getenv("GRADER_TRIAGE_CONFIDENCE", "0.9"))
+        
+        # Deadlines, retries, hedging and circuit breaking around every API call
+        hedge_after = os.getenv("GEMINI_HEDGE_AFTER", "")
+        self.caller = ResilientCaller(
+            self._metered_call,
+            acquire=self._acquire_budget,
+            timeout=float(os.getenv("GEMINI_TIMEOUT", "60")),
+            max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "3")),
+            hedge_after=float(hedge_after) if hedge_after else None,
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("GEMINI_BREAKER_THRESHOLD", "5")),
+                reset_timeout=float(os.getenv("GEMINI_BREAKER_RESET", "30"))
+            )
+        )
+        # Streamed calls share the circuit breaker but are never hedged, since
+        # two streams would both be shown
+        self.stream_caller = ResilientCaller(
+            self._metered_stream,
+            acquire=self._acquire_stream_budget,
+            timeout=self.caller.timeout,
+            max_retries=self.caller.max_retries,
+            breaker=self.caller.breaker
+        )
+        
+        # What answers the prompts: Gemini (the default), an HTTP server or
+        # FakeLLM, picked by GRADER_LLM_BACKEND. None means demo mode
+        self.backend = backend_from_env(self.api_key, self.model, self.caller.timeout)
         
         # Check if API key is available
-        if not self.api_key:
+        if not self.backend:
             print("Warning: Gemini API key not found. Please set GEMINI_API_KEY in environment variables or .env file.")
             print("Evaluation will be simulated in demo mode.")
         else:
-            # Configure the Gemini API
-            genai.configure(api_key=self.api_key)
+            # Reuse previous evaluations of identical prompts instead of calling the API again
+            self.cache = cache_from_env()
+            # Requests and tokens per question and teacher
+            self.usage_ledger = get_usage_ledger()
+    
+    @property
+    def token_budget(self):
+        """The budget shared by every evaluator using this API key, or None if no limit is set."""
+        ledger = self.usage_ledger
+        return get_token_budget(
+            self.api_key, self.tokens_per_minute, self.tokens_per_day, self.requests_per_day,
+            used_today=ledger.day_totals if ledger else None
+        )
     
-    def evaluate_answer(self, question, student_answer, expected_answer="", grading_criteria=""):
+    @property
+    def model_id(self):
+        """The model grades are attributed to in the cache, grading versions and submissions.
+        
+        'simulated' in demo mode and 'mock' for FakeLLM, so their grades are never
+        taken for a real model's.
+        """
+        if not self.backend:
+            return "simulated"
+        if self.backend.name == "mock":
+            return "mock"
+        return self.model
+    
+    def evaluate_answer(self, question, student_answer, expected_answer="", grading_criteria="", bypass_cache=False,
+                        on_text=None, details=False, usage=None):
         """Evaluate a student's answer using an LLM.
         
         Args:
@@ -29,41 +144,514 @@ class LLMEvaluator:
             student_answer (str): The student's answer
             expected_answer (str, optional): The expected answer if provided by teacher
             grading_criteria (str, optional): Specific grading criteria if provided by teacher
+            bypass_cache (bool, optional): Skip the cache lookup to force a fresh evaluation
+            on_text (callable, optional): Called with each piece of the evaluation text
+                as the model writes it (when GEMINI_STREAM is on), and with None if a
+                failed attempt is retried and the text shown so far should be discarded.
+                Local, cached and structured evaluations are returned without calling it.
+            details (bool, optional): Also return the per-criterion scores and what graded the answer
+            usage (tuple, optional): (question_id, teacher) to record the API usage
+                against in the usage ledger
             
         Returns:
-            tuple: (evaluation_text, score)
+            tuple: (evaluation_text, score), or (evaluation_text, score, criteria_scores, graded_by)
+                with details=True. criteria_scores is a list of dicts with 'name',
+                'score', 'max_score' and 'feedback' for structured grades, else None.
+                graded_by is model_id, or LOCAL_MODEL_ID if the local scorer graded it.
+            
+        Raises:
+            GradingUnavailableError: If the API could not grade the answer. Real grading
+                never silently falls back to a simulated score.
         """
-        if not self.api_key:
+        result = self._evaluate_answer(question, student_answer, expected_answer, grading_criteria, bypass_cache, on_text,
+                                       usage)
+        return result if details else result[:2]
+    
+    def _evaluate_answer(self, question, student_answer, expected_answer, grading_criteria, bypass_cache, on_text, usage):
+        if not self.backend:
             # Demo mode - simulate evaluation
-            return self._simulate_evaluation(student_answer, question, expected_answer, grading_criteria)
+            metrics.inc("grader_simulated_evaluations_total", reason="demo")
+            return (*self._simulate_evaluation(student_answer, question, expected_answer, grading_criteria), None,
+                    self.model_id)
+        
+        local = self._triage(question, student_answer, expected_answer, grading_criteria)
+        if local:
+            return (*local, None, self.LOCAL_MODEL_ID)
+        
+        student_answer, omitted = self._truncate_answer(student_answer)
         
         # Construct the prompt for the LLM
-        prompt = self._construct_evaluation_prompt(
-            question, student_answer, expected_answer, grading_criteria
+        if self.structured:
+            criteria = rubric_criteria(grading_criteria, self._max_score(grading_criteria))
+            prompt = self._construct_structured_prompt(question, student_answer, expected_answer, criteria)
+        else:
+            prompt = self._construct_evaluation_prompt(
+                question, student_answer, expected_answer, grading_criteria
+            )
+        stream = on_text and self.stream and not self.structured
+        
+        cache_key = None
+        if self.cache:
+            cache_key = self.cache.make_key(prompt, self.model_id)
+            if not bypass_cache:
+                cached = self.cache.get(cache_key)
+                if cached:
+                    return (*cached, self.model_id)
+        
+        criteria_scores = None
+        try:
+            if self.structured:
+                # Parsed as part of the call, since unusable responses are re-requested
+                evaluation, score, criteria_scores = self._call_structured(prompt, criteria, usage)
+            elif stream:
+                parser = self._stream_llm(prompt, on_text, usage)
+                if parser.score is None:
+                    # Cut off at the output token cap, or not in the expected format.
+                    # Ask again for the complete response rather than record a 0
+                    metrics.inc("grader_stream_fallbacks_total")
+                    on_text(None)
+                    parser = EvaluationStreamParser()
+                    text = parser.feed(self._call_llm(prompt, usage)) + parser.close()
+                    if parser.score is None:
+                        raise GradingUnavailableError("The LLM response contained no score")
+                    if text:
+                        on_text(text)
+                evaluation, score = parser.evaluation, parser.score
+            else:
+                evaluation, score = self._parse_evaluation_response(self._call_llm(prompt, usage))
+        except GradingUnavailableError as e:
+            metrics.inc("grader_llm_failures_total", error=type(e).__name__)
+            raise
+        except Exception as e:
+            metrics.inc("grader_llm_failures_total", error=type(e).__name__)
+            raise GradingUnavailableError(f"LLM evaluation failed: {e}") from e
+        
+        if omitted:
+            note = self._truncation_note(omitted)
+            evaluation += note
+            if stream:
+                on_text(note)
+        if cache_key:
+            self.cache.put(cache_key, self.model_id, evaluation, score, criteria_scores)
+        return evaluation, score, criteria_scores, self.model_id
+    
+    def evaluate_many(self, submissions, max_workers=8, bypass_cache=False, pack=False, details=False):
+        """Evaluate many answers concurrently, yielding results in input order.
+        
+        Args:
+            submissions (iterable): Dicts with a 'question' and 'student_answer' key and
+                optional 'expected_answer', 'grading_criteria' and 'usage' (see evaluate_answer) keys
+            max_workers (int, optional): Number of evaluations running at the same time
+            bypass_cache (bool, optional): Skip cache lookups to force fresh evaluations
+            pack (bool, optional): Grade consecutive answers to the same question together
+                in packed requests (see evaluate_packed)
+            details (bool, optional): Also yield the per-criterion scores and what graded
+                each answer (see evaluate_answer)
+            
+        Yields:
+            tuple: (submission, evaluation_text, score) for each input, in order, or
+                (submission, evaluation_text, score, criteria_scores, graded_by) with details=True
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Keep a bounded window of in-flight work so huge inputs are never fully queued
+            pending = deque()
+            for group in self._group_submissions(submissions, self.max_pack_size if pack else 1):
+                first = group[0]
+                future = executor.submit(
+                    self.evaluate_packed,
+                    first['question'],
+                    [submission['student_answer'] for submission in group],
+                    first.get('expected_answer', ''),
+                    first.get('grading_criteria', ''),
+                    bypass_cache,
+                    details,
+                    first.get('usage')
+                )
+                pending.append((group, future))
+                
+                if len(pending) >= max_workers * 2:
+                    yield from self._collect_group(*pending.popleft())
+            
+            while pending:
+                yield from self._collect_group(*pending.popleft())
+    
+    def _group_submissions(self, submissions, max_group_size):
+        """Split submissions into runs of consecutive answers to the same question."""
+        group = []
+        for submission in submissions:
+            if group and (len(group) >= max_group_size or self._question_key(submission) != self._question_key(group[0])):
+                yield group
+                group = []
+            group.append(submission)
+        if group:
+            yield group
+    
+    def _question_key(self, submission):
+        return (submission['question'], submission.get('expected_answer', ''), submission.get('grading_criteria', ''))
+    
+    def _collect_group(self, group, future):
+        for submission, result in zip(group, future.result()):
+            yield (submission, *result)
+    
+    def evaluate_packed(self, question, student_answers, expected_answer="", grading_criteria="", bypass_cache=False,
+                        details=False, usage=None):
+        """Evaluate several answers to the same question in as few requests as possible.
+        
+        Answers are packed into numbered EVALUATION n:/SCORE n: requests sized to fit
+        the token budget. Any answer whose section cannot be parsed is re-evaluated
+        on its own with evaluate_answer.
+        
+        Args:
+            question (str): The question that was asked
+            student_answers (list): The students' answers
+            expected_answer (str, optional): The expected answer if provided by teacher
+            grading_criteria (str, optional): Specific grading criteria if provided by teacher
+            bypass_cache (bool, optional): Skip cache lookups to force fresh evaluations
+            details (bool, optional): Also return the per-criterion scores and what graded
+                each answer (see evaluate_answer)
+            usage (tuple, optional): (question_id, teacher) to record the API usage against
+            
+        Returns:
+            list: (evaluation_text, score) tuples in the same order as student_answers, or
+                (evaluation_text, score, criteria_scores, graded_by) tuples with details=True
+        """
+        # Structured grades are requested one answer at a time
+        if not self.backend or len(student_answers) == 1 or self.structured:
+            return [
+                self.evaluate_answer(question, answer, expected_answer, grading_criteria, bypass_cache, details=details,
+                                     usage=usage)
+                for answer in student_answers
+            ]
+        
+        results = [None] * len(student_answers)
+        cache_keys = [None] * len(student_answers)
+        answers = list(student_answers)
+        omitted = [0] * len(student_answers)
+        remaining = []
+        
+        # Answers graded before (alone or in a pack) are served from the cache
+        for i, answer in enumerate(student_answers):
+            local = self._triage(question, answer, expected_answer, grading_criteria)
+            if local is not None:
+                results[i] = (*local, None, self.LOCAL_MODEL_ID)
+                continue
+            answers[i], omitted[i] = self._truncate_answer(answer)
+            if self.cache:
+                prompt = self._construct_evaluation_prompt(question, answers[i], expected_answer, grading_criteria)
+                cache_keys[i] = self.cache.make_key(prompt, self.model_id)
+                cached = None if bypass_cache else self.cache.get(cache_keys[i])
+                if cached:
+                    results[i] = (*cached, self.model_id)
+            if results[i] is None:
+                remaining.append(i)
+        
+        for pack in self._plan_packs(question, answers, remaining, expected_answer, grading_criteria):
+            parsed = {}
+            if len(pack) > 1:
+                prompt = self._construct_packed_prompt(
+                    question, [answers[i] for i in pack], expected_answer, grading_criteria
+                )
+                try:
+                    response = self._call_llm(prompt, usage)
+                    parsed = self._parse_packed_response(response, len(pack))
+                except GradingUnavailableError:
+                    # The API is unhealthy; grading each answer alone would not help
+                    raise
+                except Exception as e:
+                    # Every answer in the pack is graded alone below, which
+                    # raises if the API cannot grade them either
+                    metrics.inc("grader_packed_failures_total", error=type(e).__name__)
+            
+            for number, i in enumerate(pack, 1):
+                if number in parsed:
+                    evaluation, score = parsed[number]
+                    if omitted[i]:
+                        evaluation += self._truncation_note(omitted[i])
+                    results[i] = (evaluation, score, None, self.model_id)
+                    if cache_keys[i]:
+                        self.cache.put(cache_keys[i], self.model_id, evaluation, score)
+                else:
+                    # Fall back to grading this answer on its own
+                    metrics.inc("grader_packed_fallbacks_total")
+                    results[i] = self.evaluate_answer(
+                        question, student_answers[i], expected_answer, grading_criteria, bypass_cache=True, details=True,
+                        usage=usage
+                    )
+        
+        return results if details else [result[:2] for result in results]
+    
+    def _plan_packs(self, question, student_answers, indices, expected_answer, grading_criteria):
+        """Split answer indices into packs that fit the prompt token budget.
+        
+        With a per-minute token limit, a pack never asks for more than a
+        minute's worth of tokens, which it would otherwise wait for in full.
+        """
+        fixed_tokens = self._estimate_tokens(self._construct_packed_prompt(question, [], expected_answer, grading_criteria))
+        pack_token_budget = self.pack_token_budget
+        if self.tokens_per_minute:
+            pack_token_budget = min(pack_token_budget, self.tokens_per_minute)
+        
+        packs = []
+        pack = []
+        pack_tokens = fixed_tokens
+        for i in indices:
+            # Budget room for the answer itself plus the evaluation written about it
+            answer_tokens = self._estimate_tokens(student_answers[i]) + self.PACKED_OUTPUT_TOKENS_PER_ANSWER
+            if pack and (len(pack) >= self.max_pack_size or pack_tokens + answer_tokens > pack_token_budget):
+                packs.append(pack)
+                pack = []
+                pack_tokens = fixed_tokens
+            pack.append(i)
+            pack_tokens += answer_tokens
+        if pack:
+            packs.append(pack)
+        return packs
+    
+    def _triage(self, question, student_answer, expected_answer, grading_criteria):
+        """Score an answer locally and return (evaluation_text, score) if the
+        local scorer is confident enough, or None to escalate it to the LLM."""
+        if not self.triage:
+            return None
+        
+        with metrics.span("grader_local_score_seconds"):
+            evaluation, score, confidence = self.scorer.evaluate(
+                question, student_answer, expected_answer, grading_criteria, self._max_score(grading_criteria)
+            )
+        if confidence < self.triage_confidence:
+            metrics.inc("grader_triage_total", result="escalated")
+            return None
+        
+        metrics.inc("grader_triage_total", result="local")
+        return evaluation + "\n\nNote: This answer was scored automatically against the expected answer.", score
+    
+    def grading_version(self, question, expected_answer="", grading_criteria=""):
+        """Identify how answers to a question are graded right now.
+        
+        A hash of the model, the response format and the evaluation prompt with
+        the answer left out, so it changes whenever the question, expected
+        answer, grading criteria, prompt wording or model change.
+        
+        Returns:
+            str: A 12 character version id
+        """
+        if self.structured:
+            criteria = rubric_criteria(grading_criteria, self._max_score(grading_criteria))
+            prompt = self._construct_structured_prompt(question, "", expected_answer, criteria)
+        else:
+            prompt = self._construct_evaluation_prompt(question, "", expected_answer, grading_criteria)
+        return hashlib.sha256(f"{self.model_id}\0{prompt}".encode("utf-8")).hexdigest()[:12]
+
+    def record_grade(self, submission, question, evaluation, score, criteria_scores=None, graded_by=None, version=None):
+        """Write a grade into a submission, stamped with how, by what and when it was graded.
+
+        Regrading skips submissions whose grading_version is current, so every
+        place that grades a submission records it.
+
+        Args:
+            submission (dict): The submission to update
+            question (dict): The question it answers
+            evaluation (str): The evaluation text
+            score (int): The score
+            criteria_scores (list, optional): Per-criterion scores of a structured grade
+            graded_by (str, optional): What graded it (see evaluate_answer); defaults to model_id
+            version (str, optional): The question's grading_version, if already known
+        """
+        for key in ('criteria_scores', 'duplicate_of', 'similarity'):
+            submission.pop(key, None)
+        submission['evaluation'] = evaluation
+        submission['score'] = score
+        if criteria_scores:
+            submission['criteria_scores'] = criteria_scores
+        submission['status'] = 'graded'
+        submission['grading_version'] = version or self.grading_version(
+            question['question'], question.get('expected_answer', ''), question.get('grading_criteria', '')
         )
+        submission['grading_model'] = graded_by or self.model_id
+        submission['graded_at'] = datetime.now().isoformat()
+
+    def _estimate_tokens(self, text):
+        return estimate_tokens(text)
+    
+    def _truncate_answer(self, student_answer):
+        """Shorten an answer longer than max_answer_tokens, keeping its start and end.
+        
+        Returns:
+            tuple: (answer, omitted) where omitted is the number of characters cut
+        """
+        student_answer, omitted = truncate_to_tokens(student_answer, self.max_answer_tokens)
+        if omitted:
+            metrics.inc("grader_truncated_answers_total")
+        return student_answer, omitted
+    
+    def _truncation_note(self, omitted):
+        return (f"\n\nNote: This answer was too long to grade in full. {omitted} characters "
+                f"from the middle of it were not evaluated.")
+    
+    def _record_usage(self, usage, prompt, response):
+        """Add a successful call to the usage ledger and the token metrics."""
+        prompt_tokens = self._estimate_tokens(prompt)
+        output_tokens = self._estimate_tokens(response)
+        metrics.inc("grader_tokens_total", value=prompt_tokens, kind="prompt")
+        metrics.inc("grader_tokens_total", value=output_tokens, kind="output")
+        if self.usage_ledger:
+            question_id, teacher = usage or ("", "")
+            self.usage_ledger.record(question_id, teacher, prompt_tokens, output_tokens)
+    
+    def _call_llm(self, prompt, usage=None):
+        """Call the API through the retry/hedging/circuit breaker layer."""
+        metrics.observe("grader_prompt_chars", len(prompt), buckets=SIZE_BUCKETS)
+        with metrics.span("grader_llm_call_seconds"):
+            response = self.caller.call(prompt)
+        metrics.observe("grader_response_chars", len(response), buckets=SIZE_BUCKETS)
+        self._record_usage(usage, prompt, response)
+        return response
+    
+    def _call_structured(self, prompt, criteria, usage=None):
+        """Call the LLM for a structured grade, asking once more if the response
+        cannot be used even after repair.
         
+        Returns:
+            tuple: (evaluation_text, score, criteria_scores)
+        """
+        max_score = sum(criterion_max for _, criterion_max in criteria)
+        response = self._call_llm(prompt, usage)
         try:
-            # Call Gemini API
-            response = self._call_gemini_api(prompt)
+            feedback, score, criteria_scores, repaired = parse_grading(response, criteria, max_score)
+        except InvalidGradingError as e:
+            metrics.inc("grader_parse_failures_total", format="json")
+            # Only this answer is re-requested, with the reason its response was rejected
+            response = self._call_llm(
+                f"{prompt}\n\nYour previous response could not be used because {e}. "
+                f"Respond again with only the JSON object.",
+                usage
+            )
+            try:
+                feedback, score, criteria_scores, repaired = parse_grading(response, criteria, max_score)
+            except InvalidGradingError as e:
+                metrics.inc("grader_parse_failures_total", format="json")
+                raise GradingUnavailableError(f"The LLM returned an invalid grade twice: {e}") from e
+        if repaired:
+            metrics.inc("grader_structured_repairs_total")
+        
+        evaluation = feedback
+        if len(criteria_scores) > 1:
+            evaluation += "\n\n" + "\n".join(
+                f"{item['name']}: {item['score']}/{item['max_score']}" + (f" - {item['feedback']}" if item['feedback'] else "")
+                for item in criteria_scores
+            )
+        return evaluation, score, criteria_scores
+    
+    def _stream_llm(self, prompt, on_text, usage=None):
+        """Stream a response through the retry/circuit breaker layer, passing
+        evaluation text to on_text as it arrives.
+        
+        Returns:
+            EvaluationStreamParser: The parser holding the finished response
+        """
+        state = {"attempt": 0, "shown": False}
+        lock = threading.Lock()
+        
+        def attempt():
+            with lock:
+                state["attempt"] += 1
+                number = state["attempt"]
+                if state["shown"]:
+                    # A previous attempt failed part way; the retry starts over
+                    on_text(None)
+                    state["shown"] = False
             
-            # Parse the response
-            evaluation, score = self._parse_evaluation_response(response)
-            return evaluation, score
+            def show(text):
+                # An attempt abandoned at its deadline may still be receiving chunks
+                with lock:
+                    if state["attempt"] != number:
+                        return False
+                    if text:
+                        on_text(text)
+                        state["shown"] = True
+                    return True
             
-        except Exception as e:
-            print(f"Error during LLM evaluation: {e}")
-            # Fallback to simulated evaluation
-            return self._simulate_evaluation(student_answer, question, expected_answer, grading_criteria)
+            return self._stream_gemini_response(prompt, show)
+        
+        metrics.observe("grader_prompt_chars", len(prompt), buckets=SIZE_BUCKETS)
+        with metrics.span("grader_llm_call_seconds"):
+            parser = self.stream_caller.call(attempt, prompt)
+        metrics.observe("grader_response_chars", parser.chars, buckets=SIZE_BUCKETS)
+        self._record_usage(usage, prompt, parser.text)
+        return parser
+    
+    def _stream_gemini_response(self, prompt, show):
+        """Feed streamed chunks to a parser until the score is known, the
+        output token cap is reached, or show() reports the attempt was abandoned."""
+        parser = EvaluationStreamParser()
+        started = time.monotonic()
+        for chunk in self._stream_api(prompt):
+            if started is not None:
+                metrics.observe("grader_llm_first_chunk_seconds", time.monotonic() - started)
+                started = None
+            if not show(parser.feed(chunk)):
+                break
+            if parser.score is not None:
+                # Anything after the score is not used, so stop paying for it
+                metrics.inc("grader_stream_stopped_total", reason="score")
+                break
+            if self._estimate_tokens(parser.text) > self.max_output_tokens:
+                metrics.inc("grader_stream_stopped_total", reason="token_cap")
+                break
+        show(parser.close())
+        return parser
+    
+    def _metered_call(self, prompt):
+        # The caller has already taken a rate limit slot and budget for this
+        # attempt (see _acquire_budget); the response is charged afterwards
+        with metrics.span("grader_llm_attempt_seconds"):
+            response = self._call_api(prompt)
+        budget = self.token_budget
+        if budget:
+            budget.charge(self._estimate_tokens(response))
+        return response
+    
+    def _metered_stream(self, attempt, prompt):
+        with metrics.span("grader_llm_attempt_seconds"):
+            parser = attempt()
+        budget = self.token_budget
+        if budget:
+            budget.charge(self._estimate_tokens(parser.text))
+        return parser
+    
+    def _acquire_budget(self, prompt, blocking=True):
+        """Take a rate limit slot and the prompt's tokens for one request.
+        
+        Called by the ResilientCaller before each attempt (and hedged duplicate),
+        outside its deadline, so waiting on our own limits is never a failure.
+        
+        Returns:
+            bool: False if blocking is False and the request would have to wait
+        
+        Raises:
+            BudgetExceededError: If a daily budget is used up
+        """
+        # Rate limit first: a request refused there has not taken any budget
+        limiter = get_rate_limiter(self.api_key, self.requests_per_minute)
+        if limiter and not limiter.acquire(blocking):
+            return False
+        budget = self.token_budget
+        if budget and not budget.acquire(self._estimate_tokens(prompt), blocking):
+            return False
+        return True
+    
+    def _acquire_stream_budget(self, attempt, prompt, blocking=True):
+        return self._acquire_budget(prompt, blocking)
+    
+    def _max_score(self, grading_criteria):
+        """A purely numeric grading criteria sets the max score, otherwise it is 100."""
+        if grading_criteria and grading_criteria.isdigit():
+            return int(grading_criteria)
+        return 100
     
     def _construct_evaluation_prompt(self, question, student_answer, expected_answer, grading_criteria):
         """Construct a prompt for the LLM to evaluate the answer."""
         # Determine max score based on grading criteria
-        max_score = 100
-        try:
-            if grading_criteria and grading_criteria.isdigit():
-                max_score = int(grading_criteria)
-        except:
-            pass
+        max_score = self._max_score(grading_criteria)
             
         system_prompt = f"""
         You are an expert educational evaluator. Your task is to evaluate a student's answer to a question.
@@ -88,25 +676,91 @@ class LLMEvaluator:
         
         return full_prompt
     
-    def _call_gemini_api(self, prompt):
-        """Call the Gemini API with the given prompt."""
+    def _construct_structured_prompt(self, question, student_answer, expected_answer, criteria):
+        """Construct a prompt asking for a JSON grade with a score per criterion."""
+        max_score = sum(criterion_max for _, criterion_max in criteria)
+        criteria_lines = "\n".join(f"        - {name} (0-{criterion_max})" for name, criterion_max in criteria)
+        
+        system_prompt = f"""
+        You are an expert educational evaluator. Your task is to evaluate a student's answer to a question.
+        Score the answer on each of these criteria, based on accuracy and completeness:
+{criteria_lines}
+        
+        Respond with only a JSON object matching this schema, with the criteria in the order listed above:
+        {json.dumps(GRADING_SCHEMA)}
+        "total" is the sum of the criteria scores and "max_score" is {max_score}.
+        "feedback" is constructive feedback on the whole answer, highlighting strengths and areas for improvement.
+        """
+        
+        content = f"Question: {question}\n\nStudent Answer: {student_answer}"
+        
+        if expected_answer:
+            content += f"\n\nExpected Answer: {expected_answer}"
+        
+        return f"{system_prompt}\n\n{content}"
+    
+    def _construct_packed_prompt(self, question, student_answers, expected_answer, grading_criteria):
+        """Construct a prompt asking the LLM to evaluate several numbered answers at once."""
+        max_score = self._max_score(grading_criteria)
+        
+        system_prompt = f"""
+        You are an expert educational evaluator. Your task is to evaluate {len(student_answers)} students' answers to the same question.
+        Evaluate each answer independently. Provide constructive feedback, highlighting strengths and areas for improvement.
+        After each evaluation, assign a score from 0-{max_score} based on the accuracy and completeness of that answer.
+        
+        Format your response as follows, with one section per answer, in order:
+        EVALUATION 1: [Your detailed evaluation of answer 1 here]
+        SCORE 1: [Numeric score between 0-{max_score}]
+        EVALUATION 2: [Your detailed evaluation of answer 2 here]
+        SCORE 2: [Numeric score between 0-{max_score}]
+        """
+        
+        content = f"Question: {question}"
+        
+        if expected_answer:
+            content += f"\n\nExpected Answer: {expected_answer}"
+        
+        if grading_criteria:
+            content += f"\n\nGrading Criteria: {grading_criteria}"
+        
+        for number, student_answer in enumerate(student_answers, 1):
+            content += f"\n\nStudent Answer {number}:\n{student_answer}"
+        
+        return f"{system_prompt}\n\n{content}"
+    
+    def warm_up(self):
+        """Open the connection to the API ahead of the first evaluation.
+        
+        Returns:
+            bool: True if the API answered, False in demo mode or on error
+        """
+        if not self.backend:
+            return False
+        
         try:
-            # Create a generative model
-            model = genai.GenerativeModel(self.model)
-            
-            # Generate content
-            response = model.generate_content(prompt)
-            
-            # Return the text response
-            return response.text
+            return self.backend.warm_up()
         except Exception as e:
-            raise Exception(f"Gemini API call failed: {str(e)}")
+            print(f"Warning: LLM warm-up failed ({self.backend.name} backend): {e}")
+            return False
+    
+    def _call_api(self, prompt):
+        """Send a prompt to the configured backend and return its response text."""
+        return self.backend.generate(prompt)
+    
+    def _stream_api(self, prompt):
+        """Send a prompt to the configured backend, yielding the text as it arrives.
+        
+        Closing the generator early (by breaking out of the loop over it)
+        drops the response, which cancels the rest of the generation.
+        """
+        return self.backend.stream(prompt, self.max_output_tokens)
     
     def _parse_evaluation_response(self, response):
         """Parse the LLM response to extract evaluation and score."""
         # Default values in case parsing fails
         evaluation = response
         score = 0
+        parsed = False
         
         try:
             # Try to extract EVALUATION and SCORE sections
@@ -115,13 +769,13 @@ class LLMEvaluator:
                 score_part = response.split("SCORE:")[1].strip()
                 
                 # Extract numeric score
-                import re
                 score_match = re.search(r'\d+', score_part)
                 if score_match:
                     score = int(score_match.group())
                     # No need to scale the score as we've already set the max score in the prompt
                     # Just ensure it's not negative
                     score = max(0, score)
+                    parsed = True
                 
                 evaluation = evaluation_part
         except Exception as e:
@@ -129,37 +783,64 @@ class LLMEvaluator:
             # Use the full response as evaluation if parsing fails
             evaluation = response
         
+        if not parsed:
+            metrics.inc("grader_parse_failures_total", format="single")
         return evaluation, score
     
+    def _parse_packed_response(self, response, count):
+        """Parse a packed LLM response into {answer_number: (evaluation, score)}.
+        
+        Only sections with exactly one evaluation and one score are returned, so
+        missing, repeated or garbled answers can be retried individually.
+        """
+        sections = {}
+        repeated = set()
+        matches = list(self.PACKED_SECTION_PATTERN.finditer(response))
+        for match, following in zip(matches, matches[1:] + [None]):
+            number = int(match.group(2))
+            if not 1 <= number <= count:
+                continue
+            end = following.start() if following else len(response)
+            section = sections.setdefault(number, {})
+            kind = match.group(1).upper()
+            if kind in section:
+                # Two grades for one answer; neither can be trusted
+                repeated.add(number)
+            section[kind] = response[match.end():end].strip()
+        
+        parsed = {}
+        for number, section in sections.items():
+            if number in repeated or "EVALUATION" not in section or "SCORE" not in section:
+                continue
+            # Reuse the single-answer parser on the normalised section
+            score_match = re.search(r'\d+', section["SCORE"])
+            if not score_match:
+                continue
+            parsed[number] = self._parse_evaluation_response(
+                f"EVALUATION: {section['EVALUATION']}\nSCORE: {score_match.group()}"
+            )
+        
+        if len(parsed) < count:
+            metrics.inc("grader_parse_failures_total", value=count - len(parsed), format="packed")
+        return parsed
+    
     def _simulate_evaluation(self, student_answer, question="", expected_answer="", grading_criteria=""):
         """Simulate an evaluation when API key is not available (demo mode)."""
-        # Determine max score based on grading criteria
-        max_score = 100
-        try:
-            if grading_criteria and grading_criteria.isdigit():
-                max_score = int(grading_criteria)
-        except:
-            pass
-            
-        # Simple heuristic: longer answers get better scores
-        word_count = len(student_answer.split())
-        
-        # Calculate score as a percentage of max_score
-        if word_count < 10:
-            percentage = 0.3  # 30%
-            evaluation = "Your answer is too brief. Please provide more details and explanation."
-        elif word_count < 30:
-            percentage = 0.6  # 60%
-            evaluation = "Your answer covers some key points but could be more comprehensive."
-        elif word_count < 50:
-            percentage = 0.8  # 80%
-            evaluation = "Good answer! You've covered most of the important aspects of the question."
-        else:
-            percentage = 0.9  # 90%
-            evaluation = "Excellent answer! Comprehensive and well-articulated."
-        
-        score = int(max_score * percentage)
+        evaluation, score, _ = self.scorer.evaluate(
+            question, student_answer, expected_answer, grading_criteria, self._max_score(grading_criteria)
+        )
         
         evaluation += "\n\nNote: This is a simulated evaluation (demo mode). For actual LLM evaluation, please set up your Gemini API key."
         
-        return evaluation, score
\ No newline at end of file
+        return evaluation, score
+
+_evaluator = None
+_evaluator_lock = threading.Lock()
+
+def get_evaluator():
+    """Return the process-wide evaluator, creating it on first use."""
+    global _evaluator
+    with _evaluator_lock:
+        if _evaluator is None:
+            _evaluator = LLMEvaluator()
+        return _evaluator
\ No newline at end of file
@@ -0,0 +1,279 @@
+import re
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from fake_llm import FakeLLM, FakeAPIError
+from token_budget import estimate_tokens
+
+# Status names the Gemini API puts in its error bodies
+GEMINI_STATUS = {
+    400: "INVALID_ARGUMENT",
+    404: "NOT_FOUND",
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    503: "UNAVAILABLE",
+    504: "DEADLINE_EXCEEDED"
+}
+
+class StandInLLM:
+    """A local stand-in for the Gemini API, answering with a FakeLLM.
+
+    Endpoints:
+        POST /v1beta/models/<model>:generateContent         Gemini REST API
+        POST /v1beta/models/<model>:streamGenerateContent   streamed as server-sent events
+        POST /v1/chat/completions                           OpenAI format ("stream": true to stream)
+        GET  /stats                                         request, rate limit and failure counts
+
+    Responses, latency and injected errors come from the FakeLLM, so they
+    repeat for a given seed (latencies and errors in the same order when
+    requests arrive in the same order). requests_per_minute and
+    tokens_per_minute emulate Gemini's quota: once either is used up for the
+    current minute, requests get the 429 RESOURCE_EXHAUSTED error the real
+    API returns.
+
+    handle() is transport independent and safe to call from many threads.
+    """
+
+    def __init__(self, fake=None, requests_per_minute=0, tokens_per_minute=0):
+        self.fake = fake or FakeLLM()
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = None
+        self.window_requests = 0
+        self.window_tokens = 0
+        self.stats = {"requests": 0, "rate_limited": 0, "failed": 0, "streamed": 0,
+                      "prompt_tokens": 0, "output_tokens": 0}
+        self.lock = threading.Lock()
+        self.routes = [
+            (re.compile(r"^/v1beta/models/([^/:]+):generateContent$"), "gemini", False),
+            (re.compile(r"^/v1beta/models/([^/:]+):streamGenerateContent$"), "gemini", True),
+            (re.compile(r"^/v1/chat/completions$"), "openai", None),
+        ]
+
+    def handle(self, method, path, body=b""):
+        """Handle one request.
+
+        Returns:
+            tuple: (status_code, payload) where payload is a JSON serialisable
+                dict, or for a streamed response an iterator of server-sent
+                event payloads
+        """
+        if method == "GET" and path == "/stats":
+            with self.lock:
+                return 200, dict(self.stats, calls=self.fake.calls, injected_failures=self.fake.failures)
+
+        for pattern, wire_format, stream in self.routes:
+            match = pattern.match(path)
+            if not match:
+                continue
+            if method != "POST":
+                return self._error(wire_format, 405, f"Method {method} not allowed")
+
+            try:
+                data = json.loads(body) if body else {}
+                if wire_format == "gemini":
+                    model = match.group(1)
+                    prompt = "".join(part.get("text", "") for content in data.get("contents", [])
+                                     for part in content.get("parts", []))
+                    max_output_tokens = data.get("generationConfig", {}).get("maxOutputTokens")
+                else:
+                    model = data.get("model", "")
+                    prompt = "".join(message.get("content") or "" for message in data.get("messages", []))
+                    max_output_tokens = data.get("max_tokens")
+                    stream = bool(data.get("stream"))
+            except (ValueError, AttributeError, TypeError):
+                return self._error(wire_format, 400, "Request body is not a valid request")
+            if not prompt:
+                return self._error(wire_format, 400, "The request has no prompt text")
+
+            if not self._admit(estimate_tokens(prompt)):
+                return self._error(wire_format, 429, "Resource has been exhausted (e.g. check quota).")
+            if stream:
+                return self._stream(wire_format, model, prompt, max_output_tokens)
+            return self._generate(wire_format, model, prompt)
+
+        return 404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}}
+
+    def _admit(self, prompt_tokens):
+        """Count a request against the current minute's quota, or refuse it."""
+        with self.lock:
+            self.stats["requests"] += 1
+            window = int(time.monotonic() // 60)
+            if window != self.window:
+                self.window, self.window_requests, self.window_tokens = window, 0, 0
+            if ((self.requests_per_minute and self.window_requests >= self.requests_per_minute) or
+                    (self.tokens_per_minute and self.window_tokens + prompt_tokens > self.tokens_per_minute)):
+                self.stats["rate_limited"] += 1
+                return False
+            self.window_requests += 1
+            self.window_tokens += prompt_tokens
+            self.stats["prompt_tokens"] += prompt_tokens
+            return True
+
+    def _generate(self, wire_format, model, prompt):
+        try:
+            text = self.fake.generate(prompt)
+        except FakeAPIError as e:
+            return self._failed(wire_format, e)
+        self._count_output(text)
+
+        if wire_format == "gemini":
+            return 200, self._gemini_chunk(text, "STOP", prompt)
+        return 200, {
+            "id": "chatcmpl-stand-in",
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": self._usage(prompt, text, "openai")
+        }
+
+    def _stream(self, wire_format, model, prompt, max_output_tokens):
+        chunks = self.fake.stream(prompt, max_output_tokens)
+        try:
+            # The latency and any injected error come before the first chunk,
+            # so errors are still sent as a status code
+            first = next(chunks, "")
+        except FakeAPIError as e:
+            return self._failed(wire_format, e)
+        with self.lock:
+            self.stats["streamed"] += 1
+        return 200, self._events(wire_format, model, prompt, first, chunks, max_output_tokens)
+
+    def _events(self, wire_format, model, prompt, first, chunks, max_output_tokens):
+        text = first
+        try:
+            if first:
+                yield self._event(wire_format, model, first)
+            for chunk in chunks:
+                text += chunk
+                yield self._event(wire_format, model, chunk)
+        finally:
+            # Counted even when the client stops reading part way
+            self._count_output(text)
+            chunks.close()
+
+        cut = max_output_tokens and estimate_tokens(text) >= max_output_tokens
+        if wire_format == "gemini":
+            yield self._gemini_chunk("", "MAX_TOKENS" if cut else "STOP", prompt, text)
+        else:
+            yield {"id": "chatcmpl-stand-in", "object": "chat.completion.chunk", "model": model,
+                   "choices": [{"index": 0, "delta": {}, "finish_reason": "length" if cut else "stop"}]}
+            yield "[DONE]"
+
+    def _event(self, wire_format, model, chunk):
+        if wire_format == "gemini":
+            return {"candidates": [{"content": {"parts": [{"text": chunk}], "role": "model"}, "index": 0}]}
+        return {"id": "chatcmpl-stand-in", "object": "chat.completion.chunk", "model": model,
+                "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]}
+
+    def _gemini_chunk(self, text, finish_reason, prompt, output=None):
+        return {
+            "candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                            "finishReason": finish_reason, "index": 0}],
+            "usageMetadata": self._usage(prompt, text if output is None else output, "gemini")
+        }
+
+    def _usage(self, prompt, text, wire_format):
+        prompt_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(text)
+        if wire_format == "gemini":
+            return {"promptTokenCount": prompt_tokens, "candidatesTokenCount": output_tokens,
+                    "totalTokenCount": prompt_tokens + output_tokens}
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": output_tokens,
+                "total_tokens": prompt_tokens + output_tokens}
+
+    def _count_output(self, text):
+        with self.lock:
+            self.stats["output_tokens"] += estimate_tokens(text)
+
+    def _failed(self, wire_format, error):
+        with self.lock:
+            self.stats["failed"] += 1
+        return self._error(wire_format, error.code, "The service is currently unavailable.")
+
+    def _error(self, wire_format, status, message):
+        if wire_format == "gemini":
+            return status, {"error": {"code": status, "message": message, "status": GEMINI_STATUS.get(status, "UNKNOWN")}}
+        kind = "rate_limit_error" if status == 429 else "server_error" if status >= 500 else "invalid_request_error"
+        return status, {"error": {"message": message, "type": kind, "code": status}}
+
+
+def create_http_server(host, port, stand_in=None):
+    """Return a standard-library threaded HTTP server for a StandInLLM."""
+    stand_in = stand_in or StandInLLM()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _handle(self):
+            path = self.path.partition("?")[0]
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+
+            status, payload = stand_in.handle(self.command, path, body)
+            if isinstance(payload, dict):
+                response = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+                return
+
+            # Server-sent events in a chunked response, so the connection stays open afterwards
+            self.send_response(status)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for event in payload:
+                    data = event if isinstance(event, str) else json.dumps(event)
+                    message = f"data: {data}\r\n\r\n".encode("utf-8")
+                    self.wfile.write(f"{len(message):x}\r\n".encode("ascii") + message + b"\r\n")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # The client stopped reading, which cancels the rest of the generation
+                self.close_connection = True
+            finally:
+                payload.close()
+
+        do_GET = _handle
+        do_POST = _handle
+
+        def log_message(self, format, *args):
+            # Keep the console quiet under load
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Gemini API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before each response")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Standard deviation of the latency")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="Seconds between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument("--error-code", type=int, default=503)
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before 429s (0 for no limit)")
+    parser.add_argument("--tpm", type=int, default=0, help="Prompt tokens per minute before 429s (0 for no limit)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeLLM(latency=args.latency, latency_jitter=args.jitter, chunk_delay=args.chunk_delay,
+                   error_rate=args.error_rate, error_code=args.error_code, seed=args.seed)
+    server = create_http_server(args.host, args.port, StandInLLM(fake, args.rpm, args.tpm))
+    print(f"Serving stand-in Gemini API on http://{args.host}:{args.port}")
+    print(f"Grade against it with GRADER_LLM_BACKEND=http GRADER_LLM_URL=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
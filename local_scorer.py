@@ -0,0 +1,215 @@
+import re
+import math
+from collections import Counter
+
+STOPWORDS = frozenset("""
+    a an the and or but if of to in on at by for with from as is are was were be been being it its
+    this that these those there their they them he she his her we you your i me my our so than
+    then which who whom what when where why how do does did can could should would will may might must
+    also into about over under more most such very just because therefore thus has have had
+""".split())
+
+# Kept as content words: they reverse the meaning of the terms after them
+NEGATIONS = frozenset(["not", "no", "never", "none", "nor", "neither", "cannot", "without"])
+# Key terms within this many content words after a negation count as negated
+NEGATION_WINDOW = 3
+
+SUFFIXES = ("ations", "ation", "ness", "ment", "ing", "ies", "ied", "ed", "es", "ly", "s")
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+RUBRIC_SPLIT_PATTERN = re.compile(r"\n|;|(?:^|\s)(?:\d+[.)]|[-*•])\s")
+
+def stem(word):
+    """Strip a common English suffix so 'accelerates' and 'accelerated' match."""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    """Return (stem, word) pairs for the content words of a text."""
+    # "doesn't" becomes "does not", so the negation is kept as a word
+    return [
+        (stem(word), word) for word in TOKEN_PATTERN.findall(text.lower().replace("n't", " not"))
+        if word not in STOPWORDS and (len(word) > 1 or word.isdigit())
+    ]
+
+
+def negated_terms(tokens):
+    """Return the terms that follow a negation word closely enough to be negated by it."""
+    negated = set()
+    remaining = 0
+    for term, word in tokens:
+        if word in NEGATIONS:
+            remaining = NEGATION_WINDOW
+        elif remaining:
+            negated.add(term)
+            remaining -= 1
+    return negated
+
+
+def non_ascii_share(text):
+    """Return the share of a text's letters outside ASCII, which the tokenizer cannot read."""
+    letters = [char for char in text if char.isalpha()]
+    return sum(not char.isascii() for char in letters) / len(letters) if letters else 0.0
+
+
+class LocalScorer:
+    """Fast lexical grading against the teacher's expected answer and rubric.
+
+    Combines three measures of how well the answer covers the reference:
+    - keyword coverage: share of the reference's key terms the answer uses
+    - BM25: term matches with saturating term frequency and answer length
+      normalisation, so repeating a keyword or padding the answer does not help
+    - cosine similarity of the term frequency vectors
+    plus, when the grading criteria is a rubric rather than a number, the share
+    of rubric items the answer addresses.
+
+    Terms that also appear in the question count half, since students tend to
+    repeat the question. Confidence is high only when the reference is
+    substantial, the measures agree, and the score is clearly high or clearly
+    low. Answers that say a lot without matching the reference may be
+    correct paraphrases, so they never get a confident low score. Neither do
+    answers with no readable words or mostly written outside ASCII, and
+    answers that negate key terms the reference affirms (or the other way
+    round) are never confident either way.
+    """
+
+    # Answers or references with more non-ASCII letters than this are left to the LLM
+    MAX_NON_ASCII_SHARE = 0.2
+    # Highest confidence for an answer whose negations disagree with the reference
+    NEGATION_CONFIDENCE = 0.3
+
+    K1 = 1.2
+    B = 0.75
+    QUESTION_TERM_WEIGHT = 0.5
+
+    def evaluate(self, question, student_answer, expected_answer="", grading_criteria="", max_score=100):
+        """Score an answer locally.
+
+        Args:
+            question (str): The question that was asked
+            student_answer (str): The student's answer
+            expected_answer (str, optional): The expected answer if provided by teacher
+            grading_criteria (str, optional): Grading criteria; a number only sets max_score
+            max_score (int, optional): The highest possible score
+
+        Returns:
+            tuple: (evaluation_text, score, confidence) with confidence between 0 and 1
+        """
+        if not student_answer.strip():
+            return "The answer is empty.", 0, 1.0
+        answer = tokenize(student_answer)
+        if not answer or max(non_ascii_share(student_answer), non_ascii_share(expected_answer)) > self.MAX_NON_ASCII_SHARE:
+            # Nothing the scorer can read, which is not the same as a wrong answer
+            return "The answer could not be scored locally.", 0, 0.0
+
+        rubric = [] if grading_criteria.isdigit() else self._rubric_items(grading_criteria)
+        reference = tokenize(expected_answer)
+        if not reference and not rubric:
+            return self._evaluate_without_reference(question, answer, max_score)
+
+        question_terms = {term for term, _ in tokenize(question)}
+        weights = {}
+        words = {}
+        for term, word in reference + [pair for item in rubric for pair in item]:
+            weights[term] = self.QUESTION_TERM_WEIGHT if term in question_terms else 1.0
+            words.setdefault(term, word)
+
+        answer_counts = Counter(term for term, _ in answer)
+        components = []
+        if reference:
+            reference_counts = Counter(term for term, _ in reference)
+            coverage, missing = self._coverage(reference_counts, answer_counts, weights)
+            components += [
+                (0.4, coverage),
+                (0.3, self._bm25(reference_counts, answer_counts, len(answer), len(reference), weights)),
+                (0.3, self._cosine(reference_counts, answer_counts, weights))
+            ]
+        else:
+            coverage, missing = 0.0, []
+
+        rubric_met = 0
+        if rubric:
+            item_scores = []
+            for item in rubric:
+                item_coverage, _ = self._coverage(Counter(term for term, _ in item), answer_counts, weights)
+                item_scores.append(min(1.0, item_coverage / 0.6))
+                rubric_met += item_coverage >= 0.5
+            rubric_score = sum(item_scores) / len(item_scores)
+            # With a reference, the rubric carries 40% of the weight; without one, all of it
+            components = [(weight * 0.6, value) for weight, value in components] + [(0.4 if reference else 1.0, rubric_score)]
+
+        fraction = sum(weight * value for weight, value in components)
+        length_ratio = len(answer) / max(len(reference), 1) if reference else 1.0
+        if length_ratio < 0.3:
+            fraction *= length_ratio / 0.3
+        calibrated = min(1.0, max(0.0, (fraction - 0.05) / 0.75))
+        score = round(max_score * calibrated)
+
+        values = [value for _, value in components]
+        reference_size = len(set(weights))
+        confidence = min(1.0, reference_size / 8) * (1 - (max(values) - min(values))) * abs(2 * calibrated - 1)
+        if calibrated < 0.5 and len(answer) >= len(reference):
+            confidence *= 0.5
+
+        # Matching words say nothing about whether the answer agrees with them
+        shared = set(answer_counts) & set(weights)
+        contradicted = (negated_terms(answer) ^ negated_terms(reference)) & shared
+        if contradicted:
+            confidence = min(confidence, self.NEGATION_CONFIDENCE)
+
+        evaluation = self._describe(reference, coverage, missing, words, rubric, rubric_met, length_ratio)
+        if contradicted:
+            evaluation += " Some key points may be contradicted rather than stated."
+        return evaluation, score, round(confidence, 3)
+
+    def _rubric_items(self, grading_criteria):
+        items = [tokenize(part) for part in RUBRIC_SPLIT_PATTERN.split(grading_criteria) if part]
+        return [item for item in items if item]
+
+    def _coverage(self, reference_counts, answer_counts, weights):
+        total = sum(weights[term] for term in reference_counts)
+        covered = sum(weights[term] for term in reference_counts if term in answer_counts)
+        missing = sorted((term for term in reference_counts if term not in answer_counts),
+                         key=lambda term: -weights[term])
+        return (covered / total if total else 0.0), missing
+
+    def _bm25(self, reference_counts, answer_counts, answer_length, reference_length, weights):
+        # Normalised by the score the reference itself would get
+        length_norm = self.K1 * (1 - self.B + self.B * answer_length / reference_length)
+        score = 0.0
+        best = 0.0
+        for term in reference_counts:
+            tf = answer_counts.get(term, 0)
+            score += weights[term] * tf * (self.K1 + 1) / (tf + length_norm)
+            best += weights[term]
+        return min(1.0, score / best) if best else 0.0
+
+    def _cosine(self, reference_counts, answer_counts, weights):
+        dot = sum(weights[term] ** 2 * count * answer_counts.get(term, 0) for term, count in reference_counts.items())
+        reference_norm = math.sqrt(sum((weights[term] * count) ** 2 for term, count in reference_counts.items()))
+        answer_norm = math.sqrt(sum((weights.get(term, 1.0) * count) ** 2 for term, count in answer_counts.items()))
+        return dot / (reference_norm * answer_norm) if reference_norm and answer_norm else 0.0
+
+    def _evaluate_without_reference(self, question, answer, max_score):
+        # Only the question to go on: reward relevant, developed answers, but never confidently
+        question_terms = {term for term, _ in tokenize(question)}
+        relevance = len(question_terms & {term for term, _ in answer}) / len(question_terms) if question_terms else 0.5
+        fraction = min(1.0, len(answer) / 40) * (0.6 + 0.4 * relevance)
+        evaluation = (f"No expected answer was provided, so this score is based on the answer's length "
+                      f"({len(answer)} content words) and how much it addresses the question.")
+        return evaluation, round(max_score * (0.2 + 0.7 * fraction)), 0.2
+
+    def _describe(self, reference, coverage, missing, words, rubric, rubric_met, length_ratio):
+        parts = []
+        if reference:
+            parts.append(f"The answer covers about {coverage:.0%} of the key points in the expected answer.")
+            if missing:
+                parts.append("Consider addressing: " + ", ".join(words[term] for term in missing[:5]) + ".")
+        if rubric:
+            parts.append(f"It addresses {rubric_met} of {len(rubric)} grading criteria.")
+        if length_ratio < 0.3:
+            parts.append("The answer is much shorter than expected; explain your reasoning in more detail.")
+        return " ".join(parts)
@@ -1,8 +1,4 @@
 import os
-import json
-from teacher import Teacher
-from student import Student
-from llm_evaluator import LLMEvaluator
 
 def main():
     while True:
@@ -10,13 +6,17 @@ def main():
         print("1. Teacher Mode")
         print("2. Student Mode")
         print("3. Exit")
-        
+
         choice = input("\nSelect mode: ")
-        
+
+        # Each mode is imported when chosen, so opening Teacher Mode never
+        # loads the grading stack that Student Mode needs
         if choice == "1":
+            from teacher import Teacher
             teacher = Teacher()
             teacher.menu()
         elif choice == "2":
+            from student import Student
             student = Student()
             student.menu()
         elif choice == "3":
@@ -29,5 +29,5 @@ if __name__ == "__main__":
     # Create data directories if they don't exist
     os.makedirs("data/questions", exist_ok=True)
     os.makedirs("data/submissions", exist_ok=True)
-    
+
     main()
\ No newline at end of file
@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import atexit
+import bisect
+import threading
+from functools import wraps
+from dotenv import load_dotenv
+
+# Bucket upper bounds for durations (seconds) and sizes (characters)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Span:
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        labels = dict(self.labels, outcome="error" if exc_type else "ok")
+        self.registry.observe(self.name, time.perf_counter() - self.start, **labels)
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+class Metrics:
+    """Process-wide counters and histograms with Prometheus and JSON export.
+
+    Every recording call returns immediately when disabled, so instrumented
+    code costs one attribute check.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        """Add value to a counter."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        """Record a value in a histogram."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def span(self, name, **labels):
+        """Context manager recording how long a block takes, labelled with its outcome."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, labels)
+
+    def timed(self, name, **labels):
+        """Decorator form of span()."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, name, labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        """Return all metrics as a JSON-serialisable dict."""
+        with self.lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": h.count,
+                    "sum": h.sum,
+                    "buckets": dict(zip([str(b) for b in h.buckets] + ["+Inf"], self._cumulative(h.counts)))
+                }
+                for (name, labels), h in sorted(self.histograms.items())
+            ]
+        return {"timestamp": time.time(), "counters": counters, "histograms": histograms}
+
+    def to_prometheus(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{self._format_labels(labels)} {value}")
+
+            for (name, labels), h in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                bounds = [str(b) for b in h.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, self._cumulative(h.counts)):
+                    lines.append(f"{name}_bucket{self._format_labels(labels + (('le', bound),))} {count}")
+                lines.append(f"{name}_sum{self._format_labels(labels)} {h.sum}")
+                lines.append(f"{name}_count{self._format_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path=None):
+        """Write metrics to path (.json for a snapshot, Prometheus text otherwise).
+
+        Defaults to GRADER_METRICS_FILE; does nothing if no path is configured.
+        """
+        path = path or os.getenv("GRADER_METRICS_FILE")
+        if not path or not self.enabled:
+            return
+        content = json.dumps(self.snapshot(), indent=4) if path.endswith(".json") else self.to_prometheus()
+
+        # Replace atomically so a scraper never reads a half-written file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _cumulative(self, counts):
+        total = 0
+        cumulative = []
+        for count in counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def _format_labels(self, labels):
+        if not labels:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+load_dotenv()
+metrics = Metrics(enabled=os.getenv("GRADER_METRICS", "").lower() in ("1", "true", "yes"))
+
+# Leave a final snapshot behind when the process exits
+atexit.register(metrics.write_file)
@@ -0,0 +1,47 @@
+import argparse
+from repository import JsonRepository, SqliteRepository, LogRepository
+
+def migrate(source_dir="data", db_path="data/grader.db", batch_size=1000, target=None):
+    """Copy every question and submission from the JSON tree into SQLite,
+    or into another repository passed as target.
+
+    Existing records with the same ID are replaced, so the migration can be re-run safely.
+
+    Returns:
+        tuple: (questions_migrated, submissions_migrated)
+    """
+    source = JsonRepository(source_dir)
+    target = target or SqliteRepository(db_path)
+
+    questions = source.list_questions()
+    for question in questions:
+        target.add_question(question)
+
+    submissions = 0
+    batch = []
+    for submission in source.iter_submissions():
+        batch.append(submission)
+        if len(batch) >= batch_size:
+            target.save_submissions(batch)
+            submissions += len(batch)
+            batch = []
+    if batch:
+        target.save_submissions(batch)
+        submissions += len(batch)
+
+    return len(questions), submissions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate data/questions and data/submissions JSON files into SQLite.")
+    parser.add_argument("--source", default="data", help="Directory containing questions/ and submissions/")
+    parser.add_argument("--db", default="data/grader.db", help="SQLite database to write to")
+    parser.add_argument("--log", metavar="DATA_DIR", help="Write to the append-only submission log in this directory instead of SQLite")
+    args = parser.parse_args()
+
+    target = LogRepository(args.log) if args.log else None
+    questions, submissions = migrate(args.source, args.db, target=target)
+    print(f"Migrated {questions} questions and {submissions} submissions into {args.log or args.db}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import time
+import threading
+from repository import get_repository
+from metrics import metrics
+
+class QuestionCatalog:
+    """In-memory cache of all questions, shared across menus.
+
+    The first listing loads every question. Later listings only re-read
+    questions whose change stamp (file mtime/size, or database revision) moved,
+    and the stamps themselves are polled at most once per poll_interval seconds.
+    """
+
+    def __init__(self, repository, poll_interval=1.0):
+        self.repository = repository
+        self.poll_interval = poll_interval
+        self.questions = {}
+        self.stamps = {}
+        self.ordered = []
+        self.last_poll = None
+        self.lock = threading.Lock()
+
+    def refresh(self, force=False):
+        """Reload questions that changed on disk since the last refresh."""
+        with self.lock:
+            now = time.monotonic()
+            if not force and self.last_poll is not None and now - self.last_poll < self.poll_interval:
+                return
+            self.last_poll = now
+
+            with metrics.span("grader_catalog_refresh_seconds"):
+                self._refresh()
+
+    def _refresh(self):
+        stamps = self.repository.question_stamps()
+        changed = False
+
+        for question_id in self.questions.keys() - stamps.keys():
+            del self.questions[question_id]
+            changed = True
+
+        loaded = {}
+        for question_id, stamp in stamps.items():
+            if self.stamps.get(question_id) != stamp:
+                question = self.repository.get_question(question_id)
+                if question is None:
+                    # Deleted since the stamps were read; leave the stamp out
+                    # so the question is looked up again next time
+                    if self.questions.pop(question_id, None) is not None:
+                        changed = True
+                    continue
+                self.questions[question_id] = question
+                metrics.inc("grader_catalog_reloads_total")
+                changed = True
+            loaded[question_id] = stamp
+
+        self.stamps = loaded
+        if changed:
+            self.ordered = sorted(self.questions.values(), key=lambda q: q.get('created_at', ''))
+
+    def list_questions(self):
+        """Return all questions, oldest first."""
+        self.refresh()
+        return list(self.ordered)
+
+    def get_question(self, question_id):
+        self.refresh()
+        return self.questions.get(question_id)
+
+    def add_question(self, question):
+        """Save a new question and make it visible immediately."""
+        self.repository.add_question(question)
+        self.refresh(force=True)
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+def get_question_catalog(repository=None):
+    """Return the shared catalog for a repository (the default one if omitted)."""
+    repository = repository or get_repository()
+    with _catalogs_lock:
+        catalog = _catalogs.get(id(repository))
+        if catalog is None:
+            catalog = QuestionCatalog(repository)
+            _catalogs[id(repository)] = catalog
+        return catalog
@@ -0,0 +1,50 @@
+import threading
+import time
+
+class RateLimiter:
+    """Token bucket limiting how many requests may start per minute."""
+
+    def __init__(self, requests_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self.capacity = max(1, requests_per_minute)
+        self.tokens = float(self.capacity)
+        self.refill_rate = requests_per_minute / 60.0
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, blocking=True):
+        """Take a request slot, waiting until one is available unless blocking is False.
+
+        Returns:
+            bool: True if a slot was taken (always, when blocking)
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                if not blocking:
+                    return False
+                wait = (1 - self.tokens) / self.refill_rate
+            time.sleep(wait)
+
+
+# One limiter per API key, shared by every evaluator using that key
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(key, requests_per_minute):
+    """Return the shared limiter for a key, or None if limiting is disabled."""
+    if not requests_per_minute:
+        return None
+
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None or limiter.requests_per_minute != requests_per_minute:
+            limiter = RateLimiter(requests_per_minute)
+            _limiters[key] = limiter
+        return limiter
@@ -0,0 +1,274 @@
+import os
+import json
+import hashlib
+import argparse
+from collections import deque
+from dotenv import load_dotenv
+from llm_evaluator import get_evaluator
+from repository import get_repository
+from resilience import GradingUnavailableError
+from similarity import get_duplicate_detector
+from search_index import get_search_index
+from metrics import metrics
+
+def load_shard(question_id, since=None, until=None, repository=None):
+    """Return the graded submissions to one question submitted within a date range.
+
+    Runs in regrade worker processes, which open the repository configured by
+    the environment.
+    """
+    repository = repository or get_repository()
+    submissions = []
+    for submission in repository.iter_submissions(question_id, graded=True):
+        submitted_at = submission.get('submitted_at') or ''
+        if since and submitted_at < since:
+            continue
+        # Dates compare as ISO strings; include the whole last day
+        if until and submitted_at >= f"{until}\uffff":
+            continue
+        submissions.append(submission)
+    return submissions
+
+
+class Regrader:
+    """Regrades graded submissions after a question's grading or the model changes.
+
+    Each question is a shard. Shards are read and decoded one after another,
+    or by a pool of worker processes, and streamed into the evaluator's
+    concurrent dispatcher (evaluate_many), so loading overlaps grading. Every saved regrade is
+    appended to the run's checkpoint file, and submissions already graded
+    under the current grading version are skipped, so an interrupted run
+    picks up where it stopped when started again. The grade being replaced
+    is kept in the submission's 'evaluation_history'.
+
+    Results are saved SAVE_BATCH at a time, so each batch costs one storage
+    transaction and one checkpoint write.
+    """
+
+    SAVE_BATCH = 200
+
+    def __init__(self, evaluator=None, repository=None, checkpoint_dir="data/regrade"):
+        # Worker processes open the configured repository, so only use them for it
+        self.shared_repository = repository is None
+        self.repository = repository or get_repository()
+        self.evaluator = evaluator or get_evaluator()
+        self.duplicates = get_duplicate_detector(self.repository)
+        self.search = get_search_index()
+        self.checkpoint_dir = checkpoint_dir
+
+    def select_questions(self, question_id=None, subject=None):
+        questions = self.repository.list_questions()
+        if question_id:
+            questions = [q for q in questions if q['id'] == question_id]
+        if subject:
+            questions = [q for q in questions if q.get('subject', '').casefold() == subject.casefold()]
+        return questions
+
+    def versions(self, questions):
+        """Return {question_id: grading_version} under the current prompt and model."""
+        return {
+            q['id']: self.evaluator.grading_version(q['question'], q.get('expected_answer', ''), q.get('grading_criteria', ''))
+            for q in questions
+        }
+
+    def checkpoint_path(self, versions, since, until, force):
+        # The same selection under the same grading versions is the same run
+        key = json.dumps([sorted(versions.items()), since, until, force])
+        return os.path.join(self.checkpoint_dir, hashlib.sha256(key.encode("utf-8")).hexdigest()[:16] + ".checkpoint")
+
+    def run(self, question_id=None, subject=None, since=None, until=None, max_workers=8, processes=1,
+            force=False, restart=False, pack=False):
+        """Regrade the selected graded submissions.
+
+        Args:
+            question_id (str, optional): Only this question
+            subject (str, optional): Only questions in this subject (case-insensitive)
+            since (str, optional): Only submissions made on or after this date (YYYY-MM-DD)
+            until (str, optional): Only submissions made on or before this date (YYYY-MM-DD)
+            max_workers (int, optional): Number of concurrent evaluations
+            processes (int, optional): Worker processes loading shards; 1 loads in this
+                process, which is fastest unless reading a shard is slow (e.g. a remote store)
+            force (bool, optional): Also regrade submissions already graded under the current
+                version, bypassing the evaluation cache
+            restart (bool, optional): Ignore the checkpoint of an earlier interrupted run
+            pack (bool, optional): Grade several answers to the same question per request
+
+        Returns:
+            tuple: (regraded, skipped) counts; regraded is short of the selection if
+                the API became unavailable, in which case running again resumes
+        """
+        questions = {q['id']: q for q in self.select_questions(question_id, subject)}
+        versions = self.versions(questions.values())
+
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        checkpoint = self.checkpoint_path(versions, since, until, force)
+        done = set()
+        if os.path.exists(checkpoint) and not restart:
+            with open(checkpoint) as f:
+                done = set(f.read().split())
+            print(f"Resuming: {len(done)} submissions were regraded before the last run stopped.")
+
+        skipped = [0]
+        loaded = self._load(list(questions), since, until, processes)
+
+        def items():
+            for submission in loaded:
+                if submission['id'] in done or (not force and submission.get('grading_version') == versions[submission['question_id']]):
+                    skipped[0] += 1
+                    continue
+                question = questions[submission['question_id']]
+                yield {
+                    "submission": submission,
+                    "question": question['question'],
+                    "student_answer": submission['answer'],
+                    "expected_answer": question.get('expected_answer', ''),
+                    "grading_criteria": question.get('grading_criteria', ''),
+                    "usage": (question['id'], question.get('teacher', ''))
+                }
+
+        regraded = 0
+        batch = []
+        with open(checkpoint, "w" if restart else "a") as log:
+            try:
+                results = self.evaluator.evaluate_many(items(), max_workers, bypass_cache=force, pack=pack, details=True)
+                for item, evaluation, score, criteria_scores, graded_by in results:
+                    submission = item['submission']
+                    self.apply(submission, questions[submission['question_id']], evaluation, score, criteria_scores,
+                               versions[submission['question_id']], graded_by)
+                    batch.append(submission)
+                    if len(batch) >= self.SAVE_BATCH:
+                        regraded += self._save(batch, log)
+                        batch = []
+                        print(f"Regraded {regraded} submissions...")
+            except GradingUnavailableError as e:
+                # Everything regraded so far is saved and checkpointed
+                regraded += self._save(batch, log)
+                print(f"\nRegrading paused: {e}")
+                return regraded, skipped[0]
+            finally:
+                # Shut down the loading processes now rather than at exit
+                loaded.close()
+            regraded += self._save(batch, log)
+
+        os.remove(checkpoint)
+        return regraded, skipped[0]
+
+    def _load(self, question_ids, since, until, processes):
+        """Yield selected submissions shard by shard, in question order."""
+        if processes <= 1 or len(question_ids) <= 1 or not self.shared_repository:
+            for question_id in question_ids:
+                yield from load_shard(question_id, since, until, self.repository)
+            return
+
+        # Only imported when a pool is used, which is not the default
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Spawned rather than forked, so no open database handles are shared
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+            # Keep a bounded number of shards loaded ahead of the evaluator
+            pending = deque()
+            for question_id in question_ids:
+                pending.append(pool.submit(load_shard, question_id, since, until))
+                if len(pending) >= processes * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def apply(self, submission, question, evaluation, score, criteria_scores, version, graded_by=None):
+        """Replace a submission's grade, moving the current one to its history."""
+        if 'score' in submission:
+            previous = {
+                "version": submission.get('grading_version'),
+                "model": submission.get('grading_model'),
+                "graded_at": submission.get('graded_at'),
+                "evaluation": submission.get('evaluation'),
+                "score": submission['score']
+            }
+            for key in ('criteria_scores', 'duplicate_of'):
+                if submission.get(key):
+                    previous[key] = submission[key]
+            submission.setdefault('evaluation_history', []).append(previous)
+
+        self.evaluator.record_grade(submission, question, evaluation, score, criteria_scores, graded_by, version)
+        metrics.inc("grader_regrades_total")
+
+    def _save(self, submissions, log):
+        """Save regraded submissions, then checkpoint them.
+
+        Returns:
+            int: Number of submissions saved
+        """
+        if not submissions:
+            return 0
+        self.repository.save_submissions(submissions)
+        for submission in submissions:
+            self.duplicates.record(submission)
+        self.search.add_submissions(submissions)
+        log.write("".join(submission['id'] + "\n" for submission in submissions))
+        log.flush()
+        return len(submissions)
+
+    def compare(self, question_id=None, subject=None, since=None, until=None):
+        """Compare the current grades of regraded submissions with the grades they replaced.
+
+        Returns:
+            list: Per question dicts with 'question_id', 'count', 'previous_mean',
+                'current_mean', 'mean_abs_change' and 'changed' (scores that differ)
+        """
+        report = []
+        for question in self.select_questions(question_id, subject):
+            pairs = [
+                (submission['evaluation_history'][-1]['score'], submission['score'])
+                for submission in load_shard(question['id'], since, until, self.repository)
+                if submission.get('evaluation_history')
+            ]
+            if not pairs:
+                continue
+            report.append({
+                "question_id": question['id'],
+                "count": len(pairs),
+                "previous_mean": round(sum(old for old, _ in pairs) / len(pairs), 2),
+                "current_mean": round(sum(new for _, new in pairs) / len(pairs), 2),
+                "mean_abs_change": round(sum(abs(new - old) for old, new in pairs) / len(pairs), 2),
+                "changed": sum(old != new for old, new in pairs)
+            })
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regrade graded submissions after a change to grading criteria or the model.")
+    parser.add_argument("--question", help="Only regrade submissions for this question ID")
+    parser.add_argument("--subject", help="Only regrade submissions for questions in this subject")
+    parser.add_argument("--since", help="Only submissions made on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Only submissions made on or before this date (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=8, help="Number of concurrent evaluations")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes loading submissions")
+    parser.add_argument("--rpm", type=int, help="Maximum API requests per minute (overrides GEMINI_REQUESTS_PER_MINUTE)")
+    parser.add_argument("--pack", action="store_true", help="Grade several answers to the same question per API request")
+    parser.add_argument("--force", action="store_true", help="Regrade even if graded under the current prompt and model")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint of an interrupted run")
+    parser.add_argument("--compare", action="store_true", help="Only report how regraded scores differ from the previous grades")
+    args = parser.parse_args()
+
+    load_dotenv()
+    regrader = Regrader(checkpoint_dir=os.getenv("GRADER_REGRADE_DIR", "data/regrade"))
+    if args.compare:
+        report = regrader.compare(args.question, args.subject, args.since, args.until)
+        for row in report:
+            print(f"{row['question_id']}: {row['count']} regraded, mean {row['previous_mean']} -> {row['current_mean']}, "
+                  f"{row['changed']} changed, mean change {row['mean_abs_change']}")
+        if not report:
+            print("No regraded submissions found.")
+        return
+
+    if args.rpm is not None:
+        regrader.evaluator.requests_per_minute = args.rpm
+    regrader.evaluator.warm_up()
+    regraded, skipped = regrader.run(args.question, args.subject, args.since, args.until, args.workers,
+                                     args.processes, args.force, args.restart, args.pack)
+    print(f"\n{regraded} submissions regraded, {skipped} skipped.")
+
+if __name__ == "__main__":
+    main()
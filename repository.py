@@ -0,0 +1,410 @@
+import os
+import json
+import sqlite3
+import threading
+from dotenv import load_dotenv
+from metrics import metrics
+from submission_log import SubmissionLog
+
+class Repository:
+    """Storage for questions and submissions shared by Teacher and Student.
+
+    Questions and submissions are plain dicts with the same keys as the
+    original JSON files.
+    """
+
+    def add_question(self, question):
+        raise NotImplementedError
+
+    def get_question(self, question_id):
+        """Return a question dict, or None if it does not exist."""
+        raise NotImplementedError
+
+    def list_questions(self):
+        raise NotImplementedError
+
+    def question_stamps(self):
+        """Return {question_id: stamp} where the stamp changes whenever the
+        stored question changes. Used to refresh cached questions cheaply."""
+        raise NotImplementedError
+
+    def save_submission(self, submission):
+        """Insert a submission, or replace an existing one with the same ID."""
+        raise NotImplementedError
+
+    def save_submissions(self, submissions):
+        """Save several submissions. Backends override this to write them together."""
+        for submission in submissions:
+            self.save_submission(submission)
+
+    def get_submission(self, submission_id):
+        """Return a submission dict, or None if it does not exist."""
+        raise NotImplementedError
+
+    def list_submissions(self, question_id):
+        raise NotImplementedError
+
+    def list_student_submissions(self, student_name, offset=0, limit=None):
+        """Return a student's submissions (case-insensitive name match), oldest
+        first, each annotated with 'question_text' and 'subject' of its question.
+        offset and limit select one page of the results."""
+        raise NotImplementedError
+
+    def iter_submissions(self, question_id=None, graded=None):
+        """Yield submissions one at a time, optionally filtered by question
+        and by whether they have a score yet."""
+        raise NotImplementedError
+
+
+class JsonRepository(Repository):
+    """The original layout: one JSON file per question and per submission."""
+
+    def __init__(self, data_dir="data"):
+        self.questions_dir = f"{data_dir}/questions"
+        self.submissions_dir = f"{data_dir}/submissions"
+        os.makedirs(self.questions_dir, exist_ok=True)
+        os.makedirs(self.submissions_dir, exist_ok=True)
+
+    @metrics.timed("grader_storage_seconds", backend="json", op="add_question")
+    def add_question(self, question):
+        self._write_json(f"{self.questions_dir}/{question['id']}.json", question)
+
+    @metrics.timed("grader_storage_seconds", backend="json", op="get_question")
+    def get_question(self, question_id):
+        return self._read_json(f"{self.questions_dir}/{question_id}.json")
+
+    @metrics.timed("grader_storage_seconds", backend="json", op="list_questions")
+    def list_questions(self):
+        questions = []
+        for filename in os.listdir(self.questions_dir):
+            if filename.endswith('.json'):
+                questions.append(self._read_json(f"{self.questions_dir}/{filename}"))
+        return questions
+
+    @metrics.timed("grader_storage_seconds", backend="json", op="question_stamps")
+    def question_stamps(self):
+        stamps = {}
+        with os.scandir(self.questions_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    stamps[entry.name[:-len('.json')]] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    @metrics.timed("grader_storage_seconds", backend="json", op="save_submission")
+    def save_submission(self, submission):
+        submission_dir = f"{self.submissions_dir}/{submission['question_id']}"
+        os.makedirs(submission_dir, exist_ok=True)
+        self._write_json(f"{submission_dir}/{submission['id']}.json", submission)
+
+    @metrics.timed("grader_storage_seconds", backend="json", op="get_submission")
+    def get_submission(self, submission_id):
+        for submission in self.iter_submissions():
+            if submission['id'] == submission_id:
+                return submission
+        return None
+
+    @metrics.timed("grader_storage_seconds", backend="json", op="list_submissions")
+    def list_submissions(self, question_id):
+        return list(self.iter_submissions(question_id))
+
+    @metrics.timed("grader_storage_seconds", backend="json", op="list_student_submissions")
+    def list_student_submissions(self, student_name, offset=0, limit=None):
+        matches = [
+            submission for submission in self.iter_submissions()
+            if submission['student_name'].casefold() == student_name.casefold()
+        ]
+        matches.sort(key=lambda submission: submission.get('submitted_at', ''))
+        end = None if limit is None else offset + limit
+
+        questions = {}
+        submissions = []
+        for submission in matches[offset:end]:
+            question_id = submission['question_id']
+            if question_id not in questions:
+                questions[question_id] = self.get_question(question_id)
+            question = questions[question_id]
+            if question:
+                submission['question_text'] = question['question']
+                submission['subject'] = question['subject']
+            submissions.append(submission)
+        return submissions
+
+    def iter_submissions(self, question_id=None, graded=None):
+        question_ids = [question_id] if question_id else sorted(os.listdir(self.submissions_dir))
+        for qid in question_ids:
+            question_submissions_dir = f"{self.submissions_dir}/{qid}"
+            if not os.path.isdir(question_submissions_dir):
+                continue
+            for filename in sorted(os.listdir(question_submissions_dir)):
+                if not filename.endswith('.json'):
+                    continue
+                submission = self._read_json(f"{question_submissions_dir}/{filename}")
+                if graded is not None and ('score' in submission) != graded:
+                    continue
+                yield submission
+
+    def _read_json(self, path):
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _write_json(self, path, data):
+        # Write to a temporary file first so a crash never leaves truncated JSON
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, path)
+
+
+class SqliteRepository(Repository):
+    """SQLite storage with indexes on question, student name and submission time.
+
+    The full record is kept as JSON in the 'data' column; the other columns
+    only exist so lookups can use an index.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS questions (
+            id TEXT PRIMARY KEY,
+            subject TEXT,
+            topic TEXT,
+            created_at TEXT,
+            revision INTEGER NOT NULL DEFAULT 0,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS submissions (
+            id TEXT PRIMARY KEY,
+            question_id TEXT NOT NULL,
+            student_key TEXT NOT NULL,
+            submitted_at TEXT,
+            graded INTEGER NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_submissions_question ON submissions (question_id, submitted_at);
+        CREATE INDEX IF NOT EXISTS idx_submissions_student ON submissions (student_key, submitted_at);
+        CREATE INDEX IF NOT EXISTS idx_submissions_submitted_at ON submissions (submitted_at);
+    """
+
+    def __init__(self, path="data/grader.db"):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # SQLite connections cannot be shared between threads, so keep one per thread
+        self.local = threading.local()
+        conn = self._connection()
+        conn.executescript(self.SCHEMA)
+
+        # Databases created before questions had a revision column
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(questions)")]
+        if "revision" not in columns:
+            with conn:
+                conn.execute("ALTER TABLE questions ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    @metrics.timed("grader_storage_seconds", backend="sqlite", op="add_question")
+    def add_question(self, question):
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO questions (id, subject, topic, created_at, revision, data) "
+                "VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(revision), 0) + 1 FROM questions), ?)",
+                (question['id'], question.get('subject'), question.get('topic'),
+                 question.get('created_at'), json.dumps(question))
+            )
+
+    def is_empty(self):
+        """Return True if the database has no questions and no submissions."""
+        row = self._connection().execute(
+            "SELECT EXISTS (SELECT 1 FROM questions) OR EXISTS (SELECT 1 FROM submissions)"
+        ).fetchone()
+        return not row[0]
+
+    @metrics.timed("grader_storage_seconds", backend="sqlite", op="get_question")
+    def get_question(self, question_id):
+        row = self._connection().execute(
+            "SELECT data FROM questions WHERE id = ?", (question_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @metrics.timed("grader_storage_seconds", backend="sqlite", op="list_questions")
+    def list_questions(self):
+        rows = self._connection().execute("SELECT data FROM questions ORDER BY created_at")
+        return [json.loads(row[0]) for row in rows]
+
+    @metrics.timed("grader_storage_seconds", backend="sqlite", op="question_stamps")
+    def question_stamps(self):
+        # Every write bumps the revision past all existing ones
+        rows = self._connection().execute("SELECT id, revision FROM questions")
+        return dict(rows.fetchall())
+
+    def save_submission(self, submission):
+        self.save_submissions([submission])
+
+    @metrics.timed("grader_storage_seconds", backend="sqlite", op="save_submissions")
+    def save_submissions(self, submissions):
+        """Insert or replace several submissions in a single transaction."""
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO submissions (id, question_id, student_key, submitted_at, graded, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(s['id'], s['question_id'], s['student_name'].casefold(), s.get('submitted_at'),
+                  int('score' in s), json.dumps(s)) for s in submissions]
+            )
+
+    @metrics.timed("grader_storage_seconds", backend="sqlite", op="get_submission")
+    def get_submission(self, submission_id):
+        row = self._connection().execute(
+            "SELECT data FROM submissions WHERE id = ?", (submission_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @metrics.timed("grader_storage_seconds", backend="sqlite", op="list_submissions")
+    def list_submissions(self, question_id):
+        return list(self.iter_submissions(question_id))
+
+    @metrics.timed("grader_storage_seconds", backend="sqlite", op="list_student_submissions")
+    def list_student_submissions(self, student_name, offset=0, limit=None):
+        rows = self._connection().execute(
+            "SELECT s.data, q.data FROM submissions s LEFT JOIN questions q ON q.id = s.question_id "
+            "WHERE s.student_key = ? ORDER BY s.submitted_at LIMIT ? OFFSET ?",
+            (student_name.casefold(), -1 if limit is None else limit, offset)
+        )
+
+        submissions = []
+        for submission_data, question_data in rows:
+            submission = json.loads(submission_data)
+            if question_data:
+                question = json.loads(question_data)
+                submission['question_text'] = question['question']
+                submission['subject'] = question['subject']
+            submissions.append(submission)
+        return submissions
+
+    def iter_submissions(self, question_id=None, graded=None):
+        query = "SELECT data FROM submissions"
+        conditions = []
+        params = []
+        if question_id:
+            conditions.append("question_id = ?")
+            params.append(question_id)
+        if graded is not None:
+            conditions.append("graded = ?")
+            params.append(int(graded))
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY question_id, submitted_at" if not question_id else " ORDER BY submitted_at"
+
+        # Use a dedicated cursor so callers can write while iterating
+        for row in self._connection().execute(query, params):
+            yield json.loads(row[0])
+
+
+class LogRepository(JsonRepository):
+    """Questions as JSON files and submissions in a segmented append-only log.
+
+    There are few questions and they rarely change, so they stay one file
+    each. Submissions go to a SubmissionLog, which writes them sequentially
+    and answers lookups from its in-memory index.
+    """
+
+    READ_BATCH = 500
+
+    def __init__(self, data_dir="data", segment_bytes=64 * 1024 * 1024, fsync=True):
+        self.questions_dir = f"{data_dir}/questions"
+        os.makedirs(self.questions_dir, exist_ok=True)
+        self.log = SubmissionLog(f"{data_dir}/submission_log", segment_bytes, fsync)
+
+    def save_submission(self, submission):
+        self.save_submissions([submission])
+
+    @metrics.timed("grader_storage_seconds", backend="log", op="save_submissions")
+    def save_submissions(self, submissions):
+        """Append several submissions with a single write and fsync."""
+        self.log.append(submissions)
+
+    @metrics.timed("grader_storage_seconds", backend="log", op="get_submission")
+    def get_submission(self, submission_id):
+        return self.log.get(submission_id)
+
+    @metrics.timed("grader_storage_seconds", backend="log", op="list_submissions")
+    def list_submissions(self, question_id):
+        return list(self.iter_submissions(question_id))
+
+    @metrics.timed("grader_storage_seconds", backend="log", op="list_student_submissions")
+    def list_student_submissions(self, student_name, offset=0, limit=None):
+        submission_ids = self.log.select(student_key=student_name.casefold())
+        end = None if limit is None else offset + limit
+
+        questions = {}
+        submissions = self.log.read(submission_ids[offset:end])
+        for submission in submissions:
+            question_id = submission['question_id']
+            if question_id not in questions:
+                questions[question_id] = self.get_question(question_id)
+            question = questions[question_id]
+            if question:
+                submission['question_text'] = question['question']
+                submission['subject'] = question['subject']
+        return submissions
+
+    def iter_submissions(self, question_id=None, graded=None):
+        submission_ids = self.log.select(question_id=question_id, graded=graded)
+        # Read in batches so callers can write while iterating without holding the log
+        for start in range(0, len(submission_ids), self.READ_BATCH):
+            yield from self.log.read(submission_ids[start:start + self.READ_BATCH])
+
+
+def has_json_data(data_dir):
+    """Return True if data_dir holds questions or submissions in the JSON layout."""
+    for name in ("questions", "submissions"):
+        path = f"{data_dir}/{name}"
+        if os.path.isdir(path) and os.listdir(path):
+            return True
+    return False
+
+
+_repository = None
+_repository_lock = threading.Lock()
+
+def get_repository():
+    """Return the shared repository configured by GRADER_STORAGE ('sqlite', 'log' or 'json').
+
+    SQLite is the default. When its database is still empty but the data
+    directory holds JSON files from before, they are migrated into it first
+    so existing questions and submissions stay visible.
+    """
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            load_dotenv()
+            storage = os.getenv("GRADER_STORAGE", "sqlite").lower()
+            if storage == "json":
+                _repository = JsonRepository(os.getenv("GRADER_DATA_DIR", "data"))
+            elif storage == "log":
+                _repository = LogRepository(
+                    os.getenv("GRADER_DATA_DIR", "data"),
+                    fsync=os.getenv("GRADER_LOG_FSYNC", "1").lower() not in ("0", "false", "no")
+                )
+            else:
+                db_path = os.getenv("GRADER_DB_PATH", "data/grader.db")
+                data_dir = os.getenv("GRADER_DATA_DIR", "data")
+                _repository = SqliteRepository(db_path)
+                if _repository.is_empty() and has_json_data(data_dir):
+                    from migrate_json import migrate
+                    questions, submissions = migrate(data_dir, target=_repository)
+                    print(f"Migrated {questions} questions and {submissions} submissions from the JSON files "
+                          f"in {data_dir} into {db_path}. Run 'python search_index.py --rebuild' to search them.")
+        return _repository
@@ -0,0 +1,182 @@
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from metrics import metrics
+
+# HTTP status codes worth retrying: rate limited, server error, unavailable, gateway timeout
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+class GradingUnavailableError(Exception):
+    """The LLM cannot grade right now; the submission should be retried later.
+
+    retry_after is a hint in seconds (set when the circuit breaker is open).
+    """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(GradingUnavailableError):
+    """Raised without calling the API while the circuit breaker is open."""
+
+
+class CallTimeoutError(TimeoutError):
+    """An API call did not finish before its deadline."""
+
+
+def is_retryable(error):
+    """Whether an error (or anything in its cause chain) is transient."""
+    while error is not None:
+        if isinstance(error, (TimeoutError, ConnectionError)):
+            return True
+        code = getattr(error, "code", None)
+        if isinstance(code, int) and code in RETRYABLE_CODES:
+            return True
+        error = error.__cause__
+    return False
+
+
+class CircuitBreaker:
+    """Stops calls after repeated failures and lets one trial call through
+    once reset_timeout has passed."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now):
+        if self.opened_at is None:
+            return "closed"
+        if now - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go ahead."""
+        with self.lock:
+            now = time.monotonic()
+            state = self._state(now)
+            if state == "closed":
+                return
+            if state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return
+            metrics.inc("grader_circuit_rejections_total")
+            retry_after = max(0.0, self.reset_timeout - (now - self.opened_at))
+            raise CircuitOpenError("LLM grading is paused after repeated API failures", retry_after or self.reset_timeout)
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def cancel_call(self):
+        """Forget a call allowed by before_call that never reached the API."""
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self.trial_in_flight:
+                    metrics.inc("grader_circuit_opened_total")
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+
+class ResilientCaller:
+    """Wraps an API call with a deadline, retries with jittered exponential
+    backoff, optional hedged duplicate requests and a circuit breaker.
+
+    Calls run on a worker pool so the deadline can be enforced; a call that
+    misses its deadline is abandoned, not interrupted.
+
+    acquire(*args, blocking=True), if given, waits for our own rate limits and
+    budgets before each attempt. That wait happens before the deadline starts
+    and never counts as a failure, and anything it raises (such as a used up
+    daily budget) goes straight to the caller without a retry. A hedged
+    duplicate is only sent if acquire(*args, blocking=False) grants it a slot
+    at once.
+    """
+
+    def __init__(self, func, timeout=60.0, max_retries=3, base_delay=1.0, max_delay=30.0,
+                 hedge_after=None, breaker=None, max_workers=32, acquire=None):
+        self.func = func
+        self.acquire = acquire
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-call")
+
+    def call(self, *args):
+        """Call func(*args), raising GradingUnavailableError if it keeps failing."""
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            self.breaker.before_call()
+            if self.acquire:
+                try:
+                    self.acquire(*args)
+                except BaseException:
+                    self.breaker.cancel_call()
+                    raise
+            try:
+                result = self._attempt(args)
+            except Exception as e:
+                if not is_retryable(e):
+                    # The request itself is bad; the service is fine
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                last_error = e
+                if attempt < self.max_retries:
+                    metrics.inc("grader_llm_retries_total", error=type(e).__name__)
+                    # Full jitter keeps many workers from retrying in lockstep
+                    time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+                continue
+            self.breaker.record_success()
+            return result
+
+        raise GradingUnavailableError(f"LLM call failed after {self.max_retries + 1} attempts: {last_error}") from last_error
+
+    def _attempt(self, args):
+        deadline = time.monotonic() + self.timeout
+        futures = [self.executor.submit(self.func, *args)]
+
+        if self.hedge_after is not None and self.hedge_after < self.timeout:
+            done, _ = wait(futures, timeout=self.hedge_after)
+            if not done and (self.acquire is None or self.acquire(*args, blocking=False)):
+                # The first request is slow; race a duplicate against it
+                metrics.inc("grader_llm_hedged_requests_total")
+                futures.append(self.executor.submit(self.func, *args))
+
+        error = None
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+
+        if error is not None and not pending:
+            raise error
+        raise CallTimeoutError(f"LLM call exceeded its {self.timeout:g}s deadline")
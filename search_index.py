@@ -0,0 +1,303 @@
+import os
+import re
+import sqlite3
+import argparse
+import threading
+from dotenv import load_dotenv
+from repository import get_repository
+from metrics import metrics
+from local_scorer import stem
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+class SearchIndex:
+    """Full-text search over questions and submissions using SQLite FTS5.
+
+    Kept in its own database so it works with every storage backend. Each
+    question and submission is one row in 'documents' (the fields used by
+    filters) and one row with the same rowid in the FTS5 table 'documents_fts'
+    (the text). Rows are replaced whenever the record is saved again, so the
+    index stays current without rebuilds.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            doc_id TEXT NOT NULL,
+            question_id TEXT,
+            subject TEXT,
+            created_at TEXT,
+            score REAL,
+            UNIQUE (kind, doc_id)
+        );
+        CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+            subject, topic, body, evaluation, student, tokenize = 'porter unicode61 remove_diacritics 2'
+        );
+    """
+
+    # bm25 weights for subject, topic, body, evaluation and student columns
+    RANK = "bm25(3.0, 3.0, 1.0, 0.5, 2.0)"
+    SNIPPET_WORDS = 12
+
+    def __init__(self, path="data/search.db"):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # SQLite connections cannot be shared between threads, so keep one per thread
+        self.local = threading.local()
+        conn = self._connection()
+        conn.executescript(self.SCHEMA)
+        # Stored in the index, so ORDER BY rank uses these column weights
+        with conn:
+            conn.execute("INSERT INTO documents_fts (documents_fts, rank) VALUES ('rank', ?)", (self.RANK,))
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _upsert(self, conn, kind, doc_id, question_id, subject, created_at, score, text):
+        row = conn.execute("SELECT id FROM documents WHERE kind = ? AND doc_id = ?", (kind, doc_id)).fetchone()
+        if row:
+            rowid = row[0]
+            conn.execute(
+                "UPDATE documents SET question_id = ?, subject = ?, created_at = ?, score = ? WHERE id = ?",
+                (question_id, subject, created_at, score, rowid)
+            )
+            conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (rowid,))
+        else:
+            rowid = conn.execute(
+                "INSERT INTO documents (kind, doc_id, question_id, subject, created_at, score) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, doc_id, question_id, subject, created_at, score)
+            ).lastrowid
+        conn.execute(
+            "INSERT INTO documents_fts (rowid, subject, topic, body, evaluation, student) VALUES (?, ?, ?, ?, ?, ?)",
+            (rowid, *text)
+        )
+
+    @metrics.timed("grader_search_index_seconds", op="add_question")
+    def add_question(self, question):
+        """Index a question's subject, topic, text and expected answer."""
+        conn = self._connection()
+        with conn:
+            self._upsert(
+                conn, "question", question['id'], question['id'], question.get('subject'), question.get('created_at'), None,
+                (question.get('subject', ''), question.get('topic', ''),
+                 f"{question.get('question', '')}\n{question.get('expected_answer', '')}", "", "")
+            )
+
+    def add_submission(self, submission):
+        self.add_submissions([submission])
+
+    @metrics.timed("grader_search_index_seconds", op="add_submissions")
+    def add_submissions(self, submissions):
+        """Index submissions' answers, evaluations and student names in one transaction.
+
+        The subject is taken from the indexed question, so questions should be
+        indexed before their submissions.
+        """
+        conn = self._connection()
+        subjects = {}
+        with conn:
+            for submission in submissions:
+                question_id = submission['question_id']
+                if question_id not in subjects:
+                    row = conn.execute(
+                        "SELECT subject FROM documents WHERE kind = 'question' AND doc_id = ?", (question_id,)
+                    ).fetchone()
+                    subjects[question_id] = row[0] if row else None
+                self._upsert(
+                    conn, "submission", submission['id'], question_id, subjects[question_id],
+                    submission.get('submitted_at'), submission.get('score'),
+                    ("", "", submission.get('answer', ''), submission.get('evaluation', ''), submission.get('student_name', ''))
+                )
+
+    @metrics.timed("grader_search_query_seconds")
+    def search(self, text, kind=None, subject=None, since=None, until=None, min_score=None, max_score=None,
+               limit=20, offset=0):
+        """Find questions and submissions matching every word of text, best matches first.
+
+        Words are stemmed, so "accelerating" also finds "acceleration". Every
+        match is ranked, however common the words are.
+
+        Args:
+            text (str): Words to search for
+            kind (str, optional): Only 'question' or only 'submission' results
+            subject (str, optional): Only results for this subject (case-insensitive)
+            since (str, optional): Only results created on or after this date (YYYY-MM-DD)
+            until (str, optional): Only results created on or before this date (YYYY-MM-DD)
+            min_score (float, optional): Only submissions scored at least this
+            max_score (float, optional): Only submissions scored at most this
+            limit (int, optional): Maximum number of results
+            offset (int, optional): Number of results to skip, for paging
+
+        Returns:
+            list: Dicts with 'kind', 'id', 'question_id', 'subject', 'created_at',
+                'score' and a 'snippet' with matching words in [brackets]
+        """
+        words = TOKEN_PATTERN.findall(text.lower())
+        if not words:
+            return []
+        # Quote every word so FTS5 operators in user input are taken literally
+        match = " ".join(f'"{word}"' for word in words)
+
+        conditions = []
+        params = []
+        if kind:
+            conditions.append("d.kind = ?")
+            params.append(kind)
+        if subject:
+            conditions.append("d.subject = ? COLLATE NOCASE")
+            params.append(subject)
+        if since:
+            conditions.append("d.created_at >= ?")
+            params.append(since)
+        if until:
+            # Dates compare as ISO strings; include the whole last day
+            conditions.append("d.created_at < ?")
+            params.append(f"{until}\uffff")
+        if min_score is not None:
+            conditions.append("d.score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            conditions.append("d.score <= ?")
+            params.append(max_score)
+
+        conn = self._connection()
+        columns = "d.id, d.kind, d.doc_id, d.question_id, d.subject, d.created_at, d.score"
+        if conditions:
+            query = (
+                f"SELECT {columns} FROM documents_fts f JOIN documents d ON d.id = f.rowid "
+                f"WHERE f.documents_fts MATCH ? AND {' AND '.join(conditions)} ORDER BY f.rank LIMIT ? OFFSET ?"
+            )
+        else:
+            # Joining every match only to read its fields is the slow part, so
+            # without filters let FTS5 pick the best page by rank on its own
+            # and join just those rows
+            query = (
+                f"SELECT {columns} FROM (SELECT rowid, rank FROM documents_fts WHERE documents_fts MATCH ? "
+                "ORDER BY rank LIMIT ? OFFSET ?) w JOIN documents d ON d.id = w.rowid ORDER BY w.rank"
+            )
+        rows = conn.execute(query, [match] + params + [limit, offset]).fetchall()
+        if not rows:
+            return []
+
+        # FTS5's snippet() would re-run the match over the whole index, so
+        # build snippets here from the stored text of the returned rows only
+        texts = {
+            rowid: [f"{body}\n{evaluation}" if evaluation else body, student, f"{subject} {topic}"]
+            for rowid, subject, topic, body, evaluation, student in conn.execute(
+                "SELECT rowid, subject, topic, body, evaluation, student FROM documents_fts "
+                f"WHERE rowid IN ({', '.join('?' * len(rows))})",
+                [row[0] for row in rows]
+            )
+        }
+        stems = {stem(word) for word in words}
+        keys = ("kind", "id", "question_id", "subject", "created_at", "score")
+        return [
+            dict(zip(keys, row[1:]), snippet=self._snippet(texts.get(row[0], [""]), stems))
+            for row in rows
+        ]
+
+    def _snippet(self, texts, stems):
+        """Return about SNIPPET_WORDS words around the first match in the first
+        of texts that matches, with matching words in [brackets]."""
+        for text in texts:
+            words = text.split()
+            matched = [any(self._matches(token, stems) for token in TOKEN_PATTERN.findall(word.lower())) for word in words]
+            if True in matched:
+                break
+        else:
+            words = texts[0].split()
+            matched = [False] * len(words)
+
+        first = matched.index(True) if True in matched else 0
+        start = max(0, first - self.SNIPPET_WORDS // 3)
+        end = start + self.SNIPPET_WORDS
+        snippet = " ".join(f"[{word}]" if hit else word for word, hit in zip(words[start:end], matched[start:end]))
+        return ("..." if start else "") + snippet + ("..." if end < len(words) else "")
+
+    def _matches(self, token, stems):
+        # FTS5 uses the Porter stemmer, which strips more than stem() does,
+        # so a shared stem of at least three letters counts as a match
+        token = stem(token)
+        return any(
+            token == query or (min(len(token), len(query)) >= 3 and (token.startswith(query) or query.startswith(token)))
+            for query in stems
+        )
+
+    def rebuild(self, repository, batch_size=1000):
+        """Index every question and submission in a repository.
+
+        Returns:
+            tuple: (questions_indexed, submissions_indexed)
+        """
+        questions = repository.list_questions()
+        for question in questions:
+            self.add_question(question)
+
+        submissions = 0
+        batch = []
+        for submission in repository.iter_submissions():
+            batch.append(submission)
+            if len(batch) >= batch_size:
+                self.add_submissions(batch)
+                submissions += len(batch)
+                batch = []
+        if batch:
+            self.add_submissions(batch)
+            submissions += len(batch)
+
+        conn = self._connection()
+        conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize')")
+        conn.commit()
+        return len(questions), submissions
+
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+def get_search_index():
+    """Return the shared search index at GRADER_SEARCH_PATH."""
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            load_dotenv()
+            _search_index = SearchIndex(os.getenv("GRADER_SEARCH_PATH", "data/search.db"))
+        return _search_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search questions and submissions, or rebuild the search index.")
+    parser.add_argument("query", nargs="?", help="Words to search for")
+    parser.add_argument("--rebuild", action="store_true", help="Index every question and submission in storage")
+    parser.add_argument("--kind", choices=["question", "submission"])
+    parser.add_argument("--subject")
+    parser.add_argument("--since", help="YYYY-MM-DD")
+    parser.add_argument("--until", help="YYYY-MM-DD")
+    parser.add_argument("--min-score", type=float)
+    parser.add_argument("--max-score", type=float)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    index = get_search_index()
+    if args.rebuild:
+        questions, submissions = index.rebuild(get_repository())
+        print(f"Indexed {questions} questions and {submissions} submissions.")
+    if args.query:
+        results = index.search(args.query, args.kind, args.subject, args.since, args.until,
+                               args.min_score, args.max_score, args.limit)
+        for result in results:
+            score = "" if result['score'] is None else f" score {result['score']:g}"
+            print(f"[{result['kind']} {result['id']}] {result['subject'] or ''}{score}: {result['snippet']}")
+        print(f"{len(results)} results.")
+
+if __name__ == "__main__":
+    main()
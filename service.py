@@ -0,0 +1,248 @@
+import re
+import json
+import asyncio
+import argparse
+from urllib.parse import parse_qs, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from teacher import Teacher
+from student import Student
+
+MAX_PAGE_SIZE = 200
+
+class ServiceError(Exception):
+    """An error returned to the client as {"error": message} with an HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class GraderService:
+    """HTTP API for questions and submissions on top of Teacher and Student.
+
+    Endpoints:
+        POST /questions                        create a question
+        GET  /questions                        list questions (offset, limit)
+        GET  /questions/<id>                   get a question
+        POST /questions/<id>/submissions       submit an answer
+        GET  /submissions/<id>                 get a submission
+        GET  /students/<name>/submissions      list a student's submissions (offset, limit)
+
+    dispatch() is transport independent and safe to call from many threads.
+    """
+
+    def __init__(self, teacher=None, student=None):
+        self.teacher = teacher or Teacher()
+        self.student = student or Student(self.teacher.repository)
+        self.routes = [
+            ("POST", re.compile(r"^/questions$"), self.create_question),
+            ("GET", re.compile(r"^/questions$"), self.list_questions),
+            ("GET", re.compile(r"^/questions/([^/]+)$"), self.get_question),
+            ("POST", re.compile(r"^/questions/([^/]+)/submissions$"), self.submit_answer),
+            ("GET", re.compile(r"^/submissions/([^/]+)$"), self.get_submission),
+            ("GET", re.compile(r"^/students/([^/]+)/submissions$"), self.list_student_submissions),
+        ]
+
+    def dispatch(self, method, path, query_string="", body=b""):
+        """Handle one request.
+
+        Returns:
+            tuple: (status_code, json_serialisable_payload)
+        """
+        path_matched = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if not match:
+                continue
+            path_matched = True
+            if route_method != method:
+                continue
+
+            try:
+                query = {k: v[-1] for k, v in parse_qs(query_string).items()}
+                data = json.loads(body) if body else {}
+                if not isinstance(data, dict):
+                    raise ServiceError(400, "Request body must be a JSON object")
+                args = [unquote(group) for group in match.groups()]
+                return handler(*args, query=query, data=data)
+            except ServiceError as e:
+                return e.status, {"error": str(e)}
+            except json.JSONDecodeError:
+                return 400, {"error": "Request body is not valid JSON"}
+            except Exception as e:
+                print(f"Error handling {method} {path}: {e}")
+                return 500, {"error": "Internal server error"}
+
+        if path_matched:
+            return 405, {"error": f"Method {method} not allowed"}
+        return 404, {"error": "Not found"}
+
+    def create_question(self, query, data):
+        for field in ("subject", "topic", "question"):
+            if not isinstance(data.get(field), str) or not data[field].strip():
+                raise ServiceError(400, f"'{field}' is required")
+        for field in ("expected_answer", "grading_criteria", "teacher"):
+            if not isinstance(data.get(field, ''), str):
+                raise ServiceError(400, f"'{field}' must be a string")
+
+        question = self.teacher.add_question(
+            data['subject'],
+            data['topic'],
+            data['question'],
+            data.get('expected_answer', ''),
+            data.get('grading_criteria', ''),
+            data.get('teacher', '')
+        )
+        return 201, question
+
+    def list_questions(self, query, data):
+        offset, limit = self._page(query)
+        questions = self.teacher.get_all_questions()
+        return 200, self._page_payload(questions[offset:offset + limit], offset, limit, offset + limit < len(questions))
+
+    def get_question(self, question_id, query, data):
+        question = self.teacher.catalog.get_question(question_id)
+        if question is None:
+            raise ServiceError(404, f"Question {question_id} not found")
+        return 200, question
+
+    def submit_answer(self, question_id, query, data):
+        question = self.teacher.catalog.get_question(question_id)
+        if question is None:
+            raise ServiceError(404, f"Question {question_id} not found")
+        for field in ("student_name", "answer"):
+            if not isinstance(data.get(field), str) or not data[field].strip():
+                raise ServiceError(400, f"'{field}' is required")
+
+        submission = self.student.submit(question, data['student_name'], data['answer'])
+        # 202 Accepted while grading is still pending
+        return (201 if submission['status'] == 'graded' else 202), submission
+
+    def get_submission(self, submission_id, query, data):
+        submission = self.student.repository.get_submission(submission_id)
+        if submission is None:
+            raise ServiceError(404, f"Submission {submission_id} not found")
+        return 200, submission
+
+    def list_student_submissions(self, student_name, query, data):
+        offset, limit = self._page(query)
+        # Fetch one extra row to know whether another page exists
+        submissions = self.student.repository.list_student_submissions(student_name, offset, limit + 1)
+        return 200, self._page_payload(submissions[:limit], offset, limit, len(submissions) > limit)
+
+    def _page(self, query):
+        try:
+            offset = int(query.get("offset", 0))
+            limit = int(query.get("limit", 50))
+        except ValueError:
+            raise ServiceError(400, "'offset' and 'limit' must be integers")
+        if offset < 0 or not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ServiceError(400, f"'offset' must be >= 0 and 'limit' between 1 and {MAX_PAGE_SIZE}")
+        return offset, limit
+
+    def _page_payload(self, items, offset, limit, has_more):
+        return {"items": items, "offset": offset, "limit": limit, "next_offset": offset + limit if has_more else None}
+
+
+def create_asgi_app(service=None):
+    """Return an ASGI application serving the grader API.
+
+    Storage and LLM work is blocking, so each request runs on the event loop's
+    thread pool while the loop keeps accepting other requests.
+    """
+    service = service or GraderService()
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        status, payload = await asyncio.get_running_loop().run_in_executor(
+            None, service.dispatch, scope["method"], scope["path"], scope["query_string"].decode("latin-1"), body
+        )
+        response = json.dumps(payload).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(response)).encode())]
+        })
+        await send({"type": "http.response.body", "body": response})
+
+    return app
+
+
+def create_http_server(host, port, service=None):
+    """Return a standard-library threaded HTTP server for the grader API
+    (used when no ASGI server is installed)."""
+    service = service or GraderService()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately; without TCP_NODELAY a
+        # keep-alive client waits on a delayed ACK for every response
+        disable_nagle_algorithm = True
+
+        def _handle(self):
+            path, _, query_string = self.path.partition("?")
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+
+            status, payload = service.dispatch(self.command, path, query_string, body)
+            response = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        do_GET = _handle
+        do_POST = _handle
+
+        def log_message(self, format, *args):
+            # Keep the console quiet under load
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the grader API over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--stdlib", action="store_true", help="Use the built-in threaded server even if uvicorn is installed")
+    args = parser.parse_args()
+
+    try:
+        if args.stdlib:
+            raise ImportError
+        import uvicorn
+    except ImportError:
+        server = create_http_server(args.host, args.port)
+        print(f"Serving grader API on http://{args.host}:{args.port} (threaded server)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+        return
+
+    print(f"Serving grader API on http://{args.host}:{args.port} (uvicorn)")
+    uvicorn.run(create_asgi_app(), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
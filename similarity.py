@@ -0,0 +1,315 @@
+import os
+import re
+import random
+import hashlib
+import threading
+from datetime import datetime
+from dotenv import load_dotenv
+from repository import get_repository
+from metrics import metrics
+
+MERSENNE_PRIME = (1 << 61) - 1
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# What a reused grade copies from the submission it came from
+GRADE_FIELDS = ('evaluation', 'score', 'criteria_scores', 'grading_version', 'grading_model')
+
+# Grades from demo mode and local triage (see LLMEvaluator.model_id and
+# LOCAL_MODEL_ID) are never passed on to other answers
+NOT_REUSED_MODELS = ("simulated", "local")
+
+def shingles(text, size=3):
+    """Return the set of overlapping word n-grams of a text, ignoring case and
+    punctuation. Texts shorter than size words give a single shingle."""
+    words = TOKEN_PATTERN.findall(text.casefold())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash signatures over shingle sets.
+
+    The fraction of positions where two signatures agree estimates the
+    Jaccard similarity of the sets. Signatures are split into bands so that
+    similar answers share at least one band key with high probability
+    (locality-sensitive hashing).
+    """
+
+    def __init__(self, num_perm=64, bands=16, seed=1):
+        rng = random.Random(seed)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)
+        ]
+
+    def signature(self, shingle_set):
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+            for shingle in shingle_set
+        ]
+        return tuple(
+            min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self.permutations
+        )
+
+    def band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+
+class SimilarityIndex:
+    """Near-duplicate lookup over the answers to one question."""
+
+    def __init__(self, hasher):
+        self.hasher = hasher
+        self.buckets = {}
+        self.entries = {}
+
+    def add(self, submission_id, text, student_name):
+        shingle_set = shingles(text)
+        if not shingle_set:
+            return
+        if submission_id in self.entries:
+            # Answers never change, so an existing entry is still correct
+            return
+
+        signature = self.hasher.signature(shingle_set)
+        self.entries[submission_id] = (shingle_set, student_name.casefold(), student_name)
+        for key in self.hasher.band_keys(signature):
+            self.buckets.setdefault(key, []).append(submission_id)
+
+    def query(self, text, threshold):
+        """Return [(submission_id, similarity)] for indexed answers at least
+        threshold similar to text, most similar first.
+
+        MinHash only picks the candidates; similarity is the exact Jaccard
+        index of the shingle sets.
+        """
+        shingle_set = shingles(text)
+        if not shingle_set:
+            return []
+
+        candidates = set()
+        for key in self.hasher.band_keys(self.hasher.signature(shingle_set)):
+            candidates.update(self.buckets.get(key, ()))
+
+        matches = []
+        for submission_id in candidates:
+            similarity = jaccard(shingle_set, self.entries[submission_id][0])
+            if similarity >= threshold:
+                matches.append((submission_id, similarity))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches
+
+    def pairs(self, threshold):
+        """Yield (id_a, id_b, similarity) for every pair of indexed answers
+        at least threshold similar."""
+        seen = set()
+        for bucket in self.buckets.values():
+            for i, a in enumerate(bucket):
+                for b in bucket[i + 1:]:
+                    pair = (a, b) if a < b else (b, a)
+                    if pair in seen:
+                        continue
+                    seen.add(pair)
+                    similarity = jaccard(self.entries[a][0], self.entries[b][0])
+                    if similarity >= threshold:
+                        yield pair[0], pair[1], similarity
+
+
+class DuplicateDetector:
+    """Finds near-identical answers to the same question.
+
+    Answers at least reuse_threshold similar to an already graded answer get
+    its grade instead of another LLM call. Answers at least copy_threshold
+    similar to another student's answer show up in copy_report().
+
+    Indexes are built per question from the repository on first use and
+    then kept up to date by record(). Submissions saved by other processes
+    are picked up when refresh() is called, and by copy_report().
+    """
+
+    # Short answers ("Paris", "F = ma") match by nature, not by copying
+    MIN_COPY_SHINGLES = 5
+
+    def __init__(self, repository, reuse_threshold=0.9, copy_threshold=0.8, reuse=True):
+        self.repository = repository
+        self.reuse_threshold = reuse_threshold
+        self.copy_threshold = copy_threshold
+        self.reuse = reuse
+        self.hasher = MinHasher()
+        self.indexes = {}
+        self.graded = {}
+        self.lock = threading.Lock()
+
+    def _index(self, question_id, rebuild=False):
+        """Return a question's index, reading its answers from the repository
+        on first use or when rebuild is set. Call with the lock held."""
+        index = self.indexes.get(question_id)
+        if index is None or rebuild:
+            index = self.indexes[question_id] = SimilarityIndex(self.hasher)
+            with metrics.span("grader_duplicate_index_refresh_seconds"):
+                for submission in self.repository.iter_submissions(question_id):
+                    self._add(index, submission)
+        return index
+
+    def _add(self, index, submission):
+        index.add(submission['id'], submission['answer'], submission['student_name'])
+        if self.reusable(submission):
+            self.graded[submission['id']] = {key: submission.get(key) for key in GRADE_FIELDS}
+        else:
+            # A regrade may have replaced an LLM grade
+            self.graded.pop(submission['id'], None)
+
+    @staticmethod
+    def reusable(submission):
+        """Whether a submission's grade may be given to near-identical answers.
+
+        Only grades an LLM gave the answer itself are reused: not copies of
+        other grades, so they cannot drift, and not demo, locally triaged or
+        unattributed grades from before grading_model was recorded.
+        """
+        model = submission.get('grading_model')
+        return ('score' in submission and not submission.get('duplicate_of')
+                and model is not None and model not in NOT_REUSED_MODELS)
+
+    def record(self, submission):
+        """Add a saved submission (graded or not) to its question's index.
+
+        Questions whose index has not been built yet are skipped; the
+        submission is read from the repository when it is.
+        """
+        with self.lock:
+            index = self.indexes.get(submission['question_id'])
+            if index is not None:
+                self._add(index, submission)
+
+    def refresh(self, question_id=None):
+        """Forget the index of one question, or of all of them, so it is read
+        again from the repository on next use, picking up submissions saved by
+        other processes."""
+        with self.lock:
+            if question_id is None:
+                self.indexes.clear()
+                self.graded.clear()
+            else:
+                index = self.indexes.pop(question_id, None)
+                for submission_id in index.entries if index else ():
+                    self.graded.pop(submission_id, None)
+
+    def find_duplicates(self, submission):
+        """Return [(submission_id, similarity)] for other answers to the same
+        question at least reuse_threshold similar, most similar first."""
+        with self.lock:
+            index = self._index(submission['question_id'])
+            return [
+                match for match in index.query(submission['answer'], self.reuse_threshold)
+                if match[0] != submission['id']
+            ]
+
+    def graded_result(self, submission_id):
+        """Return the grade ({field: value} for GRADE_FIELDS) of a graded submission
+        the index knows, or None."""
+        with self.lock:
+            return self.graded.get(submission_id)
+
+    def apply_grade(self, submission, source_id, similarity):
+        """Give a submission the grade of a near-identical graded one.
+
+        The grading version and model are the source's, since that is how the
+        grade was made; graded_at is when it was reused.
+        """
+        submission.pop('criteria_scores', None)
+        for key, value in self.graded_result(source_id).items():
+            if value is not None:
+                submission[key] = value
+        submission['status'] = 'graded'
+        submission['graded_at'] = datetime.now().isoformat()
+        submission['duplicate_of'] = source_id
+        submission['similarity'] = round(similarity, 3)
+        metrics.inc("grader_duplicate_grades_reused_total")
+
+    def reuse_grade(self, submission):
+        """Grade a submission from its closest graded near-duplicate.
+
+        Returns:
+            bool: True if a grade was reused, False if it still needs the LLM
+        """
+        if not self.reuse:
+            return False
+        for source_id, similarity in self.find_duplicates(submission):
+            if self.graded_result(source_id) is not None:
+                self.apply_grade(submission, source_id, similarity)
+                return True
+        return False
+
+    def copy_report(self, question_id):
+        """Group answers from different students that are at least
+        copy_threshold similar.
+
+        Returns:
+            list: Clusters as dicts with 'submission_ids', 'students' and the
+                highest pairwise 'similarity', largest clusters first
+        """
+        with self.lock:
+            index = self._index(question_id, rebuild=True)
+            parent = {}
+
+            def find(submission_id):
+                while parent.get(submission_id, submission_id) != submission_id:
+                    submission_id = parent[submission_id]
+                return submission_id
+
+            best = {}
+            for a, b, similarity in index.pairs(self.copy_threshold):
+                shingles_a, student_a, _ = index.entries[a]
+                shingles_b, student_b, _ = index.entries[b]
+                if student_a == student_b or min(len(shingles_a), len(shingles_b)) < self.MIN_COPY_SHINGLES:
+                    continue
+                root_a, root_b = find(a), find(b)
+                if root_a != root_b:
+                    parent[root_b] = root_a
+                best[a] = max(best.get(a, 0), similarity)
+                best[b] = max(best.get(b, 0), similarity)
+
+            clusters = {}
+            for submission_id in best:
+                clusters.setdefault(find(submission_id), []).append(submission_id)
+
+            report = []
+            for members in clusters.values():
+                members.sort()
+                report.append({
+                    "submission_ids": members,
+                    "students": sorted({index.entries[member][2] for member in members}),
+                    "similarity": round(max(best[member] for member in members), 3)
+                })
+        report.sort(key=lambda cluster: (-len(cluster['submission_ids']), -cluster['similarity']))
+        return report
+
+
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+def get_duplicate_detector(repository=None):
+    """Return the shared detector for a repository, configured by
+    GRADER_DUPLICATE_THRESHOLD, GRADER_COPY_THRESHOLD and GRADER_DUPLICATE_REUSE."""
+    repository = repository or get_repository()
+    with _detectors_lock:
+        detector = _detectors.get(id(repository))
+        if detector is None:
+            load_dotenv()
+            detector = DuplicateDetector(
+                repository,
+                reuse_threshold=float(os.getenv("GRADER_DUPLICATE_THRESHOLD", "0.9")),
+                copy_threshold=float(os.getenv("GRADER_COPY_THRESHOLD", "0.8")),
+                reuse=os.getenv("GRADER_DUPLICATE_REUSE", "1").lower() not in ("0", "false", "no")
+            )
+            _detectors[id(repository)] = detector
+        return detector
@@ -0,0 +1,111 @@
+import re
+
+EVALUATION_MARKER = "EVALUATION:"
+SCORE_MARKER = "SCORE:"
+SCORE_PATTERN = re.compile(r'\d+')
+
+class EvaluationStreamParser:
+    """Incremental parser for streamed EVALUATION:/SCORE: responses.
+
+    Chunks are fed in as they arrive. feed() returns the part of the
+    evaluation that became displayable, so it can be shown while the model is
+    still writing, and score is set as soon as the number after SCORE: is
+    complete. Each character is scanned a bounded number of times, however
+    the response is split into chunks.
+
+    Usage:
+        parser = EvaluationStreamParser()
+        for chunk in chunks:
+            print(parser.feed(chunk), end="")
+            if parser.score is not None:
+                break
+        parser.close()
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.buffer = ""
+        self.chars = 0
+        self.state = "preamble"
+        self.evaluation_parts = []
+        self.score = None
+
+    @property
+    def text(self):
+        """Everything received so far."""
+        return "".join(self.parts) + self.buffer if self.parts else self.buffer
+
+    @property
+    def evaluation(self):
+        return "".join(self.evaluation_parts).strip()
+
+    def feed(self, chunk):
+        """Add a chunk of the response.
+
+        Returns:
+            str: Newly available evaluation text (may be empty)
+        """
+        self.chars += len(chunk)
+        self.buffer += chunk
+        shown = []
+
+        if self.state == "preamble":
+            start = self.buffer.find(EVALUATION_MARKER)
+            if start < 0:
+                self._keep_tail(len(EVALUATION_MARKER) - 1)
+                return ""
+            self._consume(start + len(EVALUATION_MARKER))
+            self.state = "evaluation"
+            # Drop the space after the marker, even when it arrives in the next chunk
+            self.buffer = self.buffer.lstrip()
+
+        if self.state == "evaluation":
+            if not self.evaluation_parts:
+                self.buffer = self.buffer.lstrip()
+            end = self.buffer.find(SCORE_MARKER)
+            if end < 0:
+                # A chunk may end part way through "SCORE:", so hold those characters back
+                visible = len(self.buffer) - (len(SCORE_MARKER) - 1)
+                if visible > 0:
+                    shown.append(self.buffer[:visible])
+                    self._consume(visible)
+            else:
+                shown.append(self.buffer[:end].rstrip())
+                self._consume(end + len(SCORE_MARKER))
+                self.state = "score"
+            self.evaluation_parts.extend(shown)
+
+        if self.state == "score":
+            match = SCORE_PATTERN.search(self.buffer)
+            # The number is complete once something other than a digit follows it
+            if match and match.end() < len(self.buffer):
+                self.score = int(match.group())
+                self.state = "done"
+
+        return "".join(shown)
+
+    def close(self):
+        """Mark the end of the response; a score at the very end is now complete.
+
+        Returns:
+            str: Evaluation text that was held back (may be empty)
+        """
+        shown = ""
+        if self.state == "evaluation":
+            shown = self.buffer.rstrip()
+            self.evaluation_parts.append(shown)
+            self._consume(len(self.buffer))
+        elif self.state == "score":
+            match = SCORE_PATTERN.search(self.buffer)
+            if match:
+                self.score = int(match.group())
+                self.state = "done"
+        return shown
+
+    def _consume(self, count):
+        self.parts.append(self.buffer[:count])
+        self.buffer = self.buffer[count:]
+
+    def _keep_tail(self, count):
+        if len(self.buffer) > count:
+            self._consume(len(self.buffer) - count)
@@ -1,36 +1,47 @@
-import os
-import json
 import uuid
 from datetime import datetime
-from llm_evaluator import LLMEvaluator
+from llm_evaluator import get_evaluator
+from repository import get_repository
+from question_catalog import get_question_catalog
+from grading_queue import async_grading_enabled, get_grading_queue, start_background_workers
+from resilience import GradingUnavailableError
+from similarity import get_duplicate_detector
+from search_index import get_search_index
 
 class Student:
-    def __init__(self):
-        self.questions_dir = "data/questions"
-        self.submissions_dir = "data/submissions"
-        self.evaluator = LLMEvaluator()
+    def __init__(self, repository=None, evaluator=None):
+        self.repository = repository or get_repository()
+        self.catalog = get_question_catalog(self.repository)
+        self.evaluator = evaluator or get_evaluator()
+        self.grading_queue = get_grading_queue()
+        self.duplicates = get_duplicate_detector(self.repository)
+        self.search = get_search_index()
+        
+        # Grade queued submissions in the background while the menu is in use,
+        # including any left queued when synchronous grading failed
+        if async_grading_enabled() or self.grading_queue.outstanding():
+            start_background_workers(self.repository, self.evaluator)
     
     def menu(self):
-        print("\n===== Student Mode =====")
-        print("1. View available questions")
-        print("2. Submit an answer")
-        print("3. View my submissions")
-        print("4. Return to main menu")
-        
-        choice = input("\nSelect option: ")
-        
-        if choice == "1":
-            self.view_available_questions()
-        elif choice == "2":
-            self.submit_answer()
-        elif choice == "3":
-            self.view_my_submissions()
-        elif choice == "4":
-            return
-        else:
-            print("Invalid choice. Please try again.")
-        
-        self.menu()
+        while True:
+            print("\n===== Student Mode =====")
+            print("1. View available questions")
+            print("2. Submit an answer")
+            print("3. View my submissions")
+            print("4. Return to main menu")
+            
+            choice = input("\nSelect option: ")
+            
+            if choice == "1":
+                self.view_available_questions()
+            elif choice == "2":
+                self.submit_answer()
+            elif choice == "3":
+                self.view_my_submissions()
+            elif choice == "4":
+                return
+            else:
+                print("Invalid choice. Please try again.")
     
     def view_available_questions(self):
         print("\n===== Available Questions =====")
@@ -77,6 +88,65 @@ class Student:
         
         answer = "\n".join(answer_lines)
         
+        if async_grading_enabled():
+            self.submit(question, student_name, answer)
+            print("\nYour answer has been submitted! It is being evaluated in the background.")
+            print("Check 'View my submissions' for your evaluation and score.")
+            input("\nPress Enter to continue...")
+            return
+        
+        # Evaluate the answer using LLM, showing the evaluation as it is written
+        print("\nEvaluating your answer...")
+        streamed = []
+        
+        def show(text):
+            if text is None:
+                print("\n\n(The connection was interrupted. Evaluating again...)")
+                streamed.clear()
+                return
+            if not streamed:
+                print("\nEvaluation:")
+            streamed.append(text)
+            print(text, end="", flush=True)
+        
+        def report(error):
+            print(f"\nError during LLM evaluation: {error}")
+        
+        submission = self.submit(question, student_name, answer, grade_now=True, on_text=show, on_error=report)
+        if streamed:
+            print()
+        
+        if submission['status'] == 'pending':
+            print("Your answer has been saved and will be evaluated once the grading service is available.")
+        else:
+            print("\nYour answer has been submitted and evaluated!")
+            if not streamed:
+                print(f"Evaluation:\n{submission['evaluation']}")
+            print(f"Score: {submission['score']}")
+        
+        input("\nPress Enter to continue...")
+    
+    def submit(self, question, student_name, answer, grade_now=None, on_text=None, on_error=None):
+        """Save a student's answer and grade it, now or in the background.
+        
+        Args:
+            question (dict): The question being answered
+            student_name (str): The student's name
+            answer (str): The student's answer
+            grade_now (bool, optional): Grade before returning instead of queueing.
+                Defaults to the opposite of the GRADER_ASYNC_GRADING setting.
+            on_text (callable, optional): Receives the evaluation text as it is
+                streamed (see LLMEvaluator.evaluate_answer)
+            on_error (callable, optional): Receives the GradingUnavailableError
+                when grading now fails and the answer is queued instead
+            
+        Returns:
+            dict: The saved submission, with status 'graded', or 'pending' if it
+                was queued (also the case when the LLM is unavailable)
+        """
+        if grade_now is None:
+            grade_now = not async_grading_enabled()
+        
         # Create submission
         submission_id = str(uuid.uuid4())[:8]
         submission = {
@@ -87,30 +157,43 @@ class Student:
             "submitted_at": datetime.now().isoformat()
         }
         
-        # Evaluate the answer using LLM
-        print("\nEvaluating your answer...")
-        evaluation, score = self.evaluator.evaluate_answer(
-            question['question'],
-            answer,
-            question.get('expected_answer', ''),
-            question.get('grading_criteria', '')
-        )
-        
-        submission['evaluation'] = evaluation
-        submission['score'] = score
-        
-        # Save submission
-        submission_dir = f"{self.submissions_dir}/{question['id']}"
-        os.makedirs(submission_dir, exist_ok=True)
+        if grade_now and self.duplicates.reuse_grade(submission):
+            # A near-identical answer was already graded; no LLM call needed
+            self._save(submission)
+            return submission
         
-        with open(f"{submission_dir}/{submission_id}.json", 'w') as f:
-            json.dump(submission, f, indent=4)
+        if grade_now:
+            try:
+                evaluation, score, criteria_scores, graded_by = self.evaluator.evaluate_answer(
+                    question['question'],
+                    answer,
+                    question.get('expected_answer', ''),
+                    question.get('grading_criteria', ''),
+                    on_text=on_text,
+                    details=True,
+                    usage=(question['id'], question.get('teacher', ''))
+                )
+                self.evaluator.record_grade(submission, question, evaluation, score, criteria_scores, graded_by)
+                self._save(submission)
+                return submission
+            except GradingUnavailableError as e:
+                # Keep the answer and grade it later rather than inventing a score
+                if on_error:
+                    on_error(e)
         
-        print("\nYour answer has been submitted and evaluated!")
-        print(f"Evaluation:\n{evaluation}")
-        print(f"Score: {score}")
-        
-        input("\nPress Enter to continue...")
+        # Save immediately and let the background workers grade it
+        submission['status'] = 'pending'
+        self._save(submission)
+        self.grading_queue.enqueue(submission_id)
+        if grade_now:
+            # With synchronous grading nothing else would pick the job up
+            start_background_workers(self.repository, self.evaluator)
+        return submission
+    
+    def _save(self, submission):
+        self.repository.save_submission(submission)
+        self.duplicates.record(submission)
+        self.search.add_submission(submission)
     
     def submit_answer(self):
         print("\n===== Submit Answer =====")
@@ -132,26 +215,8 @@ class Student:
         print("\n===== My Submissions =====")
         student_name = input("Your name: ")
         
-        all_submissions = []
-        
-        # Search through all question directories for submissions by this student
-        if os.path.exists(self.submissions_dir):
-            for question_dir in os.listdir(self.submissions_dir):
-                question_submissions_dir = f"{self.submissions_dir}/{question_dir}"
-                if os.path.isdir(question_submissions_dir):
-                    for filename in os.listdir(question_submissions_dir):
-                        if filename.endswith('.json'):
-                            with open(f"{question_submissions_dir}/{filename}", 'r') as f:
-                                submission = json.load(f)
-                                if submission['student_name'].lower() == student_name.lower():
-                                    # Get question details
-                                    question_file = f"{self.questions_dir}/{submission['question_id']}.json"
-                                    if os.path.exists(question_file):
-                                        with open(question_file, 'r') as qf:
-                                            question = json.load(qf)
-                                            submission['question_text'] = question['question']
-                                            submission['subject'] = question['subject']
-                                    all_submissions.append(submission)
+        # Submissions come back annotated with their question text and subject
+        all_submissions = self.repository.list_student_submissions(student_name)
         
         if not all_submissions:
             print(f"\nNo submissions found for student: {student_name}")
@@ -162,7 +227,7 @@ class Student:
         for i, sub in enumerate(all_submissions, 1):
             subject = sub.get('subject', 'Unknown')
             question_preview = sub.get('question_text', 'Unknown')[:30]
-            print(f"{i}. {subject} - {question_preview}... Score: {sub.get('score', 'Not graded')}")
+            print(f"{i}. {subject} - {question_preview}... Score: {sub.get('score', sub.get('status', 'Not graded').capitalize())}")
         
         choice = input("\nEnter number to view submission details (or press Enter to go back): ")
         if choice.isdigit() and 1 <= int(choice) <= len(all_submissions):
@@ -172,16 +237,16 @@ class Student:
         print(f"\n===== Submission Details =====")
         print(f"Student: {submission['student_name']}")
         print(f"Submitted: {submission['submitted_at']}")
+        if 'status' in submission:
+            print(f"Status: {submission['status'].capitalize()}")
         
         # Get question details if available
         if 'question_text' in submission:
             print(f"\nQuestion: {submission['question_text']}")
         else:
-            question_file = f"{self.questions_dir}/{submission['question_id']}.json"
-            if os.path.exists(question_file):
-                with open(question_file, 'r') as f:
-                    question = json.load(f)
-                    print(f"\nQuestion: {question['question']}")
+            question = self.catalog.get_question(submission['question_id'])
+            if question:
+                print(f"\nQuestion: {question['question']}")
         
         print(f"\nYour Answer:\n{submission['answer']}")
         
@@ -194,10 +259,4 @@ class Student:
         input("\nPress Enter to continue...")
     
     def get_all_questions(self):
-        questions = []
-        if os.path.exists(self.questions_dir):
-            for filename in os.listdir(self.questions_dir):
-                if filename.endswith('.json'):
-                    with open(f"{self.questions_dir}/{filename}", 'r') as f:
-                        questions.append(json.load(f))
-        return questions
\ No newline at end of file
+        return self.catalog.list_questions()
\ No newline at end of file
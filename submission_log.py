@@ -0,0 +1,457 @@
+import os
+import json
+import mmap
+import argparse
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # No cross-process locking on Windows; one writing process at a time there
+    fcntl = None
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+INDEX_SUFFIX = ".idx"
+
+class SubmissionLog:
+    """Append-only submission storage in numbered JSONL segments.
+
+    Every save appends the full submission as one line to the active
+    segment, so intake is sequential I/O and a crash can at most leave a
+    torn last line, which is cut off when the log is next opened. The latest
+    line for an ID wins. Once the active segment passes segment_bytes it is
+    fsynced, its offset index is written next to it and a new segment is
+    started. Sealed segments never change except through compact(), and
+    are read through mmap.
+
+    An in-memory index maps each submission ID to its segment, offset and
+    length, and question IDs and (casefolded) student names to their
+    submission IDs. Changes made by other processes (the grading worker, for
+    example) are picked up before every read.
+
+    With fsync enabled, concurrent appends share fsync calls: a writer that
+    finds its line already covered by another thread's fsync returns
+    without syncing again.
+    """
+
+    def __init__(self, directory="data/submission_log", segment_bytes=64 * 1024 * 1024, fsync=True):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+        self.lock = threading.RLock()
+        self.sync_lock = threading.Lock()
+        self.lock_fd = os.open(os.path.join(directory, "LOCK"), os.O_RDWR | os.O_CREAT, 0o644)
+        self.written = 0
+        self.synced = 0
+
+        self.active = None
+        self.active_fd = None
+        self.active_reader = None
+        self.maps = {}
+        self._reset_index()
+
+        with self.lock, self._file_lock():
+            self._load(recover=True)
+
+    def _reset_index(self):
+        # segment number -> (inode, bytes indexed so far)
+        self.segments = {}
+        self.locations = {}
+        self.meta = {}
+        self.by_question = {}
+        self.by_student = {}
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self.lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+
+    def _segment_path(self, number, suffix=SEGMENT_SUFFIX):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:06d}{suffix}")
+
+    def _list_segments(self):
+        segments = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                    number = name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+                    if number.isdigit():
+                        stat = entry.stat()
+                        segments[int(number)] = (stat.st_ino, stat.st_size)
+        return segments
+
+    def _load(self, recover=False):
+        """Rebuild the index from scratch. With recover=True (and the file lock
+        held) a torn line at the end of the active segment is truncated."""
+        self._close_files()
+        self._reset_index()
+
+        on_disk = self._list_segments()
+        if not on_disk:
+            with open(self._segment_path(1), "ab"):
+                pass
+            self._fsync_directory()
+            on_disk = self._list_segments()
+
+        last = max(on_disk)
+        for number in sorted(on_disk):
+            inode, size = on_disk[number]
+            indexed = self._load_index_file(number, size) if number != last else 0
+            if indexed != size:
+                indexed = self._scan(number, indexed, size)
+            if recover and number == last and indexed < size:
+                print(f"Warning: truncating {size - indexed} bytes of an incomplete write in segment {number}")
+                os.truncate(self._segment_path(number), indexed)
+            self.segments[number] = (inode, indexed)
+
+        self._open_active(last)
+
+    def _refresh(self):
+        """Index records appended or segments rotated by other processes."""
+        on_disk = self._list_segments()
+        for number, (inode, _) in self.segments.items():
+            if number not in on_disk or on_disk[number][0] != inode:
+                # A segment was compacted or removed elsewhere; offsets are stale
+                self._load()
+                return
+
+        for number in sorted(on_disk):
+            inode, size = on_disk[number]
+            indexed = self.segments.get(number, (inode, 0))[1]
+            if size > indexed:
+                indexed = self._scan(number, indexed, size)
+            self.segments[number] = (inode, indexed)
+
+        last = max(on_disk)
+        if last != self.active:
+            self._open_active(last)
+
+    def _open_active(self, number):
+        if self.active_fd is not None:
+            os.close(self.active_fd)
+            self.active_reader.close()
+        self.active = number
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        self.active_fd = os.open(self._segment_path(number), flags, 0o644)
+        self.active_reader = open(self._segment_path(number), "rb")
+
+    def _close_files(self):
+        for segment_map in self.maps.values():
+            segment_map.close()
+        self.maps = {}
+        if self.active_fd is not None:
+            os.close(self.active_fd)
+            self.active_reader.close()
+            self.active_fd = None
+            self.active_reader = None
+
+    def _scan(self, number, start, size):
+        """Index complete lines of a segment from byte start. Returns the
+        offset just past the last complete line."""
+        with open(self._segment_path(number), "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            position = start
+            while position < size:
+                end = data.find(b"\n", position, size)
+                if end == -1:
+                    # Still being written by another process, or torn by a crash
+                    break
+                try:
+                    record = json.loads(data[position:end])
+                    self._index(record, number, position, end - position)
+                except ValueError:
+                    print(f"Warning: skipping unreadable record at byte {position} of segment {number}")
+                position = end + 1
+            return position
+        finally:
+            data.close()
+
+    def _index(self, record, number, offset, length):
+        meta = (record['question_id'], record['student_name'].casefold(),
+                record.get('submitted_at') or "", 'score' in record)
+        self._index_entry(record['id'], meta, number, offset, length)
+
+    def _index_entry(self, submission_id, meta, number, offset, length):
+        previous = self.meta.get(submission_id)
+        if previous and previous[:2] != meta[:2]:
+            self.by_question.get(previous[0], {}).pop(submission_id, None)
+            self.by_student.get(previous[1], {}).pop(submission_id, None)
+
+        self.locations[submission_id] = (number, offset, length)
+        self.meta[submission_id] = meta
+        # Dicts keep insertion order and double as ordered sets
+        self.by_question.setdefault(meta[0], {})[submission_id] = None
+        self.by_student.setdefault(meta[1], {})[submission_id] = None
+
+    def _load_index_file(self, number, size):
+        """Load the saved index of a sealed segment. Returns how many bytes it
+        covers, or 0 if it is missing or does not match the segment."""
+        try:
+            with open(self._segment_path(number, INDEX_SUFFIX), "r") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if saved.get("size") != size:
+            return 0
+
+        for submission_id, offset, length, *meta in saved["entries"]:
+            self._index_entry(submission_id, tuple(meta), number, offset, length)
+        return size
+
+    def _write_index_file(self, number, size):
+        entries = [
+            [submission_id, offset, length, *self.meta[submission_id]]
+            for submission_id, (segment, offset, length) in self.locations.items()
+            if segment == number
+        ]
+        entries.sort(key=lambda entry: entry[1])
+        self._write_atomic(self._segment_path(number, INDEX_SUFFIX),
+                           json.dumps({"size": size, "entries": entries}).encode("utf-8"))
+
+    def _write_atomic(self, path, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _fsync_directory(self):
+        # Makes renames and new files durable; directories cannot be opened on Windows
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _rotate(self):
+        """Seal the active segment and start the next one."""
+        size = self.segments[self.active][1]
+        os.fsync(self.active_fd)
+        self.synced = max(self.synced, self.written)
+        self._write_index_file(self.active, size)
+
+        number = self.active + 1
+        with open(self._segment_path(number), "xb"):
+            pass
+        self._fsync_directory()
+        self.segments[number] = (os.stat(self._segment_path(number)).st_ino, 0)
+        self._open_active(number)
+
+    def append(self, records):
+        """Append submission dicts. Returns once they are written and, if
+        fsync is enabled, on disk."""
+        encoded = [json.dumps(record, separators=(",", ":")).encode("utf-8") for record in records]
+        if not encoded:
+            return
+        lines = b"\n".join(encoded) + b"\n"
+
+        with self.lock, self._file_lock():
+            self._refresh()
+            inode, offset = self.segments[self.active]
+            # Records go at the real end of the file. Anything past the indexed
+            # size is a line a writer never finished (appends hold the file
+            # lock), which would otherwise run into the first new line
+            size = os.fstat(self.active_fd).st_size
+            if size > offset:
+                print(f"Warning: truncating {size - offset} bytes of an incomplete write in segment {self.active}")
+                os.ftruncate(self.active_fd, offset)
+            if offset and offset + len(lines) > self.segment_bytes:
+                self._rotate()
+                inode, offset = self.segments[self.active]
+
+            view = memoryview(lines)
+            while view:
+                view = view[os.write(self.active_fd, view):]
+
+            for record, line in zip(records, encoded):
+                self._index(record, self.active, offset, len(line))
+                offset += len(line) + 1
+            self.segments[self.active] = (inode, offset)
+            self.written += 1
+            sequence = self.written
+
+        if self.fsync:
+            self._sync(sequence)
+
+    def _sync(self, sequence):
+        with self.sync_lock:
+            if self.synced >= sequence:
+                # Another thread's fsync already covered this write
+                return
+            with self.lock:
+                target = self.written
+                fd = os.dup(self.active_fd)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self.synced = max(self.synced, target)
+
+    def _read(self, location):
+        number, offset, length = location
+        if number == self.active:
+            self.active_reader.seek(offset)
+            return self.active_reader.read(length)
+
+        segment_map = self.maps.get(number)
+        if segment_map is None:
+            with open(self._segment_path(number), "rb") as f:
+                segment_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.maps[number] = segment_map
+        return segment_map[offset:offset + length]
+
+    def get(self, submission_id):
+        """Return the latest version of a submission, or None."""
+        with self.lock:
+            self._refresh()
+            location = self.locations.get(submission_id)
+            if location is None:
+                return None
+            data = self._read(location)
+        return json.loads(data)
+
+    def read(self, submission_ids):
+        """Return the latest versions of several submissions, in the given order."""
+        with self.lock:
+            self._refresh()
+            raw = [self._read(self.locations[submission_id]) for submission_id in submission_ids
+                   if submission_id in self.locations]
+        return [json.loads(data) for data in raw]
+
+    def select(self, question_id=None, student_key=None, graded=None):
+        """Return submission IDs matching the filters from the index alone,
+        ordered by question and submission time (or just submission time
+        when filtering by question or student)."""
+        with self.lock:
+            self._refresh()
+            if question_id is not None:
+                candidates = list(self.by_question.get(question_id, ()))
+            elif student_key is not None:
+                candidates = list(self.by_student.get(student_key, ()))
+            else:
+                candidates = list(self.meta)
+            meta = self.meta
+
+            selected = [
+                submission_id for submission_id in candidates
+                if (graded is None or meta[submission_id][3] == graded)
+                and (student_key is None or meta[submission_id][1] == student_key)
+            ]
+            if question_id is None and student_key is None:
+                selected.sort(key=lambda submission_id: meta[submission_id][0::2])
+            else:
+                selected.sort(key=lambda submission_id: meta[submission_id][2])
+        return selected
+
+    def compact(self):
+        """Rewrite sealed segments without superseded versions of submissions.
+
+        Each segment is replaced atomically, so a crash leaves either the old
+        or the new file. The active segment is left alone.
+
+        Returns:
+            tuple: (segments_rewritten, bytes_reclaimed)
+        """
+        rewritten = 0
+        reclaimed = 0
+        with self.lock:
+            self._refresh()
+            sealed = sorted(number for number in self.segments if number != self.active)
+
+        for number in sealed:
+            with self.lock, self._file_lock():
+                self._refresh()
+                if number not in self.segments or number == self.active:
+                    continue
+                old_size = self.segments[number][1]
+                live = sorted(
+                    (offset, length, submission_id)
+                    for submission_id, (segment, offset, length) in self.locations.items()
+                    if segment == number
+                )
+                new_size = sum(length + 1 for _, length, _ in live)
+                if new_size == old_size:
+                    continue
+
+                path = self._segment_path(number)
+                if live:
+                    lines = []
+                    position = 0
+                    for offset, length, submission_id in live:
+                        lines.append(self._read((number, offset, length)))
+                        self.locations[submission_id] = (number, position, length)
+                        position += length + 1
+                    lines.append(b"")
+                    self._write_atomic(path, b"\n".join(lines))
+
+                # Readers hold the lock, so the old mapping can go now
+                segment_map = self.maps.pop(number, None)
+                if segment_map is not None:
+                    segment_map.close()
+
+                if live:
+                    self._fsync_directory()
+                    self.segments[number] = (os.stat(path).st_ino, new_size)
+                    self._write_index_file(number, new_size)
+                else:
+                    os.remove(path)
+                    if os.path.exists(self._segment_path(number, INDEX_SUFFIX)):
+                        os.remove(self._segment_path(number, INDEX_SUFFIX))
+                    self._fsync_directory()
+                    del self.segments[number]
+
+                rewritten += 1
+                reclaimed += old_size - new_size
+        return rewritten, reclaimed
+
+    def stats(self):
+        """Return the number of segments, live submissions and bytes on disk."""
+        with self.lock:
+            self._refresh()
+            return {
+                "segments": len(self.segments),
+                "submissions": len(self.locations),
+                "bytes": sum(size for _, size in self.segments.values()),
+                "live_bytes": sum(length + 1 for _, _, length in self.locations.values())
+            }
+
+    def close(self):
+        with self.lock:
+            self._close_files()
+            os.close(self.lock_fd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or compact the submission log.")
+    parser.add_argument("--dir", default="data/submission_log", help="Submission log directory")
+    parser.add_argument("--compact", action="store_true", help="Drop superseded submission versions from sealed segments")
+    args = parser.parse_args()
+
+    log = SubmissionLog(args.dir)
+    if args.compact:
+        rewritten, reclaimed = log.compact()
+        print(f"Compacted {rewritten} segments, reclaimed {reclaimed / (1024 * 1024):.1f} MB")
+
+    stats = log.stats()
+    print(f"{stats['submissions']} submissions in {stats['segments']} segments, "
+          f"{stats['bytes'] / (1024 * 1024):.1f} MB on disk ({stats['live_bytes'] / (1024 * 1024):.1f} MB live)")
+    log.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,44 @@
-import os
-import json
 import uuid
 from datetime import datetime
+from repository import get_repository
+from question_catalog import get_question_catalog
+from similarity import get_duplicate_detector
+from search_index import get_search_index
 
 class Teacher:
-    def __init__(self):
-        self.questions_dir = "data/questions"
+    def __init__(self, repository=None, name=""):
+        self.repository = repository or get_repository()
+        self.name = name
+        self.catalog = get_question_catalog(self.repository)
+        self.duplicates = get_duplicate_detector(self.repository)
+        self.search = get_search_index()
     
     def menu(self):
-        print("\n===== Teacher Mode =====")
-        print("1. Create a new question")
-        print("2. View all questions")
-        print("3. View student submissions for a question")
-        print("4. Return to main menu")
-        
-        choice = input("\nSelect option: ")
-        
-        if choice == "1":
-            self.create_question()
-        elif choice == "2":
-            self.view_all_questions()
-        elif choice == "3":
-            self.view_submissions()
-        elif choice == "4":
-            return
-        else:
-            print("Invalid choice. Please try again.")
-        
-        self.menu()
+        while True:
+            print("\n===== Teacher Mode =====")
+            print("1. Create a new question")
+            print("2. View all questions")
+            print("3. View student submissions for a question")
+            print("4. Similar answers report")
+            print("5. Search questions and submissions")
+            print("6. Return to main menu")
+            
+            choice = input("\nSelect option: ")
+            
+            if choice == "1":
+                self.create_question()
+            elif choice == "2":
+                self.view_all_questions()
+            elif choice == "3":
+                self.view_submissions()
+            elif choice == "4":
+                self.view_copy_report()
+            elif choice == "5":
+                self.search_all()
+            elif choice == "6":
+                return
+            else:
+                print("Invalid choice. Please try again.")
     
     def create_question(self):
         print("\n===== Create New Question =====")
@@ -39,6 +50,24 @@ class Teacher:
         expected_answer = input("Expected answer (optional): ")
         grading_criteria = input("Grading criteria (optional): ")
         
+        if not self.name:
+            self.name = input("Your name (optional, for the usage report): ").strip()
+        
+        question_data = self.add_question(subject, topic, question_text, expected_answer, grading_criteria)
+        question_id = question_data['id']
+        
+        print(f"\nQuestion created successfully! Question ID: {question_id}")
+    
+    def add_question(self, subject, topic, question_text, expected_answer="", grading_criteria="", teacher=None):
+        """Create and save a new question.
+        
+        Args:
+            teacher (str, optional): Who set the question, for the usage report.
+                Defaults to this teacher's name.
+        
+        Returns:
+            dict: The saved question
+        """
         # Generate unique ID for the question
         question_id = str(uuid.uuid4())[:8]
         
@@ -49,15 +78,14 @@ class Teacher:
             "question": question_text,
             "expected_answer": expected_answer,
             "grading_criteria": grading_criteria,
+            "teacher": self.name if teacher is None else teacher,
             "created_at": datetime.now().isoformat()
         }
         
-        # Save question to file
-        filename = f"{self.questions_dir}/{question_id}.json"
-        with open(filename, 'w') as f:
-            json.dump(question_data, f, indent=4)
-        
-        print(f"\nQuestion created successfully! Question ID: {question_id}")
+        # Save question
+        self.catalog.add_question(question_data)
+        self.search.add_question(question_data)
+        return question_data
     
     def view_all_questions(self):
         print("\n===== All Questions =====")
@@ -84,6 +112,8 @@ class Teacher:
             print(f"Expected Answer: {question['expected_answer']}")
         if question['grading_criteria']:
             print(f"Grading Criteria: {question['grading_criteria']}")
+        if question.get('teacher'):
+            print(f"Teacher: {question['teacher']}")
         print(f"Created: {question['created_at']}")
         
         input("\nPress Enter to continue...")
@@ -104,17 +134,7 @@ class Teacher:
             self.view_question_submissions(questions[int(choice)-1]['id'])
     
     def view_question_submissions(self, question_id):
-        submissions_dir = f"data/submissions/{question_id}"
-        if not os.path.exists(submissions_dir):
-            print("\nNo submissions found for this question.")
-            input("Press Enter to continue...")
-            return
-        
-        submissions = []
-        for filename in os.listdir(submissions_dir):
-            if filename.endswith('.json'):
-                with open(f"{submissions_dir}/{filename}", 'r') as f:
-                    submissions.append(json.load(f))
+        submissions = self.repository.list_submissions(question_id)
         
         if not submissions:
             print("\nNo submissions found for this question.")
@@ -123,7 +143,7 @@ class Teacher:
         
         print(f"\n===== Submissions for Question {question_id} =====")
         for i, sub in enumerate(submissions, 1):
-            print(f"{i}. Student: {sub['student_name']} - Score: {sub.get('score', 'Not graded')}")
+            print(f"{i}. Student: {sub['student_name']} - Score: {sub.get('score', sub.get('status', 'Not graded').capitalize())}")
         
         choice = input("\nEnter number to view submission details (or press Enter to go back): ")
         if choice.isdigit() and 1 <= int(choice) <= len(submissions):
@@ -133,6 +153,8 @@ class Teacher:
         print(f"\n===== Submission Details =====")
         print(f"Student: {submission['student_name']}")
         print(f"Submitted: {submission['submitted_at']}")
+        if 'status' in submission:
+            print(f"Status: {submission['status'].capitalize()}")
         print(f"\nAnswer:\n{submission['answer']}")
         
         if 'evaluation' in submission:
@@ -141,13 +163,82 @@ class Teacher:
         if 'score' in submission:
             print(f"\nScore: {submission['score']}")
         
+        if submission.get('duplicate_of'):
+            print(f"Grade reused from submission {submission['duplicate_of']} ({submission['similarity']:.0%} similar)")
+        
+        input("\nPress Enter to continue...")
+    
+    def view_copy_report(self):
+        print("\n===== Similar Answers Report =====")
+        questions = self.get_all_questions()
+        
+        if not questions:
+            print("No questions found.")
+            return
+        
+        for i, q in enumerate(questions, 1):
+            print(f"{i}. [{q['id']}] {q['subject']} - {q['topic']}: {q['question'][:50]}...")
+        
+        choice = input("\nEnter question number to check for copied answers: ")
+        if not (choice.isdigit() and 1 <= int(choice) <= len(questions)):
+            return
+        
+        question_id = questions[int(choice)-1]['id']
+        clusters = self.duplicates.copy_report(question_id)
+        if not clusters:
+            print(f"\nNo answers from different students are more than {self.duplicates.copy_threshold:.0%} similar.")
+            input("Press Enter to continue...")
+            return
+        
+        print(f"\n===== Suspected Copying for Question {question_id} =====")
+        for i, cluster in enumerate(clusters, 1):
+            print(f"{i}. {len(cluster['students'])} students, up to {cluster['similarity']:.0%} similar: {', '.join(cluster['students'])}")
+            print(f"   Submissions: {', '.join(cluster['submission_ids'])}")
+        
         input("\nPress Enter to continue...")
     
+    def search_all(self):
+        print("\n===== Search =====")
+        query = input("Search for: ")
+        print("Optional filters (press Enter to skip):")
+        subject = input("Subject: ").strip() or None
+        since = input("From date (YYYY-MM-DD): ").strip() or None
+        until = input("To date (YYYY-MM-DD): ").strip() or None
+        min_score = input("Minimum score: ").strip()
+        max_score = input("Maximum score: ").strip()
+        
+        try:
+            results = self.search.search(
+                query, subject=subject, since=since, until=until,
+                min_score=float(min_score) if min_score else None,
+                max_score=float(max_score) if max_score else None
+            )
+        except ValueError:
+            print("Scores must be numbers.")
+            return
+        
+        if not results:
+            print("\nNo matches found.")
+            input("Press Enter to continue...")
+            return
+        
+        print(f"\n===== {len(results)} Best Matches =====")
+        for i, result in enumerate(results, 1):
+            score = "" if result['score'] is None else f" - Score: {result['score']:g}"
+            print(f"{i}. [{result['kind'].capitalize()} {result['id']}] {result['subject'] or 'Unknown'}{score}")
+            print(f"   {result['snippet']}")
+        
+        choice = input("\nEnter number to view details (or press Enter to go back): ")
+        if choice.isdigit() and 1 <= int(choice) <= len(results):
+            result = results[int(choice)-1]
+            if result['kind'] == 'question':
+                question = self.catalog.get_question(result['id'])
+                if question:
+                    self.view_question_detail(question)
+            else:
+                submission = self.repository.get_submission(result['id'])
+                if submission:
+                    self.view_submission_detail(submission)
+    
     def get_all_questions(self):
-        questions = []
-        if os.path.exists(self.questions_dir):
-            for filename in os.listdir(self.questions_dir):
-                if filename.endswith('.json'):
-                    with open(f"{self.questions_dir}/{filename}", 'r') as f:
-                        questions.append(json.load(f))
-        return questions
\ No newline at end of file
+        return self.catalog.list_questions()
\ No newline at end of file
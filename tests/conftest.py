@@ -0,0 +1,35 @@
+import pytest
+import grading_queue
+
+@pytest.fixture
+def evaluator_env(monkeypatch, tmp_path):
+    """Environment for an LLMEvaluator graded by FakeLLM, with its cache in tmp_path."""
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setenv("GRADER_LLM_BACKEND", "gemini")
+    monkeypatch.setenv("GRADER_CACHE_PATH", str(tmp_path / "cache.db"))
+    monkeypatch.delenv("GRADER_CACHE_DISABLED", raising=False)
+    monkeypatch.setenv("GRADER_USAGE_DISABLED", "1")
+    monkeypatch.setenv("GRADER_LOCAL_TRIAGE", "0")
+    monkeypatch.setenv("GEMINI_RESPONSE_FORMAT", "text")
+    return monkeypatch
+
+
+@pytest.fixture
+def store(evaluator_env, tmp_path):
+    """Environment with every data file under tmp_path, grading synchronously, and fresh shared instances."""
+    evaluator_env.setenv("GRADER_STORAGE", "sqlite")
+    evaluator_env.setenv("GRADER_DB_PATH", str(tmp_path / "grader.db"))
+    evaluator_env.setenv("GRADER_DATA_DIR", str(tmp_path / "data"))
+    evaluator_env.setenv("GRADER_SEARCH_PATH", str(tmp_path / "search.db"))
+    evaluator_env.setenv("GRADER_QUEUE_PATH", str(tmp_path / "queue.db"))
+    evaluator_env.setenv("GRADER_REGRADE_DIR", str(tmp_path / "regrade"))
+    evaluator_env.setenv("GRADER_ASYNC_GRADING", "0")
+    for module, name, empty in [("repository", "_repository", None), ("search_index", "_search_index", None),
+                                ("grading_queue", "_queue", None), ("llm_evaluator", "_evaluator", None),
+                                ("grading_queue", "_workers", None), ("question_catalog", "_catalogs", {}),
+                                ("similarity", "_detectors", {})]:
+        evaluator_env.setattr(f"{module}.{name}", empty)
+    yield tmp_path
+
+    if grading_queue._workers:
+        grading_queue._workers.stop()
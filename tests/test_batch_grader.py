@@ -0,0 +1,81 @@
+import re
+import time
+import pytest
+from fake_llm import FakeLLM
+from llm_evaluator import LLMEvaluator
+from repository import get_repository
+from batch_grader import BatchGrader
+from teacher import Teacher
+
+ANSWER_PATTERN = re.compile(r"Answer number (\d+)")
+
+class NumberedLLM(FakeLLM):
+    """Scores 'Answer number n' with n, answering later answers sooner, so
+    concurrent evaluations finish out of order. Fails from call fail_from on."""
+
+    def __init__(self, fail_from=None):
+        super().__init__()
+        self.fail_from = fail_from
+        self.answered = 0
+
+    def respond(self, prompt):
+        with self.lock:
+            self.answered += 1
+            call = self.answered
+        if self.fail_from and call >= self.fail_from:
+            raise ValueError("Bad request")
+        number = int(ANSWER_PATTERN.findall(prompt)[-1])
+        time.sleep(0.01 * (10 - number))
+        return f"EVALUATION: Graded answer {number}.\nSCORE: {number}"
+
+
+@pytest.fixture
+def evaluator(store):
+    llm_evaluator = LLMEvaluator()
+    llm_evaluator.caller.base_delay = 0
+    return llm_evaluator
+
+
+def test_evaluate_many_keeps_input_order(evaluator):
+    NumberedLLM().install(evaluator)
+    items = [{"question": "Count.", "student_answer": f"Answer number {i}", "grading_criteria": "10", "id": i}
+             for i in range(10)]
+    results = list(evaluator.evaluate_many(items, max_workers=4))
+    assert [item['id'] for item, _, _ in results] == list(range(10))
+    assert [score for _, _, score in results] == list(range(10))
+    assert results[3][1] == "Graded answer 3."
+
+
+def populate(repository, count):
+    question = Teacher(repository).add_question("Maths", "Counting", "Count.", grading_criteria="10")
+    for i in range(count):
+        repository.save_submission({"id": f"s{i}", "question_id": question['id'], "student_name": f"Student {i}",
+                                    "answer": f"Answer number {i}", "submitted_at": f"2026-01-01T00:00:{i:02d}"})
+    return question
+
+
+def test_batch_grades_are_written_back(evaluator, store):
+    NumberedLLM().install(evaluator)
+    repository = get_repository()
+    populate(repository, 6)
+
+    assert BatchGrader(evaluator, repository).run(max_workers=3) == 6
+    for i in range(6):
+        submission = repository.get_submission(f"s{i}")
+        assert (submission['status'], submission['score']) == ("graded", i)
+        assert submission['grading_model'] == "mock"
+    assert BatchGrader(evaluator, repository).run() == 0
+
+
+def test_batch_pauses_and_keeps_what_it_graded(evaluator, store, capsys):
+    NumberedLLM(fail_from=4).install(evaluator)
+    repository = get_repository()
+    populate(repository, 6)
+
+    assert BatchGrader(evaluator, repository).run(max_workers=1) == 3
+    assert "Grading paused" in capsys.readouterr().out
+    assert [repository.get_submission(f"s{i}").get('score') for i in range(6)] == [0, 1, 2, None, None, None]
+
+    # The next run grades the rest
+    NumberedLLM().install(evaluator)
+    assert BatchGrader(evaluator, repository).run() == 3
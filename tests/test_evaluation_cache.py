@@ -0,0 +1,56 @@
+import itertools
+from types import SimpleNamespace
+import pytest
+import evaluation_cache
+from evaluation_cache import EvaluationCache, cache_from_env
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A clock that ticks once per reading, so every put and get has its own time."""
+    ticks = itertools.count(1)
+    monkeypatch.setattr(evaluation_cache, "time", SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def test_get_returns_what_was_put(tmp_path):
+    cache = EvaluationCache(str(tmp_path / "cache.db"))
+    key = cache.make_key("prompt", "model")
+    assert cache.get(key) is None
+    criteria = [{"name": "Overall", "score": 7, "max_score": 10, "feedback": ""}]
+    cache.put(key, "model", "Good.", 7, criteria)
+    assert cache.get(key) == ("Good.", 7, criteria)
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "max_entries": 10000}
+
+
+def test_keys_depend_on_the_model():
+    assert EvaluationCache.make_key("prompt", "a") != EvaluationCache.make_key("prompt", "b")
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = EvaluationCache(str(tmp_path / "cache.db"), max_entries=3)
+    for name in "abc":
+        cache.put(name, "model", name, 1)
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a")
+    cache.put("d", "model", "d", 1)
+
+    assert cache.get("b") is None
+    assert [name for name in "acd" if cache.get(name)] == ["a", "c", "d"]
+    assert cache.stats()['size'] == 3
+
+
+def test_eviction_survives_reopening(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+    cache = EvaluationCache(path, max_entries=2)
+    for name in "abc":
+        cache.put(name, "model", name, 1)
+    reopened = EvaluationCache(path, max_entries=2)
+    assert reopened.get("a") is None and reopened.get("c")
+
+
+def test_cache_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("GRADER_CACHE_PATH", str(tmp_path / "env.db"))
+    monkeypatch.setenv("GRADER_CACHE_MAX_ENTRIES", "5")
+    monkeypatch.delenv("GRADER_CACHE_DISABLED", raising=False)
+    assert cache_from_env().max_entries == 5
+    monkeypatch.setenv("GRADER_CACHE_DISABLED", "1")
+    assert cache_from_env() is None
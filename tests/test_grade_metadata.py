@@ -0,0 +1,87 @@
+import pytest
+from fake_llm import FakeLLM
+from llm_evaluator import LLMEvaluator
+from repository import get_repository
+from batch_grader import BatchGrader
+from grading_queue import GradingWorkers, get_grading_queue
+from regrade import Regrader
+from student import Student
+from teacher import Teacher
+
+ANSWER = "Photosynthesis turns light, water and carbon dioxide into glucose and oxygen in the chloroplasts."
+
+@pytest.fixture
+def grading(store):
+    repository = get_repository()
+    evaluator = LLMEvaluator()
+    FakeLLM().install(evaluator)
+    question = Teacher(repository).add_question("Biology", "Plants", "What is photosynthesis?",
+                                                expected_answer=ANSWER, grading_criteria="10")
+    return repository, evaluator, question
+
+
+def assert_stamped(submission, evaluator, question, model="mock"):
+    assert submission['status'] == 'graded'
+    assert submission['grading_version'] == evaluator.grading_version(
+        question['question'], question['expected_answer'], question['grading_criteria'])
+    assert submission['grading_model'] == model
+    assert submission['graded_at']
+
+
+def test_submission_graded_now_is_stamped(grading):
+    repository, evaluator, question = grading
+    submission = Student(repository, evaluator).submit(question, "Ada", "Plants make food from light.", grade_now=True)
+    assert_stamped(repository.get_submission(submission['id']), evaluator, question)
+
+
+def test_first_regrade_skips_submissions_graded_under_the_current_version(grading, store):
+    repository, evaluator, question = grading
+    Student(repository, evaluator).submit(question, "Ada", "Plants make food from light.", grade_now=True)
+    regrader = Regrader(evaluator, repository, checkpoint_dir=str(store / "regrade"))
+    assert regrader.run() == (0, 1)
+
+
+def test_forced_regrade_keeps_the_version_in_the_history(grading, store):
+    repository, evaluator, question = grading
+    submission = Student(repository, evaluator).submit(question, "Ada", "Plants make food from light.", grade_now=True)
+    Regrader(evaluator, repository, checkpoint_dir=str(store / "regrade")).run(force=True)
+
+    regraded = repository.get_submission(submission['id'])
+    previous = regraded['evaluation_history'][-1]
+    assert previous['version'] == submission['grading_version']
+    assert previous['model'] == "mock"
+    assert_stamped(regraded, evaluator, question)
+
+
+def test_reused_grade_keeps_the_source_version_and_model(grading):
+    repository, evaluator, question = grading
+    student = Student(repository, evaluator)
+    source = student.submit(question, "Ada", ANSWER + " It happens in leaves.", grade_now=True)
+    copy = student.submit(question, "Bob", ANSWER + " It happens in leaves!", grade_now=True)
+
+    assert copy['duplicate_of'] == source['id']
+    assert copy['grading_version'] == source['grading_version']
+    assert copy['grading_model'] == source['grading_model']
+    assert copy['graded_at']
+
+
+def test_batch_and_queue_grades_are_stamped(grading):
+    repository, evaluator, question = grading
+    batch = {"id": "batch1", "question_id": question['id'], "student_name": "Ada", "answer": "Light to sugar.",
+             "submitted_at": "2026-01-01T00:00:00"}
+    queued = dict(batch, id="queued1", student_name="Bob", answer="Leaves make oxygen.", status="pending")
+    repository.save_submission(batch)
+    repository.save_submission(queued)
+
+    assert BatchGrader(evaluator, repository).run() == 1
+    assert_stamped(repository.get_submission("batch1"), evaluator, question)
+
+    GradingWorkers(get_grading_queue(), repository, evaluator).grade("queued1")
+    assert_stamped(repository.get_submission("queued1"), evaluator, question)
+
+
+def test_local_grades_name_the_local_scorer(grading):
+    repository, evaluator, question = grading
+    evaluator.triage = True
+    submission = Student(repository, evaluator).submit(question, "Ada", "   ", grade_now=True)
+    assert_stamped(submission, evaluator, question, model=LLMEvaluator.LOCAL_MODEL_ID)
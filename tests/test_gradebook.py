@@ -0,0 +1,102 @@
+import io
+import csv
+import json
+import pytest
+from gradebook import Gradebook, ScoreAggregate, export_gradebook, iter_gradebook_rows, max_score_for, percent_of
+from repository import get_repository
+
+def aggregate_of(scores, max_score=10):
+    aggregate = ScoreAggregate()
+    for score in scores:
+        aggregate.add(score, max_score)
+    return aggregate
+
+
+def test_percentiles_use_the_nearest_rank():
+    aggregate = aggregate_of(range(1, 11))
+    assert [aggregate.percentile(p) for p in (0, 25, 50, 75, 90, 100)] == [1, 3, 5, 8, 9, 10]
+
+    # Repeated scores are counted, not collapsed
+    aggregate = aggregate_of([2, 2, 2, 9])
+    assert (aggregate.percentile(50), aggregate.percentile(75), aggregate.percentile(76)) == (2, 2, 9)
+
+    assert ScoreAggregate().percentile(50) is None
+    assert ScoreAggregate().summary() == {"count": 0}
+
+
+def test_histogram_buckets_by_percent_of_max():
+    summary = aggregate_of([0, 0.5, 1, 5, 9.9, 10, 12]).summary()
+    assert list(summary['histogram']) == [f"{i}-{i + 10}%" for i in range(0, 100, 10)]
+    # A full or over-full score lands in the top bucket
+    assert list(summary['histogram'].values()) == [2, 1, 0, 0, 0, 1, 0, 0, 0, 3]
+
+    four = ScoreAggregate(bins=4)
+    four.add(30, 100)
+    assert four.summary()['histogram'] == {"0-25%": 0, "25-50%": 1, "50-75%": 0, "75-100%": 0}
+
+
+def test_mean_percent_combines_different_maximums():
+    aggregate = ScoreAggregate()
+    aggregate.add(5, 10)
+    aggregate.add(50, 100)
+    aggregate.add(3, 0)
+    summary = aggregate.summary()
+    assert summary['mean'] == 19.33
+    assert summary['mean_percent'] == pytest.approx(33.33)
+    assert (summary['min'], summary['max'], summary['median']) == (3, 50, 5)
+
+
+def test_percent_of():
+    assert (percent_of(7, 10), percent_of(1, 3), percent_of(15, 10), percent_of(4, 0)) == (70.0, 33.33, 100.0, 0.0)
+
+
+def row(question_id, score, max_score, subject="Physics", topic="Motion", criteria_scores=None):
+    return {"question_id": question_id, "subject": subject, "topic": topic, "score": score,
+            "max_score": max_score, "criteria_scores": criteria_scores}
+
+
+def test_rollups_across_questions_use_percentages():
+    gradebook = Gradebook()
+    for item in [row("q1", 8, 10), row("q1", 6, 10), row("q2", 40, 100), row("q3", 90, 100, subject="Maths"),
+                 row("q2", None, 100),
+                 row("q4", 3, 5, criteria_scores=[{"name": "Accuracy", "score": 2, "max_score": 3}])]:
+        gradebook.add(item)
+    summary = gradebook.summary()
+
+    assert summary['ungraded'] == 1
+    assert summary['overall']['count'] == 5
+    # Per question in points
+    assert summary['by_question']['q1']['mean'] == 7
+    assert summary['by_question']['q2']['mean'] == 40
+    # Per subject and topic in percent: (80 + 60 + 40 + 60) / 4, not the raw (8 + 6 + 40 + 3) / 4
+    assert summary['by_subject']['Physics']['mean'] == 60
+    assert summary['by_subject']['Physics']['median'] == 60
+    assert summary['by_topic']['Physics / Motion']['max'] == 80
+    assert summary['by_subject']['Maths']['mean'] == 90
+    assert summary['by_criterion']['q4 / Accuracy']['mean'] == 2
+    assert summary['overall']['mean'] == summary['overall']['mean_percent'] == 66
+
+
+def test_export_streams_rows_and_feeds_the_gradebook(store):
+    repository = get_repository()
+    repository.add_question({"id": "q1", "subject": "Physics", "topic": "Motion", "question": "Why?",
+                             "grading_criteria": "20"})
+    repository.save_submissions([
+        {"id": "s1", "question_id": "q1", "student_name": "Ada", "answer": "Because", "score": 15,
+         "submitted_at": "2026-01-01T00:00:00", "criteria_scores": [{"name": "Accuracy", "score": 5, "max_score": 10}]},
+        {"id": "s2", "question_id": "q1", "student_name": "Grace", "answer": "Hmm", "submitted_at": "2026-01-02T00:00:00"},
+    ])
+    assert (max_score_for({"grading_criteria": "20"}), max_score_for({"grading_criteria": "Be clear"})) == (20, 100)
+
+    output = io.StringIO()
+    gradebook = Gradebook()
+    assert export_gradebook(iter_gradebook_rows(repository), output, "csv", gradebook) == 2
+    rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+    assert [(r['submission_id'], r['status'], r['score'], r['max_score']) for r in rows] == [
+        ("s1", "graded", "15", "20"), ("s2", "ungraded", "", "20")]
+    assert json.loads(rows[0]['criteria_scores'])[0]['name'] == "Accuracy"
+    assert gradebook.summary()['by_subject']['Physics']['mean'] == 75
+
+    output = io.StringIO()
+    export_gradebook(iter_gradebook_rows(repository, "q1"), output, "jsonl")
+    assert [json.loads(line)['score'] for line in output.getvalue().splitlines()] == [15, None]
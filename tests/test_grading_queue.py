@@ -0,0 +1,138 @@
+import time
+import pytest
+from fake_llm import FakeLLM
+from grading_queue import GradingQueue, GradingWorkers
+from llm_evaluator import LLMEvaluator
+from repository import get_repository
+from resilience import CircuitOpenError
+from student import Student
+from teacher import Teacher
+
+@pytest.fixture
+def queue(tmp_path):
+    return GradingQueue(str(tmp_path / "queue.db"), max_attempts=3, base_delay=10.0, lease_seconds=60)
+
+
+def next_attempt_at(queue, submission_id):
+    return queue._connection().execute(
+        "SELECT next_attempt_at FROM jobs WHERE submission_id = ?", (submission_id,)
+    ).fetchone()[0]
+
+
+def age(queue, submission_id, seconds):
+    """Move a job's next attempt (or lease expiry) seconds into the past."""
+    queue._connection().execute(
+        "UPDATE jobs SET next_attempt_at = next_attempt_at - ? WHERE submission_id = ?", (seconds, submission_id)
+    )
+
+
+def test_claims_oldest_first_and_only_once(queue):
+    for submission_id in ("a", "b", "c"):
+        queue.enqueue(submission_id)
+        age(queue, submission_id, 1)
+    assert queue.claim_many(2) == ["a", "b"]
+    assert queue.claim() == "c"
+    assert queue.claim() is None
+    assert queue.counts() == {"in_progress": 3}
+
+
+def test_expired_lease_is_claimed_again(queue):
+    queue.enqueue("a")
+    assert queue.claim() == "a"
+    assert next_attempt_at(queue, "a") == pytest.approx(time.time() + 60, abs=5)
+    assert queue.claim() is None
+
+    # The worker holding it crashed
+    age(queue, "a", 61)
+    assert queue.claim() == "a"
+
+
+def test_failures_back_off_exponentially(queue):
+    queue.enqueue("a")
+    delays = []
+    for _ in range(2):
+        assert queue.claim() == "a"
+        before = time.time()
+        assert queue.fail("a", ValueError("boom")) is False
+        delays.append(next_attempt_at(queue, "a") - before)
+        age(queue, "a", 1000)
+    # base_delay * 2 ** (attempt - 1), with +/-50% jitter
+    assert 5 <= delays[0] <= 15.5
+    assert 10 <= delays[1] <= 30.5
+    assert queue.counts() == {"queued": 1}
+
+
+def test_dead_letter_after_max_attempts_and_requeue(queue):
+    queue.enqueue("a")
+    assert [queue.fail("a", ValueError(f"boom {i}")) for i in range(3)] == [False, False, True]
+    assert queue.dead_letters() == [("a", 3, "boom 2")]
+    assert queue.claim() is None
+
+    assert queue.requeue_dead() == 1
+    assert queue.claim() == "a"
+    assert queue.fail("a", ValueError("again")) is False
+
+
+def test_release_does_not_count_an_attempt(queue):
+    queue.enqueue("a")
+    queue.claim()
+    queue.release("a", 0)
+    assert queue.claim() == "a"
+    assert [queue.fail("a", ValueError("boom")) for _ in range(3)] == [False, False, True]
+
+
+class PausedEvaluator:
+    def evaluate_answer(self, *args, **kwargs):
+        raise CircuitOpenError("The grading service is unavailable", retry_after=0)
+
+
+def test_worker_holds_jobs_while_grading_is_paused(queue, store):
+    repository = get_repository()
+    repository.add_question({"id": "q1", "subject": "Maths", "topic": "Sums", "question": "2 + 2?"})
+    repository.save_submission({"id": "a", "question_id": "q1", "student_name": "Ada", "answer": "4",
+                                "submitted_at": "2026-01-01T00:00:00", "status": "pending"})
+    queue.enqueue("a")
+
+    workers = GradingWorkers(queue, repository, PausedEvaluator())
+    assert workers.process_one() is True
+    assert queue.counts() == {"queued": 1}
+    assert queue.dead_letters() == []
+    # Paused jobs keep all their attempts
+    assert [queue.fail("a", ValueError("boom")) for _ in range(3)] == [False, False, True]
+
+
+def test_requeue_dead_sets_submissions_back_to_pending(queue, store):
+    repository = get_repository()
+    repository.save_submission({"id": "a", "question_id": "q1", "student_name": "Ada", "answer": "4",
+                                "submitted_at": "2026-01-01T00:00:00", "status": "failed"})
+    queue.enqueue("a")
+    for i in range(3):
+        queue.fail("a", ValueError("boom"))
+
+    assert queue.requeue_dead(repository) == 1
+    assert repository.get_submission("a")['status'] == 'pending'
+    assert queue.outstanding() == 1
+
+
+def test_failed_synchronous_grading_is_picked_up_by_workers(store):
+
+    repository = get_repository()
+    evaluator = LLMEvaluator()
+    fake = FakeLLM().install(evaluator)
+    respond, calls = fake.respond, []
+
+    def fail_first(prompt):
+        calls.append(prompt)
+        if len(calls) == 1:
+            raise ValueError("Bad request")
+        return respond(prompt)
+
+    fake.respond = fail_first
+    question = Teacher(repository).add_question("Maths", "Sums", "What is 2 + 2?", expected_answer="4")
+    submission = Student(repository, evaluator).submit(question, "Ada", "Four", grade_now=True)
+    assert submission['status'] == 'pending'
+
+    deadline = time.monotonic() + 10
+    while repository.get_submission(submission['id'])['status'] != 'graded' and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert repository.get_submission(submission['id'])['status'] == 'graded'
@@ -0,0 +1,52 @@
+import json
+import pytest
+from grading_schema import InvalidGradingError, rubric_criteria, parse_grading
+
+CRITERIA = [("Accuracy", 6), ("Clarity", 4)]
+
+def response(scores=(5, 3), total=8, max_score=10, feedback="Good answer."):
+    return {
+        "criteria": [{"name": name, "score": score, "max_score": criterion_max, "feedback": f"{name} ok."}
+                     for (name, criterion_max), score in zip(CRITERIA, scores)],
+        "total": total,
+        "max_score": max_score,
+        "feedback": feedback
+    }
+
+
+def test_rubric_criteria_shares_the_maximum():
+    assert rubric_criteria("1. Accuracy\n2. Clarity\n3. Examples", 10) == [("Accuracy", 4), ("Clarity", 3), ("Examples", 3)]
+    assert rubric_criteria("10", 10) == [("Overall", 10)]
+    assert rubric_criteria("", 5) == [("Overall", 5)]
+
+
+def test_valid_response():
+    feedback, total, criteria_scores, repaired = parse_grading(json.dumps(response()), CRITERIA, 10)
+    assert (feedback, total, repaired) == ("Good answer.", 8, False)
+    assert criteria_scores[1] == {"name": "Clarity", "score": 3, "max_score": 4, "feedback": "Clarity ok."}
+
+
+@pytest.mark.parametrize("text", [
+    "Here is the grade:\n```json\n" + json.dumps(response()) + "\n```",
+    json.dumps(response()).replace("}]", "},]"),
+    json.dumps(response(scores=("5", 3.0))),
+    json.dumps(response(total=9))
+])
+def test_harmless_deviations_are_repaired(text):
+    _, total, _, repaired = parse_grading(text, CRITERIA, 10)
+    assert (total, repaired) == (8, True)
+
+
+@pytest.mark.parametrize("text, problem", [
+    ("No JSON here", "does not contain a JSON object"),
+    ("[1, 2]", "not a JSON object"),
+    (json.dumps(response(max_score=100)), "max_score is 100"),
+    (json.dumps(dict(response(), criteria=response()["criteria"][:1])), "list of 2 entries"),
+    (json.dumps(response(scores=(7, 3))), "expected 0-6"),
+    (json.dumps(response(scores=(True, 3))), "must be an integer"),
+    (json.dumps(response(scores=("five", 3))), "must be an integer"),
+    (json.dumps(response(feedback=" ")), "'feedback' must be a non-empty string")
+])
+def test_unusable_responses_are_rejected(text, problem):
+    with pytest.raises(InvalidGradingError, match=problem):
+        parse_grading(text, CRITERIA, 10)
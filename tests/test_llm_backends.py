@@ -0,0 +1,103 @@
+import threading
+import pytest
+from fake_llm import FakeLLM
+from llm_backends import GeminiBackend, HTTPBackend, HTTPStatusError, backend_from_env
+from llm_server import StandInLLM, create_http_server
+from resilience import is_retryable
+
+PROMPT = "Evaluate this answer. Student answer: water boils at 100 degrees."
+
+@pytest.fixture
+def serve():
+    """Start a StandInLLM on a free local port; returns a function giving (stand_in, base_url)."""
+    servers = []
+
+    def start(**limits):
+        stand_in = StandInLLM(FakeLLM(chunk_chars=8), **limits)
+        server = create_http_server("127.0.0.1", 0, stand_in)
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        servers.append(server)
+        return stand_in, f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def backend(base_url, wire_format):
+    if wire_format == "openai":
+        base_url += "/v1"
+    return HTTPBackend(base_url, "stand-in", "test-key", wire_format, timeout=5)
+
+
+@pytest.mark.parametrize("wire_format", ["gemini", "openai"])
+def test_generate(serve, wire_format):
+    stand_in, base_url = serve()
+    assert backend(base_url, wire_format).generate(PROMPT) == FakeLLM().respond(PROMPT)
+    assert stand_in.stats["requests"] == 1
+
+
+@pytest.mark.parametrize("wire_format", ["gemini", "openai"])
+def test_stream(serve, wire_format):
+    stand_in, base_url = serve()
+    chunks = list(backend(base_url, wire_format).stream(PROMPT))
+    assert len(chunks) > 1
+    assert "".join(chunks) == FakeLLM().respond(PROMPT)
+    assert stand_in.stats["streamed"] == 1
+
+
+@pytest.mark.parametrize("wire_format", ["gemini", "openai"])
+def test_stream_stops_at_the_output_token_cap(serve, wire_format):
+    _, base_url = serve()
+    text = "".join(backend(base_url, wire_format).stream(PROMPT, max_output_tokens=2))
+    assert text == FakeLLM().respond(PROMPT)[:8]
+
+
+@pytest.mark.parametrize("wire_format", ["gemini", "openai"])
+def test_rate_limited_once_the_quota_is_used(serve, wire_format):
+    stand_in, base_url = serve(requests_per_minute=2)
+    client = backend(base_url, wire_format)
+    client.generate(PROMPT)
+    client.generate(PROMPT)
+    with pytest.raises(HTTPStatusError) as raised:
+        client.generate(PROMPT)
+    assert raised.value.code == 429
+    assert is_retryable(raised.value)
+    assert stand_in.stats["rate_limited"] == 1
+
+
+def test_errors_carry_the_status(serve):
+    _, base_url = serve()
+    with pytest.raises(HTTPStatusError) as raised:
+        HTTPBackend(base_url + "/missing", "stand-in", wire_format="openai", timeout=5).generate(PROMPT)
+    assert raised.value.code == 404
+
+
+def test_unknown_wire_format():
+    with pytest.raises(ValueError):
+        HTTPBackend("http://127.0.0.1:1", "model", wire_format="soap")
+
+
+def test_backend_from_env(monkeypatch):
+    for name in ("GRADER_LLM_BACKEND", "GRADER_LLM_URL", "GRADER_LLM_FORMAT", "GEMINI_TRANSPORT"):
+        monkeypatch.delenv(name, raising=False)
+    assert isinstance(backend_from_env("key", "gemini-1.5-pro"), GeminiBackend)
+    assert backend_from_env(None, "gemini-1.5-pro") is None
+
+    monkeypatch.setenv("GRADER_LLM_BACKEND", "mock")
+    monkeypatch.setenv("GRADER_MOCK_ERROR_RATE", "0.25")
+    mock = backend_from_env(None, "model")
+    assert isinstance(mock, FakeLLM) and mock.error_rate == 0.25
+
+    monkeypatch.setenv("GRADER_LLM_BACKEND", "http")
+    with pytest.raises(ValueError, match="GRADER_LLM_URL"):
+        backend_from_env("key", "model")
+    monkeypatch.setenv("GRADER_LLM_URL", "http://localhost:8080/v1/")
+    monkeypatch.setenv("GRADER_LLM_FORMAT", "OpenAI")
+    http = backend_from_env("key", "model", timeout=7)
+    assert (type(http), http.base_url, http.wire_format, http.timeout) == (HTTPBackend, "http://localhost:8080/v1", "openai", 7)
+
+    monkeypatch.setenv("GRADER_LLM_BACKEND", "carrier-pigeon")
+    with pytest.raises(ValueError, match="Unknown LLM backend"):
+        backend_from_env("key", "model")
@@ -0,0 +1,64 @@
+from local_scorer import LocalScorer, tokenize, negated_terms
+
+QUESTION = "What is photosynthesis?"
+REFERENCE = ("Photosynthesis uses sunlight, water and carbon dioxide to make glucose in the "
+             "chloroplasts and releases oxygen as a byproduct.")
+
+def evaluate(answer, reference=REFERENCE, criteria="10"):
+    return LocalScorer().evaluate(QUESTION, answer, reference, criteria, 10)
+
+
+def test_copy_of_reference_is_confident_full_marks():
+    _, score, confidence = evaluate(REFERENCE)
+    assert score == 10
+    assert confidence >= 0.9
+
+
+def test_off_topic_answer_scores_low():
+    _, score, _ = evaluate("The French revolution began in 1789 with the storming of the Bastille prison.")
+    assert score <= 2
+
+
+def test_negated_copy_is_not_confident():
+    answer = ("Photosynthesis does not use sunlight, water and carbon dioxide to make glucose in the "
+              "chloroplasts and never releases oxygen as a byproduct.")
+    _, _, confidence = evaluate(answer)
+    assert confidence < 0.9
+
+
+def test_contraction_counts_as_negation():
+    assert "not" in [word for _, word in tokenize("It doesn't work")]
+    assert negated_terms(tokenize("It doesn't release oxygen")) == {"release", "oxygen"}
+
+
+def test_short_answers_matching_short_reference_are_not_zeroed():
+    for answer in ("No.", "No, it is not."):
+        _, score, confidence = evaluate(answer, reference="No")
+        assert score > 0 or confidence < 0.9
+
+
+def test_non_ascii_answer_goes_to_the_llm():
+    _, _, confidence = evaluate("प्रकाश संश्लेषण सूर्य के प्रकाश का उपयोग करता है")
+    assert confidence < 0.9
+
+
+def test_answer_without_words_goes_to_the_llm():
+    _, score, confidence = evaluate("?!")
+    assert score == 0
+    assert confidence < 0.9
+
+
+def test_blank_answer_is_confident_zero():
+    _, score, confidence = evaluate("   ")
+    assert (score, confidence) == (0, 1.0)
+
+
+def test_no_reference_is_never_confident():
+    _, _, confidence = evaluate("Plants make food from light.", reference="")
+    assert confidence < 0.9
+
+
+def test_rubric_items_addressed_are_reported():
+    evaluation, _, _ = evaluate("Plants use sunlight to make glucose.", reference="",
+                                criteria="- uses sunlight\n- makes glucose\n- releases oxygen")
+    assert "2 of 3 grading criteria" in evaluation
@@ -0,0 +1,98 @@
+import json
+import pytest
+from metrics import Metrics
+
+@pytest.fixture
+def registry():
+    return Metrics(enabled=True)
+
+
+def test_counters(registry):
+    registry.inc("grader_requests_total", outcome="ok", model="m")
+    registry.inc("grader_requests_total", 2, model="m", outcome="ok")
+    registry.inc("grader_requests_total", outcome="error", model="m")
+    registry.inc("grader_fallbacks_total")
+
+    assert registry.to_prometheus() == (
+        "# TYPE grader_fallbacks_total counter\n"
+        "grader_fallbacks_total 1\n"
+        "# TYPE grader_requests_total counter\n"
+        'grader_requests_total{model="m",outcome="error"} 1\n'
+        'grader_requests_total{model="m",outcome="ok"} 3\n'
+    )
+    assert registry.snapshot()['counters'] == [
+        {"name": "grader_fallbacks_total", "labels": {}, "value": 1},
+        {"name": "grader_requests_total", "labels": {"model": "m", "outcome": "error"}, "value": 1},
+        {"name": "grader_requests_total", "labels": {"model": "m", "outcome": "ok"}, "value": 3},
+    ]
+
+
+def test_label_values_are_escaped(registry):
+    registry.inc("grader_errors_total", error='Bad "quote"\\path\nline')
+    assert registry.to_prometheus().splitlines()[1] == \
+        'grader_errors_total{error="Bad \\"quote\\"\\\\path\\nline"} 1'
+
+
+def test_histograms(registry):
+    for value in (50, 100, 101, 7000):
+        registry.observe("grader_answer_chars", value, buckets=(100, 1000), kind="answer")
+
+    assert registry.to_prometheus() == (
+        "# TYPE grader_answer_chars histogram\n"
+        'grader_answer_chars_bucket{kind="answer",le="100"} 2\n'
+        'grader_answer_chars_bucket{kind="answer",le="1000"} 3\n'
+        'grader_answer_chars_bucket{kind="answer",le="+Inf"} 4\n'
+        'grader_answer_chars_sum{kind="answer"} 7251.0\n'
+        'grader_answer_chars_count{kind="answer"} 4\n'
+    )
+    assert registry.snapshot()['histograms'] == [{
+        "name": "grader_answer_chars", "labels": {"kind": "answer"}, "count": 4, "sum": 7251.0,
+        "buckets": {"100": 2, "1000": 3, "+Inf": 4}
+    }]
+
+
+def test_spans_record_duration_and_outcome(registry):
+    with registry.span("grader_step_seconds", step="parse"):
+        pass
+    with pytest.raises(ValueError):
+        with registry.span("grader_step_seconds", step="parse"):
+            raise ValueError("boom")
+
+    @registry.timed("grader_step_seconds", step="call")
+    def call():
+        return "done"
+    assert call() == "done"
+
+    histograms = {tuple(sorted(h['labels'].items())): h for h in registry.snapshot()['histograms']}
+    assert set(histograms) == {
+        (("outcome", "ok"), ("step", "parse")), (("outcome", "error"), ("step", "parse")),
+        (("outcome", "ok"), ("step", "call"))
+    }
+    for histogram in histograms.values():
+        assert histogram['count'] == 1 and histogram['buckets']["+Inf"] == 1
+        assert 0 <= histogram['sum'] < 1
+    assert 'grader_step_seconds_count{outcome="error",step="parse"} 1' in registry.to_prometheus()
+
+
+def test_disabled_registry_records_nothing():
+    registry = Metrics(enabled=False)
+    registry.inc("grader_requests_total")
+    registry.observe("grader_answer_chars", 10)
+    with registry.span("grader_step_seconds"):
+        pass
+    assert (registry.counters, registry.histograms) == ({}, {})
+    assert registry.to_prometheus() == "\n"
+
+
+def test_write_file(registry, tmp_path):
+    registry.inc("grader_requests_total")
+    registry.write_file(str(tmp_path / "metrics.json"))
+    registry.write_file(str(tmp_path / "metrics.prom"))
+
+    snapshot = json.loads((tmp_path / "metrics.json").read_text())
+    assert snapshot['counters'] == [{"name": "grader_requests_total", "labels": {}, "value": 1}]
+    assert "timestamp" in snapshot
+    assert (tmp_path / "metrics.prom").read_text() == registry.to_prometheus()
+
+    registry.reset()
+    assert registry.snapshot()['counters'] == []
@@ -0,0 +1,95 @@
+import pytest
+from fake_llm import FakeLLM
+from llm_evaluator import LLMEvaluator
+from metrics import metrics
+
+class ScriptedLLM(FakeLLM):
+    """Answers packed prompts with a scripted response and single prompts with 'Alone.'."""
+
+    def __init__(self, packed):
+        super().__init__()
+        self.packed = packed
+        self.singles = 0
+
+    def respond(self, prompt):
+        if "Student Answer 1:" not in prompt:
+            self.singles += 1
+            return "EVALUATION: Alone.\nSCORE: 5"
+        if isinstance(self.packed, Exception):
+            raise self.packed
+        return self.packed
+
+
+@pytest.fixture
+def evaluator(evaluator_env):
+    llm_evaluator = LLMEvaluator()
+    llm_evaluator.caller.base_delay = 0
+    return llm_evaluator
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    monkeypatch.setattr(metrics, "enabled", True)
+    metrics.reset()
+    yield metrics.counters
+    metrics.reset()
+
+
+def test_numbered_sections(evaluator):
+    response = "EVALUATION 1: Clear.\nSCORE 1: 7\n\nEVALUATION 2: Vague.\nSCORE 2: 3"
+    assert evaluator._parse_packed_response(response, 2) == {1: ("Clear.", 7), 2: ("Vague.", 3)}
+
+
+def test_markdown_sections(evaluator):
+    response = "**Evaluation 1**: Clear.\n**Score 1**: 7/10\n\n## EVALUATION 2: Vague.\n## SCORE 2: **3**"
+    assert evaluator._parse_packed_response(response, 2) == {1: ("Clear.", 7), 2: ("Vague.", 3)}
+
+
+@pytest.mark.parametrize("response", [
+    # Answer 2 has no score
+    "EVALUATION 1: Clear.\nSCORE 1: 7\nEVALUATION 2: Vague.",
+    # Answer 2 is graded twice
+    "EVALUATION 1: Clear.\nSCORE 1: 7\nEVALUATION 2: Vague.\nSCORE 2: 3\nEVALUATION 2: Fine.\nSCORE 2: 8",
+    # Answer 3 does not exist
+    "EVALUATION 1: Clear.\nSCORE 1: 7\nEVALUATION 3: Vague.\nSCORE 3: 3"
+])
+def test_missing_or_repeated_section_is_graded_alone(evaluator, response):
+    assert evaluator._parse_packed_response(response, 2) == {1: ("Clear.", 7)}
+
+    fake = ScriptedLLM(response).install(evaluator)
+    results = evaluator.evaluate_packed("Why?", ["First answer", "Second answer"], grading_criteria="10")
+    assert results == [("Clear.", 7), ("Alone.", 5)]
+    assert fake.singles == 1
+
+
+def test_failed_packed_call_is_counted_and_graded_alone(evaluator, counters, capsys):
+    fake = ScriptedLLM(ValueError("Bad request")).install(evaluator)
+    results = evaluator.evaluate_packed("Why?", ["First", "Second", "Third"], grading_criteria="10")
+    assert results == [("Alone.", 5)] * 3
+    assert fake.singles == 3
+    assert counters[("grader_packed_failures_total", (("error", "ValueError"),))] == 1
+    assert counters[("grader_packed_fallbacks_total", ())] == 3
+    assert capsys.readouterr().out == ""
+
+
+def test_plan_packs_splits_by_token_budget(evaluator):
+    answers = ["word " * 400] * 5
+    fixed = evaluator._estimate_tokens(evaluator._construct_packed_prompt("Why?", [], "", ""))
+    per_answer = evaluator._estimate_tokens(answers[0]) + evaluator.PACKED_OUTPUT_TOKENS_PER_ANSWER
+
+    evaluator.pack_token_budget = fixed + 2 * per_answer
+    assert evaluator._plan_packs("Why?", answers, range(5), "", "") == [[0, 1], [2, 3], [4]]
+
+    # An answer too big for any pack still gets one of its own
+    evaluator.pack_token_budget = fixed
+    assert evaluator._plan_packs("Why?", answers, [1, 3], "", "") == [[1], [3]]
+
+    # A per-minute token limit caps the pack size too
+    evaluator.pack_token_budget = 10 ** 6
+    evaluator.tokens_per_minute = fixed + 3 * per_answer
+    assert evaluator._plan_packs("Why?", answers, range(5), "", "") == [[0, 1, 2], [3, 4]]
+
+
+def test_plan_packs_respects_max_pack_size(evaluator):
+    evaluator.max_pack_size = 2
+    assert evaluator._plan_packs("Why?", ["a"] * 5, range(5), "", "") == [[0, 1], [2, 3], [4]]
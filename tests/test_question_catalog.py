@@ -0,0 +1,90 @@
+import os
+import sys
+import json
+import textwrap
+import subprocess
+import pytest
+from question_catalog import QuestionCatalog
+from repository import JsonRepository, SqliteRepository
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def question(question_id, text, created_at):
+    return {"id": question_id, "subject": "Physics", "topic": "Motion", "question": text, "created_at": created_at}
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def storage(request, tmp_path):
+    """Returns (repository, writer) where writer(code) runs code in another
+    process with 'repository' opened on the same storage."""
+    if request.param == "json":
+        repository = JsonRepository(str(tmp_path / "data"))
+        opener = f"JsonRepository({str(tmp_path / 'data')!r})"
+    else:
+        repository = SqliteRepository(str(tmp_path / "grader.db"))
+        opener = f"SqliteRepository({repository.path!r})"
+
+    def writer(code):
+        script = f"import os\nfrom repository import *\nrepository = {opener}\n" + textwrap.dedent(code)
+        subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True)
+
+    return repository, writer
+
+
+def texts(catalog):
+    return [q['question'] for q in catalog.list_questions()]
+
+
+def test_changes_from_another_process_are_picked_up(storage):
+    repository, writer = storage
+    catalog = QuestionCatalog(repository, poll_interval=0)
+    catalog.add_question(question("q1", "What is inertia?", "2026-01-01T00:00:00"))
+    assert texts(catalog) == ["What is inertia?"]
+
+    writer(f"repository.add_question({json.dumps(question('q2', 'What is momentum?', '2026-01-02T00:00:00'))})")
+    assert texts(catalog) == ["What is inertia?", "What is momentum?"]
+
+    writer(f"repository.add_question({json.dumps(question('q1', 'Define inertia precisely.', '2026-01-01T00:00:00'))})")
+    assert texts(catalog) == ["Define inertia precisely.", "What is momentum?"]
+    assert catalog.get_question("q1")['question'] == "Define inertia precisely."
+
+    writer("""
+        if isinstance(repository, SqliteRepository):
+            with repository._connection() as conn:
+                conn.execute("DELETE FROM questions WHERE id = 'q2'")
+        else:
+            os.remove(f"{repository.questions_dir}/q2.json")
+    """)
+    assert texts(catalog) == ["Define inertia precisely."]
+    assert catalog.get_question("q2") is None
+
+
+class VanishingRepository(SqliteRepository):
+    """Lists a question's stamp but cannot load it until it is 'written'."""
+
+    written = False
+
+    def get_question(self, question_id):
+        return super().get_question(question_id) if self.written else None
+
+
+def test_stamp_is_kept_only_after_the_question_loads(tmp_path):
+    repository = VanishingRepository(str(tmp_path / "grader.db"))
+    repository.add_question(question("q1", "What is inertia?", "2026-01-01T00:00:00"))
+    catalog = QuestionCatalog(repository, poll_interval=0)
+
+    assert catalog.list_questions() == []
+    repository.written = True
+    assert texts(catalog) == ["What is inertia?"]
+
+
+def test_polls_at_most_once_per_interval(tmp_path):
+    repository = JsonRepository(str(tmp_path / "data"))
+    catalog = QuestionCatalog(repository, poll_interval=3600)
+    assert catalog.list_questions() == []
+
+    repository.add_question(question("q1", "What is inertia?", "2026-01-01T00:00:00"))
+    assert catalog.list_questions() == []
+    catalog.refresh(force=True)
+    assert texts(catalog) == ["What is inertia?"]
@@ -0,0 +1,105 @@
+import pytest
+import repository
+from migrate_json import migrate
+from repository import JsonRepository, LogRepository, SqliteRepository, get_repository
+
+QUESTION = {"id": "q1", "subject": "Physics", "topic": "Motion", "question": "What is inertia?",
+            "expected_answer": "Resistance to change in motion", "created_at": "2026-01-01T00:00:00"}
+
+
+def submission(submission_id, student_name, submitted_at, question_id="q1", **fields):
+    return dict({"id": submission_id, "question_id": question_id, "student_name": student_name,
+                 "answer": f"Answer {submission_id}", "submitted_at": submitted_at}, **fields)
+
+
+@pytest.fixture(params=["json", "sqlite", "log"])
+def backend(request, tmp_path):
+    if request.param == "json":
+        return JsonRepository(str(tmp_path / "data"))
+    if request.param == "sqlite":
+        return SqliteRepository(str(tmp_path / "grader.db"))
+    return LogRepository(str(tmp_path / "data"), fsync=False)
+
+
+def test_question_round_trip(backend):
+    assert backend.get_question("q1") is None
+    backend.add_question(QUESTION)
+    assert backend.get_question("q1") == QUESTION
+    assert backend.list_questions() == [QUESTION]
+
+    stamp = backend.question_stamps()["q1"]
+    backend.add_question(dict(QUESTION, question="What is inertia, exactly?", padding="x"))
+    assert backend.get_question("q1")['question'] == "What is inertia, exactly?"
+    assert backend.question_stamps()["q1"] != stamp
+
+
+def test_submission_round_trip(backend):
+    backend.add_question(QUESTION)
+    backend.save_submissions([submission("s1", "Ada", "2026-01-02T00:00:00"),
+                              submission("s2", "Grace", "2026-01-03T00:00:00", question_id="q2")])
+    backend.save_submission(submission("s1", "Ada", "2026-01-02T00:00:00", score=7, status="graded"))
+
+    assert backend.get_submission("s1")['score'] == 7
+    assert backend.get_submission("missing") is None
+    assert [s['id'] for s in backend.list_submissions("q1")] == ["s1"]
+    assert sorted(s['id'] for s in backend.iter_submissions()) == ["s1", "s2"]
+    assert [s['id'] for s in backend.iter_submissions(graded=True)] == ["s1"]
+    assert [s['id'] for s in backend.iter_submissions(graded=False)] == ["s2"]
+
+
+def test_student_submissions_are_paged_oldest_first(backend):
+    backend.add_question(QUESTION)
+    backend.save_submissions([submission(f"s{i}", "Ada" if i % 2 else "ADA", f"2026-01-0{9 - i}T00:00:00")
+                              for i in range(5)]
+                             + [submission("other", "Grace", "2026-01-01T00:00:00")])
+
+    everything = backend.list_student_submissions("ada")
+    assert [s['id'] for s in everything] == ["s4", "s3", "s2", "s1", "s0"]
+    assert (everything[0]['question_text'], everything[0]['subject']) == ("What is inertia?", "Physics")
+    assert [s['id'] for s in backend.list_student_submissions("Ada", offset=1, limit=2)] == ["s3", "s2"]
+    assert [s['id'] for s in backend.list_student_submissions("Ada", offset=4, limit=2)] == ["s0"]
+    assert backend.list_student_submissions("Ada", offset=5) == []
+    assert backend.list_student_submissions("Nobody") == []
+
+
+def make_json_data(data_dir):
+    source = JsonRepository(str(data_dir))
+    source.add_question(QUESTION)
+    source.save_submission(submission("s1", "Ada", "2026-01-02T00:00:00", score=7))
+    source.save_submission(submission("s2", "Grace", "2026-01-03T00:00:00"))
+    return source
+
+
+def test_migrate_json(tmp_path):
+    make_json_data(tmp_path / "data")
+    db_path = str(tmp_path / "grader.db")
+
+    assert migrate(str(tmp_path / "data"), db_path, batch_size=1) == (1, 2)
+    # Re-running replaces rather than duplicates
+    assert migrate(str(tmp_path / "data"), db_path) == (1, 2)
+
+    target = SqliteRepository(db_path)
+    assert target.get_question("q1") == QUESTION
+    assert sorted(s['id'] for s in target.iter_submissions()) == ["s1", "s2"]
+    assert target.get_submission("s1")['score'] == 7
+
+
+def test_default_storage_migrates_existing_json_data(store, monkeypatch, capsys):
+    monkeypatch.delenv("GRADER_STORAGE")
+    make_json_data(store / "data")
+
+    migrated = get_repository()
+    assert isinstance(migrated, SqliteRepository)
+    assert "Migrated 1 questions and 2 submissions" in capsys.readouterr().out
+    assert migrated.get_submission("s2")['student_name'] == "Grace"
+
+    # A database that already has data is left alone
+    JsonRepository(str(store / "data")).add_question(dict(QUESTION, id="q2"))
+    monkeypatch.setattr(repository, "_repository", None)
+    assert get_repository().get_question("q2") is None
+    assert capsys.readouterr().out == ""
+
+
+def test_default_storage_starts_empty_without_json_data(store, capsys):
+    assert get_repository().list_questions() == []
+    assert capsys.readouterr().out == ""
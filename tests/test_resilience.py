@@ -0,0 +1,157 @@
+import time
+import itertools
+import pytest
+from fake_llm import FakeLLM, FakeAPIError
+from resilience import (ResilientCaller, CircuitBreaker, CircuitOpenError, GradingUnavailableError,
+                        CallTimeoutError, is_retryable)
+from token_budget import BudgetExceededError
+
+PROMPT = "Question: 2 + 2?\nStudent Answer: 4\nscore from 0-10"
+
+def make_caller(func, **options):
+    options.setdefault("base_delay", 0)
+    return ResilientCaller(func, **options)
+
+
+def on_nth_call(fake, setup):
+    """Wrap fake.generate, calling setup(fake, n) before the nth call (from 0)."""
+    counter = itertools.count()
+
+    def func(prompt):
+        setup(fake, next(counter))
+        return fake.generate(prompt)
+    return func
+
+
+def test_is_retryable_follows_status_codes_and_cause_chain():
+    assert is_retryable(FakeAPIError(503))
+    assert is_retryable(FakeAPIError(429))
+    assert not is_retryable(FakeAPIError(400))
+    try:
+        try:
+            raise FakeAPIError(503)
+        except FakeAPIError as e:
+            raise Exception("wrapped") from e
+    except Exception as e:
+        assert is_retryable(e)
+
+
+def test_timeout_is_retried():
+    fake = FakeLLM(hang_seconds=0.5)
+
+    def setup(fake, n):
+        fake.hang_rate = 1.0 if n == 0 else 0.0
+
+    caller = make_caller(on_nth_call(fake, setup), timeout=0.1, max_retries=2)
+    assert "SCORE:" in caller.call(PROMPT)
+    assert fake.calls == 2
+    assert caller.breaker.failures == 0
+
+
+def test_repeated_timeouts_raise_grading_unavailable():
+    fake = FakeLLM(hang_rate=1.0, hang_seconds=0.3)
+    caller = make_caller(fake.generate, timeout=0.05, max_retries=1)
+    with pytest.raises(GradingUnavailableError) as raised:
+        caller.call(PROMPT)
+    assert isinstance(raised.value.__cause__, CallTimeoutError)
+    assert fake.calls == 2
+
+
+def test_non_retryable_error_is_raised_at_once_and_not_a_breaker_failure():
+    fake = FakeLLM(error_rate=1.0, error_code=400)
+    caller = make_caller(fake.generate, max_retries=3)
+    with pytest.raises(FakeAPIError):
+        caller.call(PROMPT)
+    assert fake.calls == 1
+    assert caller.breaker.failures == 0
+
+
+def test_breaker_opens_then_recovers_through_half_open_trial():
+    fake = FakeLLM(error_rate=1.0, error_code=503)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    caller = make_caller(fake.generate, max_retries=1, breaker=breaker)
+
+    with pytest.raises(GradingUnavailableError):
+        caller.call(PROMPT)
+    assert breaker.state == "open"
+
+    # While open, calls are rejected without reaching the API
+    with pytest.raises(CircuitOpenError) as raised:
+        caller.call(PROMPT)
+    assert raised.value.retry_after > 0
+    assert fake.calls == 2
+
+    time.sleep(0.15)
+    assert breaker.state == "half_open"
+    fake.error_rate = 0.0
+    assert "SCORE:" in caller.call(PROMPT)
+    assert breaker.state == "closed"
+
+
+def test_failed_half_open_trial_reopens_breaker():
+    fake = FakeLLM(error_rate=1.0, error_code=503)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+    caller = make_caller(fake.generate, max_retries=0, breaker=breaker)
+    with pytest.raises(GradingUnavailableError):
+        caller.call(PROMPT)
+    time.sleep(0.15)
+    with pytest.raises(GradingUnavailableError):
+        caller.call(PROMPT)
+    assert breaker.state == "open"
+
+
+def test_hedged_request_wins_over_slow_first_request():
+    fake = FakeLLM()
+
+    def setup(fake, n):
+        fake.latency = 1.0 if n == 0 else 0.0
+
+    caller = make_caller(on_nth_call(fake, setup), timeout=5, hedge_after=0.05)
+    start = time.monotonic()
+    assert "SCORE:" in caller.call(PROMPT)
+    assert time.monotonic() - start < 0.5
+    assert fake.calls == 2
+
+
+def test_hedge_needs_a_free_slot():
+    fake = FakeLLM(latency=0.2)
+    slots = []
+
+    def acquire(prompt, blocking=True):
+        slots.append(blocking)
+        return blocking
+
+    caller = make_caller(fake.generate, timeout=5, hedge_after=0.05, acquire=acquire)
+    caller.call(PROMPT)
+    assert slots == [True, False]
+    assert fake.calls == 1
+
+
+def test_waiting_for_a_slot_is_outside_the_deadline():
+    fake = FakeLLM()
+
+    def acquire(prompt, blocking=True):
+        time.sleep(0.3)
+        return True
+
+    caller = make_caller(fake.generate, timeout=0.1, max_retries=0, acquire=acquire)
+    assert "SCORE:" in caller.call(PROMPT)
+    assert caller.breaker.failures == 0
+
+
+def test_acquire_error_is_not_retried_or_counted():
+    fake = FakeLLM()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    def acquire(prompt, blocking=True):
+        raise BudgetExceededError("Daily budget used up", 60)
+
+    caller = make_caller(fake.generate, breaker=breaker, acquire=acquire)
+    with pytest.raises(BudgetExceededError):
+        caller.call(PROMPT)
+    assert fake.calls == 0
+    # The half-open trial was given back, so the next call may still try
+    assert breaker.state == "half_open"
+    breaker.before_call()
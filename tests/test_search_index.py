@@ -0,0 +1,108 @@
+import sys
+import pytest
+import search_index
+from repository import get_repository
+from search_index import SearchIndex
+
+@pytest.fixture
+def index(tmp_path):
+    return SearchIndex(str(tmp_path / "search.db"))
+
+
+def question(question_id, subject, text, created_at="2026-01-01T00:00:00"):
+    return {"id": question_id, "subject": subject, "topic": "Basics", "question": text,
+            "expected_answer": "", "created_at": created_at}
+
+
+def submission(submission_id, question_id, answer, score=None, evaluation="", submitted_at="2026-01-02T00:00:00"):
+    return {"id": submission_id, "question_id": question_id, "student_name": "Ada", "answer": answer,
+            "evaluation": evaluation, "score": score, "submitted_at": submitted_at}
+
+
+def ids(results):
+    return [result['id'] for result in results]
+
+
+def test_finds_questions_and_submissions_by_stemmed_words(index):
+    index.add_question(question("q1", "Physics", "Why does a falling object accelerate?"))
+    index.add_question(question("q2", "Biology", "What do enzymes do?"))
+    index.add_submissions([submission("s1", "q1", "Gravity accelerates it", score=8),
+                           submission("s2", "q2", "They speed up reactions", score=3)])
+
+    assert sorted(ids(index.search("accelerating"))) == ["q1", "s1"]
+    assert ids(index.search("accelerating", kind="submission")) == ["s1"]
+    # Submissions take their subject from the indexed question
+    assert index.search("gravity")[0]['subject'] == "Physics"
+    assert ids(index.search("reactions", subject="biology")) == ["s2"]
+    assert ids(index.search("reactions", subject="Physics")) == []
+    assert ids(index.search("gravity OR reactions")) == []
+
+    result = index.search("gravity")[0]
+    assert (result['kind'], result['question_id'], result['score']) == ("submission", "q1", 8)
+    assert "[Gravity]" in result['snippet']
+
+
+def test_filters_by_score_and_date(index):
+    index.add_question(question("q1", "Physics", "Explain momentum."))
+    index.add_submissions([
+        submission("s1", "q1", "Momentum is mass times velocity", score=9, submitted_at="2026-03-01T10:00:00"),
+        submission("s2", "q1", "Momentum is speed", score=2, submitted_at="2026-03-02T10:00:00"),
+    ])
+
+    assert ids(index.search("momentum", kind="submission", min_score=5)) == ["s1"]
+    assert ids(index.search("momentum", kind="submission", max_score=5)) == ["s2"]
+    assert ids(index.search("momentum", kind="submission", since="2026-03-02")) == ["s2"]
+    assert ids(index.search("momentum", kind="submission", until="2026-03-01")) == ["s1"]
+
+
+def test_saving_again_replaces_the_indexed_text(index):
+    index.add_question(question("q1", "Physics", "Explain momentum."))
+    index.add_submission(submission("s1", "q1", "Momentum is speed"))
+    index.add_submission(submission("s1", "q1", "Momentum is mass times velocity", score=7))
+
+    assert ids(index.search("speed")) == []
+    assert index.search("velocity")[0]['score'] == 7
+    assert len(index.search("momentum", kind="submission")) == 1
+
+
+def test_ranks_every_match(index):
+    # The best match is the oldest, and thousands of weaker ones come after it
+    index.add_question(question("q1", "Thermodynamics", "Define entropy."))
+    index.add_submissions([submission("s0", "q1", "Entropy entropy entropy")])
+    index.add_submissions([
+        submission(f"s{i}", "q1", "Disorder grows over time in a closed system of many particles",
+                   evaluation="Mentions entropy only in passing among a great many other words")
+        for i in range(1, 2501)
+    ])
+
+    results = index.search("entropy", kind="submission", limit=5)
+    assert ids(results)[0] == "s0"
+    assert set(ids(index.search("entropy", limit=5))[:2]) == {"s0", "q1"}
+
+
+def test_pages_follow_the_ranking(index):
+    index.add_question(question("q1", "Physics", "Explain momentum."))
+    # Longer answers rank lower
+    index.add_submissions([submission(f"s{i}", "q1", "momentum" + " filler" * i) for i in range(6)])
+
+    assert ids(index.search("momentum", kind="submission")) == [f"s{i}" for i in range(6)]
+    assert ids(index.search("momentum", kind="submission", limit=2, offset=2)) == ["s2", "s3"]
+    assert ids(index.search("momentum", limit=2, offset=4)) == ids(index.search("momentum"))[4:6]
+
+
+def test_rebuild_from_the_command_line(store, monkeypatch, capsys):
+    repository = get_repository()
+    repository.add_question(question("q1", "Physics", "Explain momentum."))
+    repository.save_submissions([submission("s1", "q1", "Momentum is mass times velocity", score=9),
+                                 submission("s2", "q1", "Momentum is speed", score=2)])
+
+    monkeypatch.setattr(sys, "argv", ["search_index.py", "--rebuild", "velocity"])
+    search_index.main()
+    output = capsys.readouterr().out
+    assert "Indexed 1 questions and 2 submissions." in output
+    assert "[submission s1] Physics score 9:" in output
+    assert "1 results." in output
+
+    # Rebuilding again does not duplicate anything
+    assert search_index.get_search_index().rebuild(repository) == (1, 2)
+    assert len(search_index.get_search_index().search("momentum")) == 3
@@ -0,0 +1,119 @@
+import json
+import pytest
+from fake_llm import FakeLLM
+from llm_evaluator import LLMEvaluator
+from repository import get_repository
+from service import GraderService
+from student import Student
+from teacher import Teacher
+
+@pytest.fixture
+def service(store):
+    repository = get_repository()
+    evaluator = LLMEvaluator()
+    FakeLLM().install(evaluator)
+    return GraderService(Teacher(repository), Student(repository, evaluator))
+
+
+def post(service, path, data):
+    return service.dispatch("POST", path, body=json.dumps(data).encode("utf-8"))
+
+
+QUESTION = {"subject": "Maths", "topic": "Arithmetic", "question": "What is 2 + 2?"}
+
+def test_create_question_and_submit(service):
+    status, question = post(service, "/questions", dict(QUESTION, expected_answer="4", grading_criteria="10"))
+    assert status == 201
+    status, submission = post(service, f"/questions/{question['id']}/submissions",
+                              {"student_name": "Ada", "answer": "4"})
+    assert status == 201
+    assert 0 <= submission['score'] <= 10
+
+
+@pytest.mark.parametrize("field", ["expected_answer", "grading_criteria", "teacher"])
+@pytest.mark.parametrize("value", [10, None, ["a"], {"a": 1}])
+def test_optional_question_fields_must_be_strings(service, field, value):
+    status, payload = post(service, "/questions", dict(QUESTION, **{field: value}))
+    assert status == 400
+    assert field in payload['error']
+    assert service.dispatch("GET", "/questions")[1]['items'] == []
+
+
+def test_required_fields_are_checked(service):
+    status, payload = post(service, "/questions", dict(QUESTION, question="  "))
+    assert status == 400
+    assert service.dispatch("GET", "/questions/missing")[0] == 404
+    assert service.dispatch("DELETE", "/questions")[0] == 405
+
+
+def create_question(service, **fields):
+    return post(service, "/questions", dict(QUESTION, **fields))[1]
+
+
+def test_submission_pending_grading_is_accepted(service, capsys):
+    question = create_question(service)
+
+    def unavailable(prompt):
+        raise ValueError("Bad request")
+    service.student.evaluator.backend.respond = unavailable
+
+    status, submission = post(service, f"/questions/{question['id']}/submissions", {"student_name": "Ada", "answer": "4"})
+    assert status == 202
+    assert submission['status'] == 'pending'
+    assert 'score' not in submission
+    # The error is for the interactive menu only, not the server console
+    assert capsys.readouterr().out == ""
+    assert service.dispatch("GET", f"/submissions/{submission['id']}")[0] == 200
+
+
+def test_queued_submission_is_accepted(service, monkeypatch):
+    monkeypatch.setenv("GRADER_ASYNC_GRADING", "1")
+    question = create_question(service)
+    status, submission = post(service, f"/questions/{question['id']}/submissions", {"student_name": "Ada", "answer": "4"})
+    assert (status, submission['status']) == (202, 'pending')
+
+
+@pytest.mark.parametrize("body", [b"{not json", b"[1, 2]", b'"text"'])
+def test_body_must_be_a_json_object(service, body):
+    status, payload = service.dispatch("POST", "/questions", body=body)
+    assert status == 400
+    assert "JSON" in payload['error']
+
+
+@pytest.mark.parametrize("data", [{"answer": "4"}, {"student_name": "Ada"}, {"student_name": "Ada", "answer": 4},
+                                  {"student_name": " ", "answer": "4"}])
+def test_submission_fields_are_required(service, data):
+    question = create_question(service)
+    status, payload = post(service, f"/questions/{question['id']}/submissions", data)
+    assert status == 400
+    assert "required" in payload['error']
+
+
+def test_unknown_paths_and_methods(service):
+    assert service.dispatch("GET", "/nothing-here") == (404, {"error": "Not found"})
+    assert service.dispatch("GET", "/submissions/missing")[0] == 404
+    assert post(service, "/questions/missing/submissions", {"student_name": "Ada", "answer": "4"})[0] == 404
+    assert service.dispatch("GET", "/questions/q1/submissions") == (405, {"error": "Method GET not allowed"})
+    assert service.dispatch("POST", "/students/Ada/submissions")[0] == 405
+
+
+def test_pages_give_the_next_offset(service):
+    questions = [create_question(service, question=f"Question {i}?") for i in range(3)]
+
+    status, page = service.dispatch("GET", "/questions", "limit=2")
+    assert (status, len(page['items']), page['next_offset']) == (200, 2, 2)
+    status, page = service.dispatch("GET", "/questions", "offset=2&limit=2")
+    assert ([q['id'] for q in page['items']], page['next_offset']) == ([questions[2]['id']], None)
+
+    for question in questions:
+        post(service, f"/questions/{question['id']}/submissions", {"student_name": "Ada Lovelace", "answer": "4"})
+    status, page = service.dispatch("GET", "/students/ada%20lovelace/submissions", "limit=2")
+    assert (status, len(page['items']), page['next_offset']) == (200, 2, 2)
+    # Exactly one full page left means there is no next page
+    page = service.dispatch("GET", "/students/Ada%20Lovelace/submissions", "offset=1&limit=2")[1]
+    assert (len(page['items']), page['next_offset']) == (2, None)
+
+
+@pytest.mark.parametrize("query", ["limit=0", "limit=201", "offset=-1", "limit=ten"])
+def test_page_parameters_are_checked(service, query):
+    assert service.dispatch("GET", "/questions", query)[0] == 400
@@ -0,0 +1,102 @@
+import pytest
+from repository import SqliteRepository
+from similarity import DuplicateDetector, shingles, jaccard
+
+ANSWER = "Newton's second law says force equals mass times acceleration for any body."
+
+class CountingRepository(SqliteRepository):
+    """Counts how often a question's submissions are read."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.reads = 0
+
+    def iter_submissions(self, question_id=None, graded=None):
+        self.reads += 1
+        return super().iter_submissions(question_id, graded)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return CountingRepository(str(tmp_path / "grader.db"))
+
+
+def submission(submission_id, answer=ANSWER, student="Ada", **grade):
+    return dict({"id": submission_id, "question_id": "q1", "student_name": student, "answer": answer,
+                 "submitted_at": "2026-01-01T00:00:00"}, **grade)
+
+
+def graded(submission_id, model="gemini-1.5-pro", **fields):
+    return submission(submission_id, evaluation="Correct.", score=9, status="graded", grading_version="v1",
+                      grading_model=model, **fields)
+
+
+def save(detector, repository, item):
+    repository.save_submission(item)
+    detector.record(item)
+
+
+def test_shingles_and_jaccard():
+    assert shingles("A b, C d") == {"a b c", "b c d"}
+    assert shingles("Paris") == {"paris"}
+    assert jaccard({"a"}, set()) == 0.0
+
+
+def test_record_updates_the_index_without_reading_the_repository(repository):
+    detector = DuplicateDetector(repository)
+    assert detector.find_duplicates(submission("new")) == []
+    for i in range(20):
+        save(detector, repository, graded(f"s{i}", student=f"Student {i}"))
+
+    assert [match[0] for match in detector.find_duplicates(submission("new"))][:1] == ["s0"]
+    assert repository.reads == 1
+
+
+def test_reuse_copies_an_llm_grade(repository):
+    detector = DuplicateDetector(repository)
+    save(detector, repository, graded("source"))
+    copy = submission("copy", ANSWER + "!")
+    assert detector.reuse_grade(copy)
+    assert (copy['score'], copy['duplicate_of'], copy['grading_version'], copy['grading_model']) == \
+        (9, "source", "v1", "gemini-1.5-pro")
+
+
+@pytest.mark.parametrize("source", [
+    graded("source", model="local"),
+    graded("source", model="simulated"),
+    submission("source", evaluation="Correct.", score=9, status="graded"),
+    graded("source", duplicate_of="other"),
+    submission("source")
+])
+def test_only_llm_grades_are_reused(repository, source):
+    detector = DuplicateDetector(repository)
+    save(detector, repository, source)
+    assert not detector.reuse_grade(submission("copy"))
+
+
+def test_regraded_locally_stops_being_reused(repository):
+    detector = DuplicateDetector(repository)
+    save(detector, repository, graded("source"))
+    save(detector, repository, graded("source", model="local"))
+    assert not detector.reuse_grade(submission("copy"))
+
+
+def test_refresh_reads_submissions_saved_elsewhere(repository):
+    detector = DuplicateDetector(repository)
+    assert not detector.reuse_grade(submission("copy"))
+    # Saved by another process, so never recorded here
+    repository.save_submission(graded("source"))
+    assert not detector.reuse_grade(submission("copy"))
+
+    detector.refresh("q1")
+    assert detector.reuse_grade(submission("copy"))
+    assert repository.reads == 2
+
+
+def test_copy_report_groups_other_students(repository):
+    detector = DuplicateDetector(repository)
+    repository.save_submission(submission("a", student="Ada"))
+    repository.save_submission(submission("b", ANSWER + " Really.", student="Bob"))
+    repository.save_submission(submission("c", ANSWER, student="Ada"))
+    report = detector.copy_report("q1")
+    assert [cluster['students'] for cluster in report] == [["Ada", "Bob"]]
@@ -0,0 +1,89 @@
+from stream_parser import EvaluationStreamParser
+from llm_evaluator import LLMEvaluator
+from fake_llm import FakeLLM
+
+RESPONSE = "Sure.\nEVALUATION: Clear and correct, with one small slip.\nSCORE: 9\nExtra text."
+
+def parse(chunks):
+    parser = EvaluationStreamParser()
+    shown = "".join(parser.feed(chunk) for chunk in chunks)
+    return parser, shown + parser.close()
+
+
+def test_whole_response_in_one_chunk():
+    parser, shown = parse([RESPONSE])
+    assert parser.score == 9
+    assert parser.evaluation == "Clear and correct, with one small slip."
+    assert shown == parser.evaluation
+
+
+def test_any_chunking_gives_the_same_result():
+    for size in (1, 2, 3, 5, 7):
+        chunks = [RESPONSE[i:i + size] for i in range(0, len(RESPONSE), size)]
+        parser, shown = parse(chunks)
+        assert (parser.score, parser.evaluation) == (9, "Clear and correct, with one small slip.")
+        # Whitespace before SCORE: may already have been shown
+        assert shown.strip() == parser.evaluation
+
+
+def test_score_is_not_known_until_the_number_ends():
+    parser = EvaluationStreamParser()
+    parser.feed("EVALUATION: Good.\nSCORE: 1")
+    assert parser.score is None
+    parser.feed("0")
+    assert parser.score is None
+    parser.feed("\n")
+    assert parser.score == 10
+
+
+def test_score_at_the_very_end_is_completed_by_close():
+    parser, _ = parse(["EVALUATION: Good.\nSCORE: 7"])
+    assert parser.score == 7
+
+
+def test_cut_off_response_has_no_score():
+    parser, shown = parse(["EVALUATION: A long evaluation that was cut o"])
+    assert parser.score is None
+    assert shown == "A long evaluation that was cut o"
+
+
+def test_marker_split_across_chunks_is_not_shown():
+    parser = EvaluationStreamParser()
+    shown = parser.feed("EVALUATION: Fine. SC")
+    assert "SC" not in shown
+    assert shown + parser.feed("ORE: 5 ") == "Fine."
+    assert parser.score == 5
+
+
+def long_response(prompt):
+    return "EVALUATION: " + "This answer is discussed at length. " * 20 + "\nSCORE: 9"
+
+
+def test_stream_cut_at_token_cap_is_regraded_not_scored_zero(evaluator_env):
+    evaluator_env.setenv("GEMINI_MAX_OUTPUT_TOKENS", "50")
+    evaluator = LLMEvaluator()
+    fake = FakeLLM().install(evaluator)
+    fake.respond = long_response
+    shown = []
+
+    evaluation, score = evaluator.evaluate_answer("Q?", "An answer", "Expected", "10", on_text=shown.append)
+    assert score == 9
+    assert None in shown
+    assert shown[-1] == evaluation
+
+    # A later complete evaluation finds the same grade in the cache
+    assert evaluator.evaluate_answer("Q?", "An answer", "Expected", "10")[1] == 9
+    assert fake.calls == 2
+
+
+def test_response_without_score_is_not_cached(evaluator_env):
+    evaluator = LLMEvaluator()
+    fake = FakeLLM().install(evaluator)
+    fake.respond = lambda prompt: "EVALUATION: No score given."
+    try:
+        evaluator.evaluate_answer("Q?", "An answer", "Expected", "10", on_text=lambda text: None)
+        assert False, "expected GradingUnavailableError"
+    except Exception as e:
+        assert type(e).__name__ == "GradingUnavailableError"
+    fake.respond = lambda prompt: "EVALUATION: Fine.\nSCORE: 8"
+    assert evaluator.evaluate_answer("Q?", "An answer", "Expected", "10")[1] == 8
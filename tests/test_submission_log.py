@@ -0,0 +1,66 @@
+import pytest
+from submission_log import SubmissionLog
+
+def record(submission_id, version=0, question_id="q1"):
+    return {"id": submission_id, "question_id": question_id, "student_name": "Ada", "answer": f"Answer {version}",
+            "submitted_at": f"2026-01-01T00:00:{version:02d}"}
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / "log")
+
+
+def test_latest_version_wins(directory):
+    log = SubmissionLog(directory, fsync=False)
+    log.append([record("a"), record("b")])
+    log.append([record("a", 1)])
+    assert log.get("a")['answer'] == "Answer 1"
+    assert [r['id'] for r in log.read(log.select(question_id="q1"))] == ["b", "a"]
+    log.close()
+
+
+def test_append_after_a_torn_write(directory):
+    log = SubmissionLog(directory, fsync=False)
+    log.append([record("a")])
+    # Another process died half way through a line
+    with open(log._segment_path(log.active), "ab") as f:
+        f.write(b'{"id":"torn","question_id"')
+
+    log.append([record("b"), record("c")])
+    assert [r['id'] for r in log.read(["a", "b", "c"])] == ["a", "b", "c"]
+    log.close()
+
+    reopened = SubmissionLog(directory, fsync=False)
+    assert reopened.stats()['submissions'] == 3
+    assert reopened.get("c")['answer'] == "Answer 0"
+    reopened.close()
+
+
+def test_read_follows_compaction_by_another_process(directory):
+    # Segment 1 ends with s0 after two versions of "dup"; the third version
+    # goes to segment 2, so compacting segment 1 moves s0 to the start
+    writer = SubmissionLog(directory, segment_bytes=400, fsync=False)
+    for item in (record("dup", 0), record("dup", 1), record("s0"), record("dup", 2)):
+        writer.append([item])
+    assert writer.locations["s0"][:2] == (1, 220)
+
+    other = SubmissionLog(directory, segment_bytes=400, fsync=False)
+    assert other.compact() == (1, 220)
+
+    assert [r['id'] for r in writer.read(["s0", "dup"])] == ["s0", "dup"]
+    writer.close()
+    other.close()
+
+
+def test_segments_rotate_and_reload_from_index_files(directory):
+    log = SubmissionLog(directory, segment_bytes=300, fsync=False)
+    for i in range(10):
+        log.append([record(f"s{i}", question_id=f"q{i % 2}")])
+    assert log.stats()['segments'] > 1
+    log.close()
+
+    reopened = SubmissionLog(directory, segment_bytes=300, fsync=False)
+    assert reopened.select(question_id="q1") == ["s1", "s3", "s5", "s7", "s9"]
+    assert reopened.get("s8")['question_id'] == "q0"
+    reopened.close()
@@ -0,0 +1,58 @@
+import pytest
+from token_budget import TokenBudget, BudgetExceededError, estimate_tokens, truncate_to_tokens
+from rate_limiter import RateLimiter
+
+def test_estimate_tokens_is_about_four_characters_each():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("x" * 400) == 101
+
+
+def test_truncate_keeps_start_and_end():
+    text = "start " + "middle " * 200 + "end"
+    shortened, omitted = truncate_to_tokens(text, 50)
+    assert shortened.startswith("start ")
+    assert shortened.endswith("end")
+    assert f"[... {omitted} characters omitted ...]" in shortened
+    assert len(text) - omitted == 200
+
+
+def test_truncate_leaves_short_text_alone():
+    assert truncate_to_tokens("short", 50) == ("short", 0)
+    assert truncate_to_tokens("x" * 1000, 0) == ("x" * 1000, 0)
+
+
+def test_minute_budget_refuses_without_blocking():
+    budget = TokenBudget(tokens_per_minute=100)
+    assert budget.acquire(80, blocking=False)
+    assert not budget.acquire(80, blocking=False)
+
+
+def test_charged_output_counts_against_later_requests():
+    budget = TokenBudget(tokens_per_minute=100)
+    assert budget.acquire(10, blocking=False)
+    budget.charge(85)
+    assert not budget.acquire(10, blocking=False)
+
+
+def test_daily_token_budget_raises_with_retry_after():
+    budget = TokenBudget(tokens_per_day=100)
+    budget.acquire(60)
+    with pytest.raises(BudgetExceededError) as raised:
+        budget.acquire(60)
+    assert 0 < raised.value.retry_after <= 24 * 3600
+    assert budget.remaining_today() == (40, None)
+
+
+def test_daily_request_budget_counts_seeded_usage():
+    budget = TokenBudget(requests_per_day=3)
+    budget.seed(0, 2)
+    budget.acquire(1)
+    with pytest.raises(BudgetExceededError):
+        budget.acquire(1)
+
+
+def test_rate_limiter_refuses_without_blocking():
+    limiter = RateLimiter(2)
+    assert limiter.acquire(blocking=False)
+    assert limiter.acquire(blocking=False)
+    assert not limiter.acquire(blocking=False)
@@ -0,0 +1,159 @@
+import time
+import threading
+from datetime import date, datetime, timedelta
+from resilience import GradingUnavailableError
+from metrics import metrics
+
+# Rough average for English text; Gemini's tokenizer is close to this
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text):
+    """Cheap token estimate (about four characters per token for English text)."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Shorten text to about max_tokens, keeping its start and its end.
+
+    Returns:
+        tuple: (text, omitted) where omitted is the number of characters cut
+            from the middle, 0 if the text already fit
+    """
+    limit = max_tokens * CHARS_PER_TOKEN
+    if not max_tokens or len(text) <= limit:
+        return text, 0
+
+    # Answers usually state their conclusion at the end, so keep some of it
+    head = limit * 3 // 4
+    tail = limit - head
+    omitted = len(text) - head - tail
+    return f"{text[:head]}\n[... {omitted} characters omitted ...]\n{text[len(text) - tail:]}", omitted
+
+
+class BudgetExceededError(GradingUnavailableError):
+    """A daily token or request budget is used up; retry_after is the time until midnight."""
+
+
+class TokenBudget:
+    """Per-minute token limit and per-day token and request limits.
+
+    The per-minute limit is a token bucket: a request waits until its prompt
+    fits. A daily limit is not waited for, since that could take hours; once it
+    is used up every request raises BudgetExceededError until midnight (local
+    time). Output tokens are only known afterwards, so charge() counts them
+    against the requests that follow.
+    """
+
+    def __init__(self, tokens_per_minute=0, tokens_per_day=0, requests_per_day=0):
+        self.tokens_per_minute = tokens_per_minute
+        self.tokens_per_day = tokens_per_day
+        self.requests_per_day = requests_per_day
+        self.tokens = float(tokens_per_minute)
+        self.refill_rate = tokens_per_minute / 60.0
+        self.updated_at = time.monotonic()
+        self.day = date.today()
+        self.day_tokens = 0
+        self.day_requests = 0
+        self.lock = threading.Lock()
+
+    def seed(self, tokens, requests):
+        """Count usage from earlier today (e.g. recorded by a previous run) against the daily limits."""
+        with self.lock:
+            self._roll_day()
+            self.day_tokens += tokens
+            self.day_requests += requests
+
+    def acquire(self, tokens, blocking=True):
+        """Block until a request with this many prompt tokens fits the per-minute budget.
+
+        A prompt larger than a whole minute's budget waits for a full bucket.
+        With blocking False, returns False at once instead of waiting.
+
+        Returns:
+            bool: True if the request was counted (always, when blocking)
+
+        Raises:
+            BudgetExceededError: If the request would pass a daily budget
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._roll_day()
+                if self.requests_per_day and self.day_requests >= self.requests_per_day:
+                    self._reject("requests", f"Daily budget of {self.requests_per_day} API requests used up")
+                if self.tokens_per_day and self.day_tokens + tokens > self.tokens_per_day:
+                    self._reject("tokens", f"Daily budget of {self.tokens_per_day} tokens used up")
+
+                if self.tokens_per_minute:
+                    now = time.monotonic()
+                    self.tokens = min(self.tokens_per_minute, self.tokens + (now - self.updated_at) * self.refill_rate)
+                    self.updated_at = now
+
+                needed = min(tokens, self.tokens_per_minute)
+                if not self.tokens_per_minute or self.tokens >= needed:
+                    if self.tokens_per_minute:
+                        self.tokens -= tokens
+                    self.day_tokens += tokens
+                    self.day_requests += 1
+                    if waited:
+                        metrics.observe("grader_budget_wait_seconds", waited)
+                    return True
+                if not blocking:
+                    return False
+                wait = (needed - self.tokens) / self.refill_rate
+            time.sleep(wait)
+            waited += wait
+
+    def charge(self, tokens):
+        """Count tokens already spent (a response) without waiting."""
+        with self.lock:
+            self._roll_day()
+            if self.tokens_per_minute:
+                self.tokens -= tokens
+            self.day_tokens += tokens
+
+    def remaining_today(self):
+        """Return (tokens, requests) left today, None for a limit that is not set."""
+        with self.lock:
+            self._roll_day()
+            return (
+                max(0, self.tokens_per_day - self.day_tokens) if self.tokens_per_day else None,
+                max(0, self.requests_per_day - self.day_requests) if self.requests_per_day else None
+            )
+
+    def _roll_day(self):
+        today = date.today()
+        if today != self.day:
+            self.day = today
+            self.day_tokens = 0
+            self.day_requests = 0
+
+    def _reject(self, limit, message):
+        metrics.inc("grader_budget_rejections_total", limit=limit)
+        midnight = datetime.combine(self.day + timedelta(days=1), datetime.min.time())
+        raise BudgetExceededError(message, (midnight - datetime.now()).total_seconds())
+
+
+# One budget per API key, shared by every evaluator using that key
+_budgets = {}
+_budgets_lock = threading.Lock()
+
+def get_token_budget(key, tokens_per_minute=0, tokens_per_day=0, requests_per_day=0, used_today=None):
+    """Return the shared budget for a key, or None if no limit is set.
+
+    Args:
+        used_today (callable, optional): Returns the (tokens, requests) already
+            used today, counted against the daily limits when the budget is created
+    """
+    if not (tokens_per_minute or tokens_per_day or requests_per_day):
+        return None
+
+    limits = (tokens_per_minute, tokens_per_day, requests_per_day)
+    with _budgets_lock:
+        budget = _budgets.get(key)
+        if budget is None or (budget.tokens_per_minute, budget.tokens_per_day, budget.requests_per_day) != limits:
+            budget = TokenBudget(*limits)
+            if used_today and (tokens_per_day or requests_per_day):
+                budget.seed(*used_today())
+            _budgets[key] = budget
+        return budget
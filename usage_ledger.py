@@ -0,0 +1,149 @@
+import os
+import time
+import atexit
+import sqlite3
+import argparse
+import threading
+from datetime import date
+from dotenv import load_dotenv
+
+class UsageLedger:
+    """Gemini requests and estimated tokens per day, question and teacher.
+
+    Usage is added up in memory and written at most once per flush_interval
+    seconds (and when the process exits), so recording a call costs no disk
+    write of its own.
+    """
+
+    def __init__(self, path="data/usage.db", flush_interval=5.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.pending = {}
+        self.flushed_at = time.monotonic()
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS usage (
+                day TEXT NOT NULL,
+                question_id TEXT NOT NULL,
+                teacher TEXT NOT NULL,
+                requests INTEGER NOT NULL,
+                prompt_tokens INTEGER NOT NULL,
+                output_tokens INTEGER NOT NULL,
+                PRIMARY KEY (day, question_id, teacher)
+            )
+        """)
+        self.conn.commit()
+
+    def record(self, question_id, teacher, prompt_tokens, output_tokens, requests=1):
+        """Add one API call (or several) to today's usage for a question and teacher."""
+        key = (date.today().isoformat(), question_id or "", teacher or "")
+        with self.lock:
+            counts = self.pending.setdefault(key, [0, 0, 0])
+            counts[0] += requests
+            counts[1] += prompt_tokens
+            counts[2] += output_tokens
+            due = time.monotonic() - self.flushed_at >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write the usage recorded since the last flush."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.flushed_at = time.monotonic()
+            if not pending:
+                return
+            self.conn.executemany(
+                "INSERT INTO usage (day, question_id, teacher, requests, prompt_tokens, output_tokens) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (day, question_id, teacher) DO UPDATE SET "
+                "requests = requests + excluded.requests, "
+                "prompt_tokens = prompt_tokens + excluded.prompt_tokens, "
+                "output_tokens = output_tokens + excluded.output_tokens",
+                [(*key, *counts) for key, counts in pending.items()]
+            )
+            self.conn.commit()
+
+    def day_totals(self, day=None):
+        """Return (tokens, requests) used on a day (default today)."""
+        self.flush()
+        with self.lock:
+            tokens, requests = self.conn.execute(
+                "SELECT COALESCE(SUM(prompt_tokens + output_tokens), 0), COALESCE(SUM(requests), 0) FROM usage WHERE day = ?",
+                ((day or date.today().isoformat()),)
+            ).fetchone()
+        return tokens, requests
+
+    def report(self, by="question", since=None, until=None):
+        """Total usage grouped by 'question', 'teacher' or 'day', largest first.
+
+        Args:
+            by (str, optional): What to group by
+            since (str, optional): First day included (YYYY-MM-DD)
+            until (str, optional): Last day included (YYYY-MM-DD)
+
+        Returns:
+            list: Dicts with the group's 'key', 'requests', 'prompt_tokens',
+                'output_tokens' and 'total_tokens'
+        """
+        column = {"question": "question_id", "teacher": "teacher", "day": "day"}[by]
+        query = (f"SELECT {column}, SUM(requests), SUM(prompt_tokens), SUM(output_tokens) FROM usage "
+                 "WHERE day >= ? AND day <= ? GROUP BY 1")
+        self.flush()
+        with self.lock:
+            rows = self.conn.execute(query, (since or "", until or "9999")).fetchall()
+        report = [
+            {"key": key, "requests": requests, "prompt_tokens": prompt_tokens, "output_tokens": output_tokens,
+             "total_tokens": prompt_tokens + output_tokens}
+            for key, requests, prompt_tokens, output_tokens in rows
+        ]
+        report.sort(key=lambda row: row['key'] if by == "day" else -row['total_tokens'])
+        return report
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+def get_usage_ledger():
+    """Return the shared ledger at GRADER_USAGE_PATH, or None if GRADER_USAGE_DISABLED is set."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            load_dotenv()
+            if os.getenv("GRADER_USAGE_DISABLED", "").lower() in ("1", "true", "yes"):
+                return None
+            _ledger = UsageLedger(os.getenv("GRADER_USAGE_PATH", "data/usage.db"))
+            atexit.register(_ledger.flush)
+        return _ledger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report Gemini usage per question, teacher or day.")
+    parser.add_argument("--by", choices=["question", "teacher", "day"], default="question")
+    parser.add_argument("--since", help="First day included (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Last day included (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    ledger = get_usage_ledger()
+    if ledger is None:
+        print("Usage recording is disabled (GRADER_USAGE_DISABLED).")
+        return
+    report = ledger.report(args.by, args.since, args.until)
+    if not report:
+        print("No usage recorded.")
+        return
+
+    print(f"{args.by.capitalize():<24} {'Requests':>10} {'Prompt tokens':>14} {'Output tokens':>14} {'Total':>12}")
+    for row in report:
+        print(f"{(row['key'] or '(none)'):<24} {row['requests']:>10} {row['prompt_tokens']:>14} "
+              f"{row['output_tokens']:>14} {row['total_tokens']:>12}")
+    print(f"{'Total':<24} {sum(r['requests'] for r in report):>10} {sum(r['prompt_tokens'] for r in report):>14} "
+          f"{sum(r['output_tokens'] for r in report):>14} {sum(r['total_tokens'] for r in report):>12}")
+
+if __name__ == "__main__":
+    main()